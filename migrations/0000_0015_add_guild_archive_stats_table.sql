@@ -0,0 +1,10 @@
+CREATE TABLE IF NOT EXISTS guild_archive_stats (
+  guild_id INTEGER PRIMARY KEY,
+  events INTEGER NOT NULL DEFAULT 0,
+  signups_available INTEGER NOT NULL DEFAULT 0,
+  signups_maybe INTEGER NOT NULL DEFAULT 0,
+  signups_unavailable INTEGER NOT NULL DEFAULT 0,
+  first_event_at INTEGER,
+  last_event_at INTEGER,
+  updated_at INTEGER NOT NULL
+);
@@ -0,0 +1,70 @@
+-- Rebuild the event child tables with foreign keys to events so deleting an
+-- event removes its signups, roles and reminders. Rows that already point at
+-- deleted events are dropped during the copy.
+
+CREATE TABLE event_signups_new (
+    event_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'available',
+    created_at INTEGER NOT NULL,
+    PRIMARY KEY (event_id, user_id),
+    FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
+);
+
+INSERT INTO event_signups_new (event_id, user_id, status, created_at)
+SELECT event_id, user_id, status, created_at
+FROM event_signups
+WHERE event_id IN (SELECT id FROM events);
+
+DROP TABLE event_signups;
+ALTER TABLE event_signups_new RENAME TO event_signups;
+
+CREATE INDEX IF NOT EXISTS idx_event_signups_event_status
+    ON event_signups(event_id, status);
+
+
+CREATE TABLE event_allowed_roles_new (
+    event_id INTEGER NOT NULL,
+    role_id INTEGER NOT NULL,
+    PRIMARY KEY (event_id, role_id),
+    FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
+);
+
+INSERT INTO event_allowed_roles_new (event_id, role_id)
+SELECT event_id, role_id
+FROM event_allowed_roles
+WHERE event_id IN (SELECT id FROM events);
+
+DROP TABLE event_allowed_roles;
+ALTER TABLE event_allowed_roles_new RENAME TO event_allowed_roles;
+
+CREATE INDEX IF NOT EXISTS idx_event_allowed_roles_event_id
+    ON event_allowed_roles(event_id);
+
+CREATE INDEX IF NOT EXISTS idx_event_allowed_roles_role_id
+    ON event_allowed_roles(role_id);
+
+
+CREATE TABLE event_reminders_new (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  event_id INTEGER NOT NULL,
+  user_id INTEGER NOT NULL,
+  remind_at INTEGER NOT NULL,
+  created_at INTEGER NOT NULL,
+  UNIQUE(event_id, user_id, remind_at),
+  FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
+);
+
+INSERT INTO event_reminders_new (id, event_id, user_id, remind_at, created_at)
+SELECT id, event_id, user_id, remind_at, created_at
+FROM event_reminders
+WHERE event_id IN (SELECT id FROM events);
+
+DROP TABLE event_reminders;
+ALTER TABLE event_reminders_new RENAME TO event_reminders;
+
+CREATE INDEX IF NOT EXISTS idx_event_reminders_remind_at
+  ON event_reminders(remind_at);
+
+CREATE INDEX IF NOT EXISTS idx_event_reminders_event_id
+  ON event_reminders(event_id);
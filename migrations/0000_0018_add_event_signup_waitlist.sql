@@ -0,0 +1,7 @@
+-- Waitlisted signups have status 'waitlist' and a position; the lowest
+-- position is promoted first when an available slot frees up.
+ALTER TABLE event_signups ADD COLUMN position INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_event_signups_waitlist
+    ON event_signups(event_id, position)
+    WHERE status = 'waitlist';
@@ -0,0 +1,24 @@
+-- Backstop for max_slots: no writer, in any process, can store more
+-- 'available' signups than the event allows. The bot already checks the
+-- count under a write lock; this catches anything that doesn't.
+CREATE TRIGGER IF NOT EXISTS trg_event_signups_capacity_insert
+BEFORE INSERT ON event_signups
+WHEN NEW.status = 'available'
+ AND (
+    SELECT COUNT(*) FROM event_signups
+    WHERE event_id = NEW.event_id AND status = 'available' AND user_id != NEW.user_id
+ ) >= (SELECT max_slots FROM events WHERE id = NEW.event_id)
+BEGIN
+    SELECT RAISE(ABORT, 'event is full');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_event_signups_capacity_update
+BEFORE UPDATE OF status ON event_signups
+WHEN NEW.status = 'available' AND OLD.status != 'available'
+ AND (
+    SELECT COUNT(*) FROM event_signups
+    WHERE event_id = NEW.event_id AND status = 'available' AND user_id != NEW.user_id
+ ) >= (SELECT max_slots FROM events WHERE id = NEW.event_id)
+BEGIN
+    SELECT RAISE(ABORT, 'event is full');
+END;
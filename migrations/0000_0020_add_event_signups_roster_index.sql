@@ -0,0 +1,3 @@
+-- Roster order used by the signup embed preview and the paginated roster view.
+CREATE INDEX IF NOT EXISTS idx_event_signups_roster
+    ON event_signups(event_id, status, COALESCE(position, created_at), user_id);
@@ -0,0 +1,6 @@
+-- Scheduler failures per schedule: retry_at holds the backoff, and a
+-- schedule that keeps failing gets quarantined_at and is skipped until edited.
+ALTER TABLE schedules ADD COLUMN failure_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE schedules ADD COLUMN retry_at INTEGER;
+ALTER TABLE schedules ADD COLUMN last_error TEXT;
+ALTER TABLE schedules ADD COLUMN quarantined_at INTEGER;
@@ -0,0 +1,4 @@
+-- What the scheduler does with occurrences it missed while the bot was down:
+-- 'skip', 'latest' (post the most recent one) or 'all' (post every one
+-- inside CATCH_UP_WINDOW_HOURS).
+ALTER TABLE schedules ADD COLUMN catch_up TEXT NOT NULL DEFAULT 'skip';
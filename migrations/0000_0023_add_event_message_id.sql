@@ -0,0 +1,3 @@
+-- Signup post of an event, so it can be re-rendered after the event changes.
+-- The discussion thread of a post has the same ID.
+ALTER TABLE events ADD COLUMN message_id INTEGER;
@@ -0,0 +1,10 @@
+-- Set once signups of an event close. Only open events get their signup
+-- views restored, and the lifecycle job walks them in time order.
+ALTER TABLE events ADD COLUMN closed_at INTEGER;
+
+-- Events that already started count as closed.
+UPDATE events SET closed_at = timestamp
+WHERE timestamp <= CAST(strftime('%s', 'now') AS INTEGER);
+
+CREATE INDEX IF NOT EXISTS idx_events_open ON events(timestamp, id) WHERE closed_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_events_closed_at ON events(closed_at) WHERE closed_at IS NOT NULL;
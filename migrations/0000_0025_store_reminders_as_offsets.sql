@@ -0,0 +1,29 @@
+-- Reminders hold seconds before the event instead of an absolute time, so
+-- they follow the event when it moves. Due reminders are found from the
+-- open events through idx_events_open.
+CREATE TABLE event_reminders_new (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  event_id INTEGER NOT NULL,
+  user_id INTEGER NOT NULL,
+  offset_seconds INTEGER NOT NULL,
+  created_at INTEGER NOT NULL,
+  UNIQUE(event_id, user_id, offset_seconds),
+  FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
+);
+
+INSERT OR IGNORE INTO event_reminders_new (id, event_id, user_id, offset_seconds, created_at)
+SELECT r.id, r.event_id, r.user_id, MAX(e.timestamp - r.remind_at, 0), r.created_at
+FROM event_reminders r
+JOIN events e ON e.id = r.event_id;
+
+DROP TABLE event_reminders;
+ALTER TABLE event_reminders_new RENAME TO event_reminders;
+-- No separate index: the unique one leads with event_id, which is all the
+-- dispatcher's join needs.
+
+-- Offsets added to a user's reminders whenever they sign up.
+CREATE TABLE IF NOT EXISTS user_reminder_defaults (
+  user_id INTEGER NOT NULL,
+  offset_seconds INTEGER NOT NULL,
+  PRIMARY KEY (user_id, offset_seconds)
+);
@@ -0,0 +1,9 @@
+-- How reminders are delivered: "dm" sends one DM per user, "thread" sends one
+-- message per event and offset in the event's discussion thread that mentions
+-- everyone due. events.reminder_mode overrides the guild's setting when set.
+ALTER TABLE events ADD COLUMN reminder_mode TEXT;
+
+CREATE TABLE IF NOT EXISTS guild_settings (
+  guild_id INTEGER PRIMARY KEY,
+  reminder_mode TEXT NOT NULL DEFAULT 'dm'
+);
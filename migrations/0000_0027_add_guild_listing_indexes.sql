@@ -0,0 +1,8 @@
+-- /list events and /list schedules page through a guild's rows in time
+-- order with keyset cursors. The old single-column guild indexes are
+-- prefixes of these.
+CREATE INDEX IF NOT EXISTS idx_events_guild_timestamp ON events(guild_id, timestamp, id);
+CREATE INDEX IF NOT EXISTS idx_schedules_guild_next_run ON schedules(guild_id, next_run_at, id);
+
+DROP INDEX IF EXISTS idx_events_guild_id;
+DROP INDEX IF EXISTS idx_schedules_guild_id;
@@ -0,0 +1,3 @@
+-- /export calendar looks up the events a member signed up for; the primary
+-- key leads with event_id, so this needs its own index.
+CREATE INDEX IF NOT EXISTS idx_event_signups_user ON event_signups(user_id, event_id);
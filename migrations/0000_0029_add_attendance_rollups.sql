@@ -0,0 +1,45 @@
+-- Weekly signup totals for /stats, added to as events close so the stats
+-- never scan event_signups. week_start is the Monday 00:00 UTC of the
+-- event's week (the epoch fell on a Thursday, hence the 4 days).
+CREATE TABLE IF NOT EXISTS attendance_weekly (
+  guild_id INTEGER NOT NULL,
+  week_start INTEGER NOT NULL,
+  category TEXT NOT NULL,
+  user_id INTEGER NOT NULL,
+  available INTEGER NOT NULL DEFAULT 0,
+  maybe INTEGER NOT NULL DEFAULT 0,
+  unavailable INTEGER NOT NULL DEFAULT 0,
+  waitlist INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (guild_id, week_start, category, user_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_attendance_weekly_user
+ON attendance_weekly(guild_id, user_id, week_start);
+
+CREATE TABLE IF NOT EXISTS category_weekly (
+  guild_id INTEGER NOT NULL,
+  week_start INTEGER NOT NULL,
+  category TEXT NOT NULL,
+  events INTEGER NOT NULL DEFAULT 0,
+  slots INTEGER NOT NULL DEFAULT 0,
+  available INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (guild_id, week_start, category)
+);
+
+-- Events closed before this migration, in the same transaction so none is
+-- counted twice.
+INSERT INTO attendance_weekly (guild_id, week_start, category, user_id, available, maybe, unavailable, waitlist)
+SELECT e.guild_id, e.timestamp - (e.timestamp - 345600) % 604800, e.category, s.user_id,
+       SUM(s.status = 'available'), SUM(s.status = 'maybe'),
+       SUM(s.status = 'unavailable'), SUM(s.status = 'waitlist')
+FROM events e
+JOIN event_signups s ON s.event_id = e.id
+WHERE e.closed_at IS NOT NULL
+GROUP BY 1, 2, 3, 4;
+
+INSERT INTO category_weekly (guild_id, week_start, category, events, slots, available)
+SELECT e.guild_id, e.timestamp - (e.timestamp - 345600) % 604800, e.category, COUNT(*), SUM(e.max_slots),
+       SUM((SELECT COUNT(*) FROM event_signups s WHERE s.event_id = e.id AND s.status = 'available'))
+FROM events e
+WHERE e.closed_at IS NOT NULL
+GROUP BY 1, 2, 3;
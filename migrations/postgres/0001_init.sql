@@ -0,0 +1,113 @@
+-- PostgreSQL schema matching the SQLite migrations up to 0000_0017.
+
+CREATE TABLE IF NOT EXISTS events (
+  id BIGSERIAL PRIMARY KEY,
+  schedule_id BIGINT,
+  guild_id BIGINT NOT NULL,
+  channel_id BIGINT NOT NULL,
+  creator_id BIGINT NOT NULL,
+  title TEXT,
+  category TEXT NOT NULL,
+  duration INTEGER,
+  signup_mode TEXT NOT NULL DEFAULT 'open',
+  max_slots INTEGER NOT NULL DEFAULT 0,
+  allowed_role_id BIGINT,
+  timestamp BIGINT NOT NULL,
+  ping_roles INTEGER NOT NULL DEFAULT 0,
+  announcement_message TEXT,
+  created_at BIGINT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_events_guild_id ON events(guild_id);
+CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events(timestamp);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_events_schedule_ts ON events(schedule_id, timestamp);
+
+
+CREATE TABLE IF NOT EXISTS schedules (
+  id BIGSERIAL PRIMARY KEY,
+  guild_id BIGINT NOT NULL,
+  channel_id BIGINT NOT NULL,
+  creator_id BIGINT NOT NULL,
+  title TEXT,
+  category TEXT NOT NULL,
+  duration INTEGER,
+
+  frequency TEXT NOT NULL,
+  "interval" INTEGER NOT NULL,
+
+  day_of_week INTEGER,
+
+  time_of_day BIGINT NOT NULL,
+  next_run_at BIGINT,
+  start_date BIGINT NOT NULL,
+  end_date BIGINT,
+
+  signup_mode TEXT NOT NULL DEFAULT 'open',
+  ping_roles INTEGER NOT NULL DEFAULT 0,
+  announcement_message TEXT,
+
+  created_at BIGINT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_schedules_guild_id ON schedules(guild_id);
+CREATE INDEX IF NOT EXISTS idx_schedules_category ON schedules(category);
+
+
+CREATE TABLE IF NOT EXISTS schedule_allowed_roles (
+  schedule_id BIGINT NOT NULL REFERENCES schedules(id) ON DELETE CASCADE,
+  role_id BIGINT NOT NULL,
+  PRIMARY KEY (schedule_id, role_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_schedule_allowed_roles_role_id ON schedule_allowed_roles(role_id);
+
+
+CREATE TABLE IF NOT EXISTS event_signups (
+  event_id BIGINT NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+  user_id BIGINT NOT NULL,
+  status TEXT NOT NULL DEFAULT 'available',
+  created_at BIGINT NOT NULL,
+  PRIMARY KEY (event_id, user_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_event_signups_event_status ON event_signups(event_id, status);
+
+
+CREATE TABLE IF NOT EXISTS event_allowed_roles (
+  event_id BIGINT NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+  role_id BIGINT NOT NULL,
+  PRIMARY KEY (event_id, role_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_event_allowed_roles_role_id ON event_allowed_roles(role_id);
+
+
+CREATE TABLE IF NOT EXISTS event_reminders (
+  id BIGSERIAL PRIMARY KEY,
+  event_id BIGINT NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+  user_id BIGINT NOT NULL,
+  remind_at BIGINT NOT NULL,
+  created_at BIGINT NOT NULL,
+  UNIQUE (event_id, user_id, remind_at)
+);
+
+CREATE INDEX IF NOT EXISTS idx_event_reminders_remind_at ON event_reminders(remind_at);
+
+
+CREATE TABLE IF NOT EXISTS guild_archive_stats (
+  guild_id BIGINT PRIMARY KEY,
+  events INTEGER NOT NULL DEFAULT 0,
+  signups_available INTEGER NOT NULL DEFAULT 0,
+  signups_maybe INTEGER NOT NULL DEFAULT 0,
+  signups_unavailable INTEGER NOT NULL DEFAULT 0,
+  first_event_at BIGINT,
+  last_event_at BIGINT,
+  updated_at BIGINT NOT NULL
+);
+
+
+CREATE TABLE IF NOT EXISTS worker_leases (
+  name TEXT PRIMARY KEY,
+  owner TEXT NOT NULL,
+  expires_at BIGINT NOT NULL
+);
@@ -0,0 +1,6 @@
+-- Matches SQLite migration 0000_0018.
+ALTER TABLE event_signups ADD COLUMN IF NOT EXISTS position INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_event_signups_waitlist
+    ON event_signups(event_id, position)
+    WHERE status = 'waitlist';
@@ -0,0 +1,27 @@
+-- Matches SQLite migration 0000_0019. Locking the event row makes
+-- concurrent transactions wait for each other before counting.
+CREATE OR REPLACE FUNCTION check_event_capacity() RETURNS trigger AS $$
+DECLARE
+    slots INTEGER;
+BEGIN
+    IF NEW.status <> 'available' OR (TG_OP = 'UPDATE' AND OLD.status = 'available') THEN
+        RETURN NEW;
+    END IF;
+
+    SELECT max_slots INTO slots FROM events WHERE id = NEW.event_id FOR UPDATE;
+
+    IF (
+        SELECT COUNT(*) FROM event_signups
+        WHERE event_id = NEW.event_id AND status = 'available' AND user_id <> NEW.user_id
+    ) >= slots THEN
+        RAISE EXCEPTION 'event is full' USING ERRCODE = 'check_violation';
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_event_signups_capacity ON event_signups;
+CREATE TRIGGER trg_event_signups_capacity
+BEFORE INSERT OR UPDATE OF status ON event_signups
+FOR EACH ROW EXECUTE FUNCTION check_event_capacity();
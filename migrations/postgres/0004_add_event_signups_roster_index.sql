@@ -0,0 +1,3 @@
+-- Matches SQLite migration 0000_0020.
+CREATE INDEX IF NOT EXISTS idx_event_signups_roster
+    ON event_signups(event_id, status, (COALESCE(position, created_at)), user_id);
@@ -0,0 +1,5 @@
+-- Matches SQLite migration 0000_0021.
+ALTER TABLE schedules ADD COLUMN IF NOT EXISTS failure_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE schedules ADD COLUMN IF NOT EXISTS retry_at BIGINT;
+ALTER TABLE schedules ADD COLUMN IF NOT EXISTS last_error TEXT;
+ALTER TABLE schedules ADD COLUMN IF NOT EXISTS quarantined_at BIGINT;
@@ -0,0 +1,2 @@
+-- Matches SQLite migration 0000_0022.
+ALTER TABLE schedules ADD COLUMN IF NOT EXISTS catch_up TEXT NOT NULL DEFAULT 'skip';
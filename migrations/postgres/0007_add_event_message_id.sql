@@ -0,0 +1,2 @@
+-- Matches SQLite migration 0000_0023.
+ALTER TABLE events ADD COLUMN IF NOT EXISTS message_id BIGINT;
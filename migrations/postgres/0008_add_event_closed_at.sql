@@ -0,0 +1,8 @@
+-- Matches SQLite migration 0000_0024.
+ALTER TABLE events ADD COLUMN IF NOT EXISTS closed_at BIGINT;
+
+UPDATE events SET closed_at = timestamp
+WHERE closed_at IS NULL AND timestamp <= EXTRACT(EPOCH FROM now())::BIGINT;
+
+CREATE INDEX IF NOT EXISTS idx_events_open ON events(timestamp, id) WHERE closed_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_events_closed_at ON events(closed_at) WHERE closed_at IS NOT NULL;
@@ -0,0 +1,22 @@
+-- Matches SQLite migration 0000_0025.
+ALTER TABLE event_reminders ADD COLUMN IF NOT EXISTS offset_seconds BIGINT;
+
+UPDATE event_reminders r SET offset_seconds = GREATEST(e.timestamp - r.remind_at, 0)
+FROM events e
+WHERE e.id = r.event_id;
+
+DELETE FROM event_reminders a
+USING event_reminders b
+WHERE a.event_id = b.event_id AND a.user_id = b.user_id
+  AND a.offset_seconds = b.offset_seconds AND a.id > b.id;
+
+ALTER TABLE event_reminders ALTER COLUMN offset_seconds SET NOT NULL;
+ALTER TABLE event_reminders DROP COLUMN remind_at;
+ALTER TABLE event_reminders ADD CONSTRAINT event_reminders_event_user_offset_key
+  UNIQUE (event_id, user_id, offset_seconds);
+
+CREATE TABLE IF NOT EXISTS user_reminder_defaults (
+  user_id BIGINT NOT NULL,
+  offset_seconds BIGINT NOT NULL,
+  PRIMARY KEY (user_id, offset_seconds)
+);
@@ -0,0 +1,7 @@
+-- Matches SQLite migration 0000_0026.
+ALTER TABLE events ADD COLUMN IF NOT EXISTS reminder_mode TEXT;
+
+CREATE TABLE IF NOT EXISTS guild_settings (
+  guild_id BIGINT PRIMARY KEY,
+  reminder_mode TEXT NOT NULL DEFAULT 'dm'
+);
@@ -0,0 +1,2 @@
+-- Matches SQLite migration 0000_0028.
+CREATE INDEX IF NOT EXISTS idx_event_signups_user ON event_signups(user_id, event_id);
@@ -0,0 +1,43 @@
+-- Matches SQLite migration 0000_0029.
+CREATE TABLE IF NOT EXISTS attendance_weekly (
+  guild_id BIGINT NOT NULL,
+  week_start BIGINT NOT NULL,
+  category TEXT NOT NULL,
+  user_id BIGINT NOT NULL,
+  available INTEGER NOT NULL DEFAULT 0,
+  maybe INTEGER NOT NULL DEFAULT 0,
+  unavailable INTEGER NOT NULL DEFAULT 0,
+  waitlist INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (guild_id, week_start, category, user_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_attendance_weekly_user
+ON attendance_weekly(guild_id, user_id, week_start);
+
+CREATE TABLE IF NOT EXISTS category_weekly (
+  guild_id BIGINT NOT NULL,
+  week_start BIGINT NOT NULL,
+  category TEXT NOT NULL,
+  events INTEGER NOT NULL DEFAULT 0,
+  slots INTEGER NOT NULL DEFAULT 0,
+  available INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (guild_id, week_start, category)
+);
+
+INSERT INTO attendance_weekly (guild_id, week_start, category, user_id, available, maybe, unavailable, waitlist)
+SELECT e.guild_id, e.timestamp - (e.timestamp - 345600) % 604800, e.category, s.user_id,
+       COUNT(*) FILTER (WHERE s.status = 'available'), COUNT(*) FILTER (WHERE s.status = 'maybe'),
+       COUNT(*) FILTER (WHERE s.status = 'unavailable'), COUNT(*) FILTER (WHERE s.status = 'waitlist')
+FROM events e
+JOIN event_signups s ON s.event_id = e.id
+WHERE e.closed_at IS NOT NULL
+GROUP BY 1, 2, 3, 4
+ON CONFLICT DO NOTHING;
+
+INSERT INTO category_weekly (guild_id, week_start, category, events, slots, available)
+SELECT e.guild_id, e.timestamp - (e.timestamp - 345600) % 604800, e.category, COUNT(*), SUM(e.max_slots),
+       SUM((SELECT COUNT(*) FROM event_signups s WHERE s.event_id = e.id AND s.status = 'available'))
+FROM events e
+WHERE e.closed_at IS NOT NULL
+GROUP BY 1, 2, 3
+ON CONFLICT DO NOTHING;
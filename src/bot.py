@@ -1,26 +1,107 @@
+import asyncio
 import logging
+import os
 import time
 from datetime import datetime, timezone
 import discord
 from discord import app_commands
 from discord.ext import tasks
 
-from config import ENV, DISCORD_TOKEN, DEV_GUILD_ID, LOG_LEVEL, SYNC_COMMANDS, CLEAR_COMMANDS
-from storage.db import init_db, get_connection
-from helpers import default_max_slots, build_event_announcement_content
-from embeds import build_signup_embed
-from views import SignupView
+from config import (
+    ENV,
+    DISCORD_TOKEN,
+    DEV_GUILD_ID,
+    LOG_LEVEL,
+    SYNC_COMMANDS,
+    CLEAR_COMMANDS,
+    DB_MAINTENANCE_MINUTES,
+    ARCHIVE_AFTER_DAYS,
+    ARCHIVE_INTERVAL_MINUTES,
+    PROCESS_ROLE,
+    LEASE_SECONDS,
+    VIEW_SYNC_SECONDS,
+    SCHEDULE_MAX_FAILURES,
+    SCHEDULE_RETRY_BASE_SECONDS,
+    SCHEDULE_RETRY_MAX_SECONDS,
+    SIGNUPS_CLOSE_AT,
+    CATCH_UP_WINDOW_HOURS,
+    CATCH_UP_POSTS_PER_MINUTE,
+    GATEWAY_INTENTS,
+    MEMBER_CACHE,
+    MESSAGE_CACHE_SIZE,
+    MEMORY_LOG_MINUTES,
+)
+from storage.backend import storage
+from storage.db import maintain_db, run_pending_backfills
+from storage.retention import archive_past_events
+from storage.leases import acquire_lease
+from helpers import (
+    default_max_slots,
+    schedule_step_seconds,
+    next_run_not_before,
+    mention_messages,
+    MAX_REMINDER_OFFSET,
+)
+from views import SignupView, retire_signup_view
+from embeds import member_names
+from posting import post_event, refresh_worker
+from refresher import queue_refreshes
 from commands import register_commands
+from cache import ExpiringCache
 
 
+VIEW_RESTORE_BATCH_SIZE = 200
+# How long a channel that returned NotFound/Forbidden is skipped.
+DEAD_CHANNEL_TTL_SECONDS = 3600
+# Events closed per query by the lifecycle loop.
+LIFECYCLE_BATCH_SIZE = 200
+
+dead_channels = ExpiringCache(ttl_seconds=DEAD_CHANNEL_TTL_SECONDS)
+
+# Missed occurrences waiting to be posted, as (schedule_id, timestamp).
+catch_up_queue: asyncio.Queue[tuple[int, int]] = asyncio.Queue()
+queued_catch_ups: set[tuple[int, int]] = set()
+
 
 class MyClient(discord.Client):
     def __init__(self) -> None:
-        intents = discord.Intents.default()
-        super().__init__(intents=intents)
+        intents = discord.Intents(**{name: True for name in GATEWAY_INTENTS})
+        if MEMBER_CACHE == "all":
+            member_cache_flags = discord.MemberCacheFlags.from_intents(intents)
+        else:
+            member_cache_flags = discord.MemberCacheFlags.none()
+        super().__init__(
+            intents=intents,
+            member_cache_flags=member_cache_flags,
+            max_messages=MESSAGE_CACHE_SIZE or None,
+            # Members are looked up when needed, never downloaded per guild.
+            chunk_guilds_at_startup=False,
+        )
         self.tree = app_commands.CommandTree(self)
+        self.restore_task: asyncio.Task | None = None
+        self.backfill_task: asyncio.Task | None = None
+        self.catch_up_task: asyncio.Task | None = None
+        self.refresh_task: asyncio.Task | None = None
+        # Highest event ID whose signup view is registered in this process.
+        self.view_watermark = 0
+        # Events closed from this time on still need their views retired here.
+        self.retire_watermark = int(time.time())
 
     async def setup_hook(self) -> None:
+        await storage.connect()
+
+        # Both roles hold signup views (posted or restored) and may re-render posts.
+        self.refresh_task = asyncio.create_task(refresh_worker(self))
+        retire_views_loop.start()
+        if MEMORY_LOG_MINUTES > 0:
+            memory_loop.start()
+
+        if PROCESS_ROLE != "worker":
+            await self.setup_gateway()
+        if PROCESS_ROLE != "gateway":
+            self.start_background_jobs()
+
+    async def setup_gateway(self) -> None:
         register_commands(self)
 
         if SYNC_COMMANDS:
@@ -34,21 +115,56 @@ class MyClient(discord.Client):
                 await self.tree.sync()
                 log.info("Synced commands globally")
 
+        # Restoring views can take a while with many open events; do it in the
+        # background so the bot can connect and answer right away.
+        self.restore_task = asyncio.create_task(self.restore_views())
 
-        now_ts = int(time.time())
-        conn = get_connection()
-        try:
-            rows = conn.execute(
-                "SELECT id FROM events WHERE timestamp > ?",
-                (now_ts,),
-            ).fetchall()
-        finally:
-            conn.close()
+        # Events posted by a separate worker never pass through this process.
+        if PROCESS_ROLE == "gateway":
+            view_sync_loop.start()
 
-        for (event_id,) in rows:
-            self.add_view(SignupView(event_id))
+    def start_background_jobs(self) -> None:
         scheduler_loop.start()
         reminder_loop.start()
+        lifecycle_loop.start()
+        self.catch_up_task = asyncio.create_task(catch_up_worker())
+        # Maintenance, archiving and backfills work on the SQLite file directly.
+        if storage.name == "sqlite":
+            self.backfill_task = asyncio.create_task(self.run_backfills())
+            if DB_MAINTENANCE_MINUTES > 0:
+                maintenance_loop.start()
+            if ARCHIVE_AFTER_DAYS > 0:
+                retention_loop.start()
+
+    async def restore_views(self) -> None:
+        started = time.monotonic()
+        restored = 0
+
+        # Newer events are picked up by view_sync_loop or registered when posted.
+        self.view_watermark = await storage.max_event_id()
+
+        # Soonest events first: those are the ones people are clicking.
+        async for event_ids in storage.iter_open_event_ids(
+            max_id=self.view_watermark,
+            batch_size=VIEW_RESTORE_BATCH_SIZE,
+        ):
+            for event_id in event_ids:
+                self.add_view(SignupView(event_id))
+            restored += len(event_ids)
+            await asyncio.sleep(0)
+
+        log.info("Restored %d signup views in %.2fs", restored, time.monotonic() - started)
+
+    async def run_backfills(self) -> None:
+        # Batched data migrations run while the bot is already serving.
+        try:
+            await asyncio.to_thread(run_pending_backfills)
+        except RuntimeError:
+            log.exception("Migration backfill failed; it will resume on the next start")
+
+    async def close(self) -> None:
+        await super().close()
+        await storage.close()
 
     async def on_ready(self) -> None:
         log.info("Logged in as %s (id=%s)", self.user, self.user.id)
@@ -57,164 +173,373 @@ class MyClient(discord.Client):
 client = MyClient()
 
 
+async def holds_lease(job: str, ttl_seconds: int = LEASE_SECONDS) -> bool:
+    # Several processes may run the same loops; only the lease holder works.
+    return await acquire_lease(job, ttl_seconds)
+
+
+class ChannelUnavailable(Exception):
+    pass
+
+
 @tasks.loop(minutes=1)
 async def scheduler_loop():
     now_ts = int(datetime.now(tz=timezone.utc).timestamp())
-    conn = get_connection()
+    # A locked or unreachable database skips this tick instead of ending the loop.
     try:
-        rows = conn.execute(
-            """
-            SELECT * FROM schedules
-            WHERE end_date IS NULL OR end_date > ?
-            """,
-            (now_ts,),
-        ).fetchall()
-
-        for row in rows:
-            step = 86400 if row["frequency"] == "daily" else 7 * 86400
-            step *= row["interval"]
-
-            next_run = row["next_run_at"]
-            while next_run <= now_ts:
-                next_run += step
-
-            if row["end_date"] is not None and next_run > row["end_date"]:
-                continue
-
-            if next_run != row["next_run_at"]:
-                conn.execute(
-                    "UPDATE schedules SET next_run_at = ? WHERE id = ?",
-                    (next_run, row["id"]),
-                )
-
-            exists = conn.execute(
-                """
-                SELECT 1 FROM events
-                WHERE schedule_id = ? AND timestamp = ?
-                LIMIT 1
-                """,
-                (row["id"], next_run)
-            ).fetchone()
-
-            if not exists:
-                signup_mode = (row["signup_mode"] or "open").lower()
-                max_slots = default_max_slots(row["category"])
-
-                allowed_role_ids = []
-                if signup_mode == "role":
-                    role_rows = conn.execute(
-                        "SELECT role_id FROM schedule_allowed_roles WHERE schedule_id = ?",
-                        (row["id"],),
-                    ).fetchall()
-                    allowed_role_ids = [r[0] for r in role_rows]
-
-                conn.execute(
-                    """
-                    INSERT INTO events (
-                        schedule_id,
-                        guild_id, channel_id, creator_id,
-                        title, category, duration, signup_mode, max_slots,
-                        timestamp, ping_roles, announcement_message, created_at
-                    )
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        row["id"],
-                        row["guild_id"],
-                        row["channel_id"],
-                        row["creator_id"],
-                        row["title"],
-                        row["category"],
-                        row["duration"],
-                        signup_mode,
-                        max_slots,
-                        next_run,
-                        int(bool(row["ping_roles"])),
-                        row["announcement_message"],
-                        now_ts
-                    ),
-                )
-                event_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
-
-                if signup_mode == "role":
-                    for role_id in allowed_role_ids:
-                        conn.execute(
-                            "INSERT OR IGNORE INTO event_allowed_roles (event_id, role_id) VALUES (?, ?)",
-                            (event_id, role_id),
-                        )
-
-                channel = client.get_channel(row["channel_id"])
-                if channel is None:
-                    channel = await client.fetch_channel(row["channel_id"])
-
-                embed = await build_signup_embed(
-                    guild=getattr(channel, "guild", None),
-                    title=row["title"],
-                    category=row["category"],
-                    timestamp=next_run,
-                    duration=row["duration"],
-                    signup_mode=signup_mode,
-                    max_slots=max_slots,
-                    creator_id=row["creator_id"],
-                    event_id=event_id,
-                    allowed_role_ids=allowed_role_ids,
-                    schedule_id=row["id"],
-                )
-                content = build_event_announcement_content(
-                    ping_roles=bool(row["ping_roles"]) and signup_mode == "role",
-                    allowed_role_ids=allowed_role_ids,
-                    message=row["announcement_message"],
-                )
-                message = await channel.send(
-                    content=content,
-                    embed=embed,
-                    view=SignupView(event_id),
-                    allowed_mentions=discord.AllowedMentions(
-                        roles=bool(row["ping_roles"]) and signup_mode == "role",
-                        users=False,
-                        everyone=False,
-                    ),
-                )
-                await message.create_thread(name=f"{row['title']} Discussion")
-
-        conn.commit()
-    finally:
-        conn.close()
+        if not await holds_lease("scheduler"):
+            return
+        rows = await storage.active_schedules(now_ts=now_ts)
+    except storage.errors:
+        log.exception("Loading due schedules failed")
+        return
+
+    # One broken schedule must not stop the others.
+    for row in rows:
+        try:
+            await run_schedule(row, now_ts)
+        except Exception as e:
+            failed = e
+        else:
+            failed = None
+
+        # Nor may a database error while recording the outcome.
+        try:
+            if failed is not None:
+                await schedule_failed(row, failed, now_ts)
+            elif row["failure_count"]:
+                await storage.clear_schedule_failures(row["id"])
+        except storage.errors:
+            log.exception("Could not record the outcome of schedule %s", row["id"])
+
+
+async def run_schedule(row, now_ts: int) -> None:
+    step = schedule_step_seconds(row["frequency"], row["interval"])
+
+    # Before the upcoming event is created, look for occurrences that were
+    # missed while the bot was down.
+    if row["catch_up"] != "skip":
+        await enqueue_catch_ups(row, now_ts)
+
+    next_run = row["next_run_at"]
+    while next_run <= now_ts:
+        next_run += step
+
+    if row["end_date"] is not None and next_run > row["end_date"]:
+        return
+
+    if next_run != row["next_run_at"]:
+        await storage.set_schedule_next_run(row["id"], next_run)
+
+    if await storage.schedule_event_exists(row["id"], next_run):
+        return
+
+    await post_occurrence(row, next_run, now_ts)
+
+
+async def post_occurrence(row, timestamp: int, now_ts: int) -> None:
+    # Known-dead channels fail without another API call.
+    if dead_channels.get(row["channel_id"]):
+        raise ChannelUnavailable(f"channel {row['channel_id']} is unavailable")
+
+    signup_mode = (row["signup_mode"] or "open").lower()
+    max_slots = default_max_slots(row["category"])
+
+    allowed_role_ids = []
+    if signup_mode == "role":
+        allowed_role_ids = await storage.get_schedule_role_ids(row["id"])
+
+    event = dict(
+        schedule_id=row["id"],
+        guild_id=row["guild_id"],
+        channel_id=row["channel_id"],
+        creator_id=row["creator_id"],
+        title=row["title"],
+        category=row["category"],
+        duration=row["duration"],
+        signup_mode=signup_mode,
+        max_slots=max_slots,
+        timestamp=timestamp,
+        ping_roles=bool(row["ping_roles"]),
+        announcement_message=row["announcement_message"],
+        allowed_role_ids=allowed_role_ids,
+        created_at=now_ts,
+    )
+
+    # The event is committed before talking to Discord, so no write lock
+    # is held by this process while it waits on the network.
+    event_id = await storage.create_event(**event)
+
+    try:
+        channel = client.get_channel(row["channel_id"])
+        if channel is None:
+            channel = await client.fetch_channel(row["channel_id"])
+        message = await post_event(channel, event_id, event)
+    except Exception as e:
+        # Nothing was posted; drop the event so a later tick retries.
+        await storage.delete_event(event_id)
+        if isinstance(e, (discord.NotFound, discord.Forbidden)):
+            dead_channels.set(row["channel_id"], True)
+        raise
+
+    try:
+        await message.create_thread(name=f"{row['title']} Discussion")
+    except discord.HTTPException:
+        log.warning("Could not create thread for schedule %s", row["id"])
+
+
+def missed_occurrences(row, *, after: int, now_ts: int) -> list[int]:
+    """Occurrences of a schedule later than `after` and no later than now, inside the catch-up window."""
+    step = schedule_step_seconds(row["frequency"], row["interval"])
+    not_before = max(after + 1, now_ts - CATCH_UP_WINDOW_HOURS * 3600, row["start_date"])
+    first = next_run_not_before(row["time_of_day"], step, not_before)
+
+    end = now_ts if row["end_date"] is None else min(now_ts, row["end_date"])
+    return list(range(first, end + 1, step))
+
+
+async def enqueue_catch_ups(row, now_ts: int) -> None:
+    # Anything after the newest past event (or the schedule's creation) was
+    # never posted. Derived from the events table, so a restart halfway
+    # through the backlog picks up where it stopped.
+    latest = await storage.latest_schedule_event_ts(row["id"], before=now_ts)
+    missed = missed_occurrences(row, after=latest or row["created_at"], now_ts=now_ts)
+    if row["catch_up"] == "latest":
+        missed = missed[-1:]
+
+    for timestamp in missed:
+        key = (row["id"], timestamp)
+        if key not in queued_catch_ups:
+            queued_catch_ups.add(key)
+            catch_up_queue.put_nowait(key)
+    if missed:
+        log.info("Schedule %s: %d missed occurrences queued for catch-up", row["id"], len(missed))
+
+
+async def catch_up_worker() -> None:
+    # Drains the backlog at a fixed pace so a restart after an outage
+    # doesn't post everything at once.
+    pause = 60 / CATCH_UP_POSTS_PER_MINUTE
+    while True:
+        schedule_id, timestamp = await catch_up_queue.get()
+        try:
+            row = await storage.get_schedule(schedule_id)
+            if (
+                row is not None
+                and row["quarantined_at"] is None
+                and not await storage.schedule_event_exists(schedule_id, timestamp)
+            ):
+                await post_occurrence(row, timestamp, int(time.time()))
+        except Exception as e:
+            # Still missed, so a later scheduler tick queues it again.
+            log.warning("Catch-up post for schedule %s at %s failed: %s", schedule_id, timestamp, e)
+        finally:
+            queued_catch_ups.discard((schedule_id, timestamp))
+        await asyncio.sleep(pause)
+
+
+async def schedule_failed(row, error: Exception, now_ts: int) -> None:
+    failures = row["failure_count"] + 1
+    delay = min(SCHEDULE_RETRY_BASE_SECONDS * 2 ** (failures - 1), SCHEDULE_RETRY_MAX_SECONDS)
+    quarantined = failures >= SCHEDULE_MAX_FAILURES
+
+    if isinstance(error, (discord.HTTPException, ChannelUnavailable)):
+        log.warning("Schedule %s failed (%d in a row): %s", row["id"], failures, error)
+    else:
+        log.exception("Schedule %s failed (%d in a row)", row["id"], failures, exc_info=error)
+
+    await storage.mark_schedule_failed(
+        row["id"],
+        error=f"{type(error).__name__}: {error}"[:500],
+        retry_at=now_ts + delay,
+        quarantined_at=now_ts if quarantined else None,
+    )
+
+    if quarantined:
+        log.warning("Schedule %s paused after %d failures", row["id"], failures)
+        try:
+            user = client.get_user(row["creator_id"]) or await client.fetch_user(row["creator_id"])
+            await user.send(
+                f"⚠️ Your schedule **{row['title']}** (ID {row['id']}) was paused after "
+                f"{failures} failed attempts to post in <#{row['channel_id']}>: {error}\n"
+                "Fix the channel or permissions and edit the schedule to resume it."
+            )
+        except discord.HTTPException:
+            pass
 
 
 @tasks.loop(minutes=1)
 async def reminder_loop():
+    try:
+        await send_due_reminders()
+    except storage.errors:
+        log.exception("Sending reminders failed")
+
+
+async def send_due_reminders() -> None:
+    if not await holds_lease("reminders"):
+        return
+
     now_ts = int(datetime.now(tz=timezone.utc).timestamp())
-    conn = get_connection()
+    # Reminders are offsets, so this joins against the events' current times.
+    rows = await storage.due_reminders(now_ts=now_ts, max_offset=MAX_REMINDER_OFFSET)
+
+    # In thread mode everyone due at the same offset of an event shares one message.
+    digests: dict[tuple[int, int], list] = {}
+    for r in rows:
+        if r["reminder_mode"] == "thread" and r["message_id"] is not None:
+            digests.setdefault((r["event_id"], r["offset_seconds"]), []).append(r)
+            continue
+        await send_dm_reminder(r)
+        await storage.delete_reminders([r["id"]])
+
+    for digest in digests.values():
+        # Whoever the thread didn't reach (deleted, locked, no access) gets a DM instead.
+        for r in await send_thread_reminder(digest):
+            await send_dm_reminder(r)
+        await storage.delete_reminders([r["id"] for r in digest])
+
+
+def reminder_text(r) -> str:
+    return f"⏰ Reminder: **{r['title']}** starts at <t:{r['timestamp']}:F> (<t:{r['timestamp']}:R>)."
+
+
+async def send_dm_reminder(r) -> None:
+    try:
+        user = client.get_user(r["user_id"]) or await client.fetch_user(r["user_id"])
+        await user.send(reminder_text(r))
+    except discord.Forbidden:
+        pass
+    except discord.HTTPException:
+        pass
+
+
+async def send_thread_reminder(rows) -> list:
+    """Mention everyone in the event's thread; returns the rows that weren't reached."""
+    # The discussion thread was started from the signup post and shares its ID.
+    thread = client.get_partial_messageable(rows[0]["message_id"])
+    mentions = [f"<@{r['user_id']}>" for r in rows]
+    reached = 0
     try:
-        rows = conn.execute(
-            """
-            SELECT r.id, r.user_id, r.event_id, e.title, e.timestamp
-            FROM event_reminders r
-            JOIN events e ON e.id = r.event_id
-            WHERE r.remind_at <= ?
-            """,
-            (now_ts,),
-        ).fetchall()
+        for content, count in mention_messages(reminder_text(rows[0]), mentions):
+            await thread.send(
+                content,
+                allowed_mentions=discord.AllowedMentions(users=True, roles=False, everyone=False),
+            )
+            reached += count
+    except discord.HTTPException as e:
+        log.warning("Thread reminder for event %s failed: %s", rows[0]["event_id"], e)
+    return rows[reached:]
 
-        for r in rows:
-            try:
-                user = client.get_user(r["user_id"]) or await client.fetch_user(r["user_id"])
-                await user.send(
-                    f"⏰ Reminder: **{r['title']}** starts at <t:{r['timestamp']}:F> (<t:{r['timestamp']}:R>)."
-                )
-            except discord.Forbidden:
-                pass
-            except discord.HTTPException:
-                pass
 
-            conn.execute("DELETE FROM event_reminders WHERE id = ?", (r["id"],))
+@tasks.loop(minutes=1)
+async def lifecycle_loop():
+    now_ts = int(datetime.now(tz=timezone.utc).timestamp())
+    try:
+        if not await holds_lease("lifecycle"):
+            return
+        while True:
+            # Closing also drops the pending reminders of these events.
+            event_ids = await storage.close_due_events(
+                now_ts=now_ts,
+                at_end=SIGNUPS_CLOSE_AT == "end",
+                limit=LIFECYCLE_BATCH_SIZE,
+            )
+            # One last edit per post, with the buttons disabled.
+            queue_refreshes(event_ids)
+            if len(event_ids) < LIFECYCLE_BATCH_SIZE:
+                break
+    except storage.errors:
+        log.exception("Closing started events failed")
+
+
+@tasks.loop(minutes=1)
+async def retire_views_loop():
+    # Runs in every process: each one holds its own views.
+    now_ts = int(time.time())
+    try:
+        # Overlap a little in case the closing process's clock is behind ours.
+        event_ids = await storage.closed_event_ids(since=client.retire_watermark - 60)
+    except storage.errors:
+        # The watermark stays put, so the next tick catches up.
+        log.exception("Loading closed events failed")
+        return
+    for event_id in event_ids:
+        retire_signup_view(event_id)
+    client.retire_watermark = now_ts
+
+
+# Only started with the SQLite backend; see MyClient.start_background_jobs.
+@tasks.loop(minutes=max(DB_MAINTENANCE_MINUTES, 1))
+async def maintenance_loop():
+    try:
+        if not await holds_lease("maintenance", DB_MAINTENANCE_MINUTES * 60 + LEASE_SECONDS):
+            return
+        # Checkpointing and vacuuming can take a while on slow SD cards,
+        # so keep them off the event loop.
+        stats = await asyncio.to_thread(maintain_db)
+    except storage.errors:
+        log.exception("Database maintenance failed")
+        return
+    log.debug("Database maintenance finished: %s", stats)
+
+
+# Only started with the SQLite backend, like maintenance_loop.
+@tasks.loop(minutes=max(ARCHIVE_INTERVAL_MINUTES, 1))
+async def retention_loop():
+    try:
+        if not await holds_lease("retention", ARCHIVE_INTERVAL_MINUTES * 60 + LEASE_SECONDS):
+            return
+        summary = await asyncio.to_thread(archive_past_events)
+    except (*storage.errors, OSError):
+        log.exception("Archiving past events failed")
+        return
+    log.debug("Retention run finished: %s", summary)
+
 
-        conn.commit()
-    finally:
-        conn.close()
+def resident_memory_bytes() -> int | None:
+    # Linux only (which includes the Pi); other systems just skip the number.
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+@tasks.loop(minutes=max(MEMORY_LOG_MINUTES, 1))
+async def memory_loop():
+    rss = resident_memory_bytes()
+    if rss is None:
+        return
+    guilds = len(client.guilds)
+    members = sum(len(guild.members) for guild in client.guilds)
+    log.info(
+        "Resident memory %.1f MiB, %d guilds (%s per guild), %d cached members, %d cached names, %d cached messages",
+        rss / 2**20,
+        guilds,
+        f"{rss / guilds / 1024:.1f} KiB" if guilds else "-",
+        members,
+        len(member_names),
+        len(client.cached_messages),
+    )
+
+
+@tasks.loop(seconds=VIEW_SYNC_SECONDS)
+async def view_sync_loop():
+    try:
+        event_ids = await storage.event_ids_after(client.view_watermark)
+    except storage.errors:
+        log.exception("Loading new events failed")
+        return
+    for event_id in event_ids:
+        client.add_view(SignupView(event_id))
+        client.view_watermark = event_id
 
 
+@view_sync_loop.before_loop
+async def before_view_sync_loop():
+    if client.restore_task is not None:
+        await client.restore_task
 
 
 def setup_logging() -> None:
@@ -230,9 +555,20 @@ log = logging.getLogger("synar")
 
 def main() -> None:
     setup_logging()
-    init_db()
-    log.info("Starting Synar (env=%s)", ENV)
-    client.run(DISCORD_TOKEN)
+    log.info("Starting Synar (env=%s, role=%s)", ENV, PROCESS_ROLE)
+    if PROCESS_ROLE == "worker":
+        asyncio.run(run_worker())
+    else:
+        client.run(DISCORD_TOKEN)
+
+
+async def run_worker() -> None:
+    # login() runs setup_hook, which starts the background jobs. No gateway
+    # connection is opened: channels, users and messages go through REST.
+    async with client:
+        await client.login(DISCORD_TOKEN)
+        log.info("Worker logged in as %s", client.user)
+        await asyncio.Event().wait()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,56 @@
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+
+
+class ExpiringCache:
+    """Small key -> value map whose entries are forgotten after `ttl_seconds`."""
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl = ttl_seconds
+        self._items: dict[Hashable, tuple[object, float]] = {}
+        self._next_prune = 0.0
+
+    def get(self, key: Hashable, now: float | None = None):
+        if now is None:
+            now = time.monotonic()
+        item = self._items.get(key)
+        if item is None or now - item[1] >= self.ttl:
+            return None
+        return item[0]
+
+    def set(self, key: Hashable, value, now: float | None = None) -> None:
+        if now is None:
+            now = time.monotonic()
+        if now >= self._next_prune:
+            self._items = {k: v for k, v in self._items.items() if now - v[1] < self.ttl}
+            self._next_prune = now + self.ttl
+        self._items[key] = (value, now)
+
+    def pop(self, key: Hashable) -> None:
+        self._items.pop(key, None)
+
+
+class LRUCache:
+    """Key -> value map holding at most `max_items`; the least recently used entry goes first."""
+
+    def __init__(self, max_items: int) -> None:
+        self.max_items = max_items
+        self._items: OrderedDict[Hashable, object] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable):
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value) -> None:
+        if self.max_items <= 0:
+            return
+        self._items[key] = value
+        self._items.move_to_end(key)
+        if len(self._items) > self.max_items:
+            self._items.popitem(last=False)
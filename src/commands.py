@@ -1,18 +1,56 @@
+import io
+import tempfile
 from datetime import datetime, timezone
 from typing import Literal
 import discord
 from discord import app_commands
 
-from storage.db import get_connection
+from config import BULK_MAX_EVENTS
+from storage.backend import storage
 from helpers import (
     parse_unix_timestamp,
     default_max_slots,
     send_invalid_timestamp,
     normalize_announcement_message,
     build_event_announcement_content,
+    parse_role_mentions,
+    parse_timestamp_list,
+    parse_events_csv,
+    schedule_step_seconds,
+    next_run_not_before,
+    schedule_time_shift,
+    schedule_updated_text,
+    export_schedules_json,
+    parse_schedules_json,
+    write_ics_calendar,
+    stats_since,
 )
-from embeds import build_signup_embed
-from views import SignupView, EventRolePickerView, ScheduleIntervalView, ScheduleEditRolePickerView
+from embeds import (
+    build_signup_embed,
+    remember_member,
+    build_member_stats_embed,
+    build_leaderboard_embed,
+    build_category_stats_embed,
+)
+from views import (
+    SignupView,
+    EventRolePickerView,
+    ScheduleIntervalView,
+    ScheduleEditRolePickerView,
+    ReminderDefaultsView,
+    GuildListView,
+)
+from posting import post_events
+from refresher import queue_refreshes
+from responder import Responder
+
+MAX_CSV_BYTES = 256 * 1024
+MAX_IMPORT_BYTES = 1024 * 1024
+MAX_IMPORT_SCHEDULES = 500
+CALENDAR_BATCH_SIZE = 500
+# Calendar files bigger than this are spooled to disk while they are written.
+CALENDAR_SPOOL_BYTES = 1024 * 1024
+LEADERBOARD_SIZE = 10
 
 
 
@@ -20,6 +58,11 @@ def register_commands(client: discord.Client):
     client.tree.add_command(create)
     client.tree.add_command(delete)
     client.tree.add_command(edit)
+    client.tree.add_command(export)
+    client.tree.add_command(import_)
+    client.tree.add_command(reminders)
+    client.tree.add_command(list_)
+    client.tree.add_command(stats)
 
 create = app_commands.Group(name="create", description="Create events and schedules")
 
@@ -77,48 +120,26 @@ async def create_event(
         )
         return
 
+    # The signup post is the response itself, so a late answer must be public.
+    respond = Responder(interaction, ephemeral=False)
+    remember_member(interaction.user)
     max_slots = default_max_slots(category)
     now_ts = int(datetime.now(tz=timezone.utc).timestamp())
 
-    conn = get_connection()
-    try:
-        cursor = conn.execute(
-            """
-            INSERT INTO events (
-                guild_id,
-                channel_id,
-                creator_id,
-                title,
-                category,
-                duration,
-                signup_mode,
-                max_slots,
-                timestamp,
-                ping_roles,
-                announcement_message,
-                created_at
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                interaction.guild_id,
-                interaction.channel_id,
-                interaction.user.id,
-                title,
-                category,
-                duration,
-                signup_mode.lower(),
-                max_slots,
-                ts,
-                int(ping_allowed_roles),
-                announcement_message,
-                now_ts,
-            ),
-        )
-        event_id = cursor.lastrowid
-        conn.commit()
-    finally:
-        conn.close()
+    event_id = await storage.create_event(
+        guild_id=interaction.guild_id,
+        channel_id=interaction.channel_id,
+        creator_id=interaction.user.id,
+        title=title,
+        category=category,
+        duration=duration,
+        signup_mode=signup_mode,
+        max_slots=max_slots,
+        timestamp=ts,
+        ping_roles=ping_allowed_roles,
+        announcement_message=announcement_message,
+        created_at=now_ts,
+    )
 
     embed = await build_signup_embed(
         guild=interaction.guild,
@@ -145,7 +166,7 @@ async def create_event(
         users=False,
         everyone=False,
     )
-    await interaction.response.send_message(
+    await respond.send(
         content=content,
         embed=embed,
         view=view,
@@ -153,9 +174,119 @@ async def create_event(
     )
 
     msg = await interaction.original_response()
+    await storage.set_event_message(event_id, msg.id)
     await msg.create_thread(name=f"{title} Discussion")
 
 
+@create.command(name="events", description="Create many one-time events at once")
+@app_commands.describe(
+    title="Title of the events (a CSV title column overrides it)",
+    category="Type of event",
+    duration="Planned duration (in hours) shown in each signup embed",
+    signup_mode="Restrictions for users to sign up",
+    timestamps="Unix timestamps separated by spaces or commas",
+    file="CSV with the columns timestamp, title, duration, message",
+    roles="Allowed roles for Role signup mode, as mentions (max 5)",
+    ping_roles="Ping the allowed roles in each event post",
+    message="Optional text shown above each signup embed",
+)
+async def create_events(
+    interaction: discord.Interaction,
+    title: str,
+    category: Literal["Raids", "Dungeons", "Fractals", "Other"],
+    duration: int,
+    signup_mode: Literal["Open", "Role"],
+    timestamps: str | None = None,
+    file: discord.Attachment | None = None,
+    roles: str | None = None,
+    ping_roles: Literal["Yes", "No"] = "No",
+    message: str | None = None,
+) -> None:
+    if duration <= 0:
+        await interaction.response.send_message("Duration must be greater than 0.", ephemeral=True)
+        return
+
+    rows: list[dict] = []
+    errors: list[str] = []
+
+    if timestamps:
+        parsed, invalid = parse_timestamp_list(timestamps)
+        rows.extend(parsed)
+        errors.extend(f"invalid timestamp {value!r}" for value in invalid)
+
+    if file is not None:
+        if file.size > MAX_CSV_BYTES:
+            await interaction.response.send_message(
+                f"The CSV file must be smaller than {MAX_CSV_BYTES // 1024} KiB.", ephemeral=True
+            )
+            return
+        try:
+            text = (await file.read()).decode("utf-8-sig")
+        except UnicodeDecodeError:
+            await interaction.response.send_message("The CSV file must be UTF-8 encoded.", ephemeral=True)
+            return
+        parsed, csv_errors = parse_events_csv(text)
+        rows.extend(parsed)
+        errors.extend(csv_errors)
+
+    if errors:
+        shown = "\n".join(f"- {error}" for error in errors[:10])
+        more = f"\n…and {len(errors) - 10} more" if len(errors) > 10 else ""
+        await interaction.response.send_message(f"Nothing was created:\n{shown}{more}", ephemeral=True)
+        return
+    if not rows:
+        await interaction.response.send_message("Give timestamps or attach a CSV file.", ephemeral=True)
+        return
+    if len(rows) > BULK_MAX_EVENTS:
+        await interaction.response.send_message(
+            f"At most {BULK_MAX_EVENTS} events can be created at once.", ephemeral=True
+        )
+        return
+
+    allowed_role_ids = parse_role_mentions(roles)
+    if signup_mode == "Role" and not 1 <= len(allowed_role_ids) <= 5:
+        await interaction.response.send_message(
+            "Role signup mode needs between 1 and 5 roles, e.g. `@Raiders @Officers`.", ephemeral=True
+        )
+        return
+    if signup_mode != "Role":
+        allowed_role_ids = []
+
+    ping_allowed_roles = ping_roles == "Yes" and signup_mode == "Role"
+    announcement_message = normalize_announcement_message(message)
+    now_ts = int(datetime.now(tz=timezone.utc).timestamp())
+
+    events = [
+        dict(
+            guild_id=interaction.guild_id,
+            channel_id=interaction.channel_id,
+            creator_id=interaction.user.id,
+            title=row.get("title", title),
+            category=category,
+            duration=row.get("duration", duration),
+            signup_mode=signup_mode,
+            max_slots=default_max_slots(category),
+            timestamp=row["timestamp"],
+            ping_roles=ping_allowed_roles,
+            announcement_message=normalize_announcement_message(row.get("message")) or announcement_message,
+            allowed_role_ids=allowed_role_ids,
+            created_at=now_ts,
+        )
+        for row in sorted(rows, key=lambda row: row["timestamp"])
+    ]
+
+    await interaction.response.defer(ephemeral=True, thinking=True)
+
+    # One transaction for all rows; posting happens afterwards.
+    event_ids = await storage.create_events(events)
+    failed = await post_events(interaction.channel, list(zip(event_ids, events)))
+
+    summary = f"Created {len(events) - len(failed)} events."
+    if failed:
+        summary += f" {len(failed)} could not be posted and were discarded."
+    await interaction.followup.send(summary, ephemeral=True)
+
+
 @create.command(name="schedule", description="Create a recurring schedule")
 @app_commands.describe(
     title="Title of the event",
@@ -168,6 +299,7 @@ async def create_event(
     message="Optional text shown above each scheduled signup embed",
     start_date="Use @time to pick a timestamp for your starting date of your schedule (defaults to instantly)",
     end_date="Use @time to pick a timestamp for your ending date of your schedule.",
+    catch_up="Occurrences missed while the bot was offline: skip them, post the latest, or post all",
 )
 async def create_schedule(
     interaction: discord.Interaction,
@@ -181,6 +313,7 @@ async def create_schedule(
     message: str | None = None,
     start_date: str | None = None,
     end_date: str | None = None,
+    catch_up: Literal["skip", "latest", "all"] = "skip",
 ) -> None:
     ping_allowed_roles = ping_roles == "Yes"
     announcement_message = normalize_announcement_message(message)
@@ -198,7 +331,8 @@ async def create_schedule(
         ping_roles=ping_allowed_roles,
         announcement_message=announcement_message,
         start_date=start_date,
-        end_date=end_date
+        end_date=end_date,
+        catch_up=catch_up,
     )
     await interaction.response.send_message(
         "Pick an interval:", view=view, ephemeral=True
@@ -210,40 +344,26 @@ delete = app_commands.Group(name="delete", description="Delete things")
 @delete.command(name="schedule", description="Remove your schedule")
 @app_commands.describe(id="ID of the schedule")
 async def remove_schedule(interaction: discord.Interaction, id: int) -> None:
-    conn = get_connection()
-    try:
-        row = conn.execute(
-            "SELECT id, creator_id FROM schedules WHERE id = ?",
-            (id,),
-        ).fetchone()
-
-        if not row:
-            await interaction.response.send_message("Schedule not found.", ephemeral=True)
-            return
+    row = await storage.get_schedule(id)
 
-        is_admin = False
-        if isinstance(interaction.user, discord.Member):
-            is_admin = interaction.user.guild_permissions.administrator
-
-        if row["creator_id"] != interaction.user.id and not is_admin:
-            await interaction.response.send_message(
-                "Only the creator or a server admin can remove this schedule.",
-                ephemeral=True,
-            )
-            return
+    if not row:
+        await interaction.response.send_message("Schedule not found.", ephemeral=True)
+        return
 
-        conn.execute("DELETE FROM schedule_allowed_roles WHERE schedule_id = ?", (id,))
-        conn.execute("DELETE FROM schedules WHERE id = ?", (id,))
+    is_admin = False
+    if isinstance(interaction.user, discord.Member):
+        is_admin = interaction.user.guild_permissions.administrator
 
-        # Optional: delete future events created by this schedule
-        conn.execute(
-            "DELETE FROM events WHERE schedule_id = ? AND timestamp > ?",
-            (id, int(datetime.now(tz=timezone.utc).timestamp())),
+    if row["creator_id"] != interaction.user.id and not is_admin:
+        await interaction.response.send_message(
+            "Only the creator or a server admin can remove this schedule.",
+            ephemeral=True,
         )
+        return
 
-        conn.commit()
-    finally:
-        conn.close()
+    # Also deletes future events created by this schedule, with their
+    # signups, roles and reminders.
+    await storage.delete_schedule(id, now_ts=int(datetime.now(tz=timezone.utc).timestamp()))
 
     await interaction.response.send_message("Schedule removed.", ephemeral=True)
 
@@ -265,6 +385,7 @@ edit = app_commands.Group(name="edit", description="Edit things")
     signup_mode="Open/Role/Invite",
     ping_roles="Ping the allowed roles in each scheduled event post",
     message="Optional text shown above each scheduled signup embed",
+    catch_up="Occurrences missed while the bot was offline: skip them, post the latest, or post all",
 )
 async def edit_schedule(
     interaction: discord.Interaction,
@@ -281,161 +402,402 @@ async def edit_schedule(
     signup_mode: Literal["Open", "Role"] | None = None, #, "Invite"]
     ping_roles: Literal["Yes", "No"] | None = None,
     message: str | None = None,
+    catch_up: Literal["skip", "latest", "all"] | None = None,
 ) -> None:
-    conn = get_connection()
-    try:
-        row = conn.execute(
-            "SELECT * FROM schedules WHERE id = ?",
-            (id,),
-        ).fetchone()
-
-        if not row:
-            await interaction.response.send_message("Schedule not found.", ephemeral=True)
-            return
+    row = await storage.get_schedule(id)
 
-        is_admin = isinstance(interaction.user, discord.Member) and interaction.user.guild_permissions.administrator
-        if row["creator_id"] != interaction.user.id and not is_admin:
-            await interaction.response.send_message(
-                "Only the creator or an admin can edit this schedule.",
-                ephemeral=True,
-            )
-            return
+    if not row:
+        await interaction.response.send_message("Schedule not found.", ephemeral=True)
+        return
 
-        # merge values
-        new_title = title if title is not None else row["title"]
-        new_category = category if category is not None else row["category"]
-        new_frequency = frequency if frequency is not None else row["frequency"]
-        new_interval = interval if interval is not None else row["interval"]
-        new_day_of_week = day_of_week if day_of_week is not None else row["day_of_week"]
-        new_duration = duration if duration is not None else row["duration"]
-        new_signup_mode = (signup_mode or row["signup_mode"] or "open").lower()
-        new_ping_roles = bool(row["ping_roles"])
-        if ping_roles is not None:
-            new_ping_roles = ping_roles == "Yes"
-        new_announcement_message = (
-            normalize_announcement_message(message)
-            if message is not None
-            else row["announcement_message"]
+    is_admin = isinstance(interaction.user, discord.Member) and interaction.user.guild_permissions.administrator
+    if row["creator_id"] != interaction.user.id and not is_admin:
+        await interaction.response.send_message(
+            "Only the creator or an admin can edit this schedule.",
+            ephemeral=True,
         )
+        return
 
-        if new_duration is not None and new_duration <= 0:
-            await interaction.response.send_message("Duration must be greater than 0.", ephemeral=True)
+    # merge values
+    new_title = title if title is not None else row["title"]
+    new_category = category if category is not None else row["category"]
+    new_frequency = frequency if frequency is not None else row["frequency"]
+    new_interval = interval if interval is not None else row["interval"]
+    new_day_of_week = day_of_week if day_of_week is not None else row["day_of_week"]
+    new_duration = duration if duration is not None else row["duration"]
+    new_signup_mode = (signup_mode or row["signup_mode"] or "open").lower()
+    new_ping_roles = bool(row["ping_roles"])
+    if ping_roles is not None:
+        new_ping_roles = ping_roles == "Yes"
+    new_announcement_message = (
+        normalize_announcement_message(message)
+        if message is not None
+        else row["announcement_message"]
+    )
+    new_catch_up = catch_up if catch_up is not None else row["catch_up"]
+
+    if new_duration is not None and new_duration <= 0:
+        await interaction.response.send_message("Duration must be greater than 0.", ephemeral=True)
+        return
+
+    if new_signup_mode != "role":
+        new_ping_roles = False
+
+    # parse timestamps
+    new_time_ts = row["time_of_day"]
+    if time is not None:
+        ts = parse_unix_timestamp(time)
+        if ts is None:
+            await interaction.response.send_message("Time must be a valid Unix timestamp.", ephemeral=True)
             return
+        new_time_ts = ts - (ts % 60)
 
-        if new_signup_mode != "role":
-            new_ping_roles = False
-
-        # parse timestamps
-        new_time_ts = row["time_of_day"]
-        if time is not None:
-            ts = parse_unix_timestamp(time)
-            if ts is None:
-                await interaction.response.send_message("Time must be a valid Unix timestamp.", ephemeral=True)
-                return
-            new_time_ts = ts - (ts % 60)
-
-        new_start_ts = row["start_date"]
-        if start_date is not None:
-            ts = parse_unix_timestamp(start_date)
-            if ts is None:
-                await interaction.response.send_message("start_date must be a valid Unix timestamp.", ephemeral=True)
-                return
-            new_start_ts = ts - (ts % 60)
-
-        new_end_ts = row["end_date"]
-        if end_date is not None:
-            ts = parse_unix_timestamp(end_date)
-            if ts is None:
-                await interaction.response.send_message("end_date must be a valid Unix timestamp.", ephemeral=True)
-                return
-            new_end_ts = ts - (ts % 60)
-
-        if new_end_ts is not None and new_start_ts is not None and new_end_ts <= new_start_ts:
-            await interaction.response.send_message("end_date must be after start_date.", ephemeral=True)
+    new_start_ts = row["start_date"]
+    if start_date is not None:
+        ts = parse_unix_timestamp(start_date)
+        if ts is None:
+            await interaction.response.send_message("start_date must be a valid Unix timestamp.", ephemeral=True)
             return
+        new_start_ts = ts - (ts % 60)
 
-        if new_frequency == "weekly" and new_day_of_week is None:
-            await interaction.response.send_message("Weekly schedules need a day_of_week.", ephemeral=True)
+    new_end_ts = row["end_date"]
+    if end_date is not None:
+        ts = parse_unix_timestamp(end_date)
+        if ts is None:
+            await interaction.response.send_message("end_date must be a valid Unix timestamp.", ephemeral=True)
             return
+        new_end_ts = ts - (ts % 60)
 
-        # recompute next_run_at if time/frequency/interval/day/start changed
-        now_ts = int(datetime.now(tz=timezone.utc).timestamp())
-        step_seconds = 86400 if new_frequency == "daily" else 7 * 86400
-        step_seconds *= new_interval
-
-        first_run_at = new_time_ts
-        while new_start_ts is not None and first_run_at < new_start_ts:
-            first_run_at += step_seconds
-        while first_run_at < now_ts:
-            first_run_at += step_seconds
-
-        # If Role signup mode -> open picker
-        if new_signup_mode == "role":
-            view = ScheduleEditRolePickerView(
-                schedule_id=id,
-                title=new_title,
-                category=new_category,
-                frequency=new_frequency,
-                interval_value=new_interval,
-                day_of_week=new_day_of_week,
-                time_ts=new_time_ts,
-                duration=new_duration,
-                start_ts=new_start_ts,
-                end_ts=new_end_ts,
-                next_run_at=first_run_at,
-                signup_mode=new_signup_mode,
-                ping_roles=new_ping_roles,
-                announcement_message=new_announcement_message,
-            )
+    if new_end_ts is not None and new_start_ts is not None and new_end_ts <= new_start_ts:
+        await interaction.response.send_message("end_date must be after start_date.", ephemeral=True)
+        return
+
+    if new_frequency == "weekly" and new_day_of_week is None:
+        await interaction.response.send_message("Weekly schedules need a day_of_week.", ephemeral=True)
+        return
+
+    # recompute next_run_at if time/frequency/interval/day/start changed
+    now_ts = int(datetime.now(tz=timezone.utc).timestamp())
+    step_seconds = schedule_step_seconds(new_frequency, new_interval)
+
+    first_run_at = new_time_ts
+    while new_start_ts is not None and first_run_at < new_start_ts:
+        first_run_at += step_seconds
+    while first_run_at < now_ts:
+        first_run_at += step_seconds
+
+    # Upcoming events move with the new time of day. If the cadence changed
+    # there is no obvious match between old and new dates, so they stay put.
+    event_shift = 0
+    if new_frequency == row["frequency"] and new_interval == row["interval"]:
+        event_shift = schedule_time_shift(row["time_of_day"], new_time_ts, step_seconds)
+
+    # If Role signup mode -> open picker
+    if new_signup_mode == "role":
+        view = ScheduleEditRolePickerView(
+            schedule_id=id,
+            title=new_title,
+            category=new_category,
+            frequency=new_frequency,
+            interval_value=new_interval,
+            day_of_week=new_day_of_week,
+            time_ts=new_time_ts,
+            duration=new_duration,
+            start_ts=new_start_ts,
+            end_ts=new_end_ts,
+            next_run_at=first_run_at,
+            signup_mode=new_signup_mode,
+            ping_roles=new_ping_roles,
+            announcement_message=new_announcement_message,
+            catch_up=new_catch_up,
+            event_shift=event_shift,
+        )
+        await interaction.response.send_message(
+            "Select allowed roles (max 5):",
+            view=view,
+            ephemeral=True
+        )
+        return
+
+    # Otherwise update directly; leaving Role clears the allowed roles
+    event_ids = await storage.update_schedule(
+        id,
+        title=new_title,
+        category=new_category,
+        frequency=new_frequency,
+        interval=new_interval,
+        day_of_week=new_day_of_week,
+        time_of_day=new_time_ts,
+        duration=new_duration,
+        start_date=new_start_ts,
+        end_date=new_end_ts,
+        signup_mode=new_signup_mode,
+        ping_roles=new_ping_roles,
+        announcement_message=new_announcement_message,
+        next_run_at=first_run_at,
+        catch_up=new_catch_up,
+        allowed_role_ids=[],
+        now_ts=now_ts,
+        event_shift=event_shift,
+    )
+    queue_refreshes(event_ids)
+
+    await interaction.response.send_message(schedule_updated_text(len(event_ids)), ephemeral=True)
+
+
+export = app_commands.Group(name="export", description="Export bot data", guild_only=True)
+
+@export.command(name="schedules", description="Download this server's schedules as JSON")
+async def export_schedules(interaction: discord.Interaction) -> None:
+    if not isinstance(interaction.user, discord.Member) or not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message("Only server admins can export schedules.", ephemeral=True)
+        return
+
+    schedules = await storage.guild_schedules(interaction.guild_id)
+    if not schedules:
+        await interaction.response.send_message("This server has no schedules.", ephemeral=True)
+        return
+
+    now_ts = int(datetime.now(tz=timezone.utc).timestamp())
+    data = export_schedules_json(schedules, guild_id=interaction.guild_id, now_ts=now_ts)
+    await interaction.response.send_message(
+        f"Exported {len(schedules)} schedules.",
+        file=discord.File(io.BytesIO(data), filename=f"synar-schedules-{interaction.guild_id}.json"),
+        ephemeral=True,
+    )
+
+
+@export.command(name="calendar", description="Download upcoming events as an iCalendar (.ics) file")
+@app_commands.describe(scope="Only the events you signed up for, or everything in this server")
+async def export_calendar(interaction: discord.Interaction, scope: Literal["mine", "server"] = "mine") -> None:
+    # Large guilds take a while to stream out.
+    await interaction.response.defer(ephemeral=True, thinking=True)
+
+    guild = interaction.guild
+    now_ts = int(datetime.now(tz=timezone.utc).timestamp())
+    if scope == "server":
+        name = f"{guild.name} events"
+        schedules = await storage.calendar_schedules(guild.id)
+        batches = storage.iter_guild_calendar_events(guild.id, now_ts=now_ts, batch_size=CALENDAR_BATCH_SIZE)
+    else:
+        name = f"My {guild.name} events"
+        schedules = []
+        batches = storage.iter_user_calendar_events(
+            guild.id,
+            interaction.user.id,
+            now_ts=now_ts,
+            batch_size=CALENDAR_BATCH_SIZE,
+        )
+
+    with tempfile.SpooledTemporaryFile(max_size=CALENDAR_SPOOL_BYTES) as fp:
+        events, recurring, truncated = await write_ics_calendar(
+            fp,
+            name=name,
+            guild_id=guild.id,
+            schedules=schedules,
+            event_batches=batches,
+            now_ts=now_ts,
+            max_bytes=guild.filesize_limit,
+        )
+        fp.seek(0)
+
+        summary = f"Exported {events} upcoming events"
+        if scope == "server":
+            summary += f" and {recurring} recurring schedules"
+        summary += "."
+        if truncated:
+            summary += " The file reached Discord's upload limit, so later events were left out."
+        await interaction.followup.send(
+            summary,
+            file=discord.File(fp, filename=f"synar-{scope}-{guild.id}.ics"),
+            ephemeral=True,
+        )
+
+
+import_ = app_commands.Group(name="import", description="Import bot data")
+
+@import_.command(name="schedules", description="Create schedules from a JSON export")
+@app_commands.describe(file="JSON file made by /export schedules")
+async def import_schedules(interaction: discord.Interaction, file: discord.Attachment) -> None:
+    if not isinstance(interaction.user, discord.Member) or not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message("Only server admins can import schedules.", ephemeral=True)
+        return
+
+    if file.size > MAX_IMPORT_BYTES:
+        await interaction.response.send_message(
+            f"The file must be smaller than {MAX_IMPORT_BYTES // 1024} KiB.", ephemeral=True
+        )
+        return
+
+    entries, errors = parse_schedules_json(await file.read())
+    if not errors and not entries:
+        errors = ["the file contains no schedules"]
+    if len(entries) > MAX_IMPORT_SCHEDULES:
+        errors = [f"at most {MAX_IMPORT_SCHEDULES} schedules can be imported at once"]
+
+    guild = interaction.guild
+    now_ts = int(datetime.now(tz=timezone.utc).timestamp())
+    schedules = []
+    skipped_roles = 0
+
+    for index, entry in enumerate(entries, start=1):
+        if errors:
+            break
+
+        # Channels and roles from another server don't exist here.
+        channel_id = entry["channel_id"]
+        if guild is None or channel_id is None or guild.get_channel(channel_id) is None:
+            channel_id = interaction.channel_id
+
+        role_ids = [role_id for role_id in entry["allowed_role_ids"] if guild and guild.get_role(role_id)]
+        skipped_roles += len(entry["allowed_role_ids"]) - len(role_ids)
+        if entry["signup_mode"] == "role" and not role_ids:
+            errors.append(f"schedule {index}: none of its roles exist in this server")
+            continue
+
+        start_ts = entry["start_date"] if entry["start_date"] is not None else now_ts
+        start_ts -= start_ts % 60
+        step_seconds = schedule_step_seconds(entry["frequency"], entry["interval"])
+
+        schedules.append({
+            **entry,
+            "guild_id": interaction.guild_id,
+            "channel_id": channel_id,
+            "creator_id": interaction.user.id,
+            "start_date": start_ts,
+            "allowed_role_ids": role_ids,
+            "next_run_at": next_run_not_before(entry["time_of_day"], step_seconds, max(start_ts, now_ts)),
+            "created_at": now_ts,
+        })
+
+    if errors:
+        shown = "\n".join(f"- {error}" for error in errors[:10])
+        more = f"\n…and {len(errors) - 10} more" if len(errors) > 10 else ""
+        await interaction.response.send_message(f"Nothing was imported:\n{shown}{more}", ephemeral=True)
+        return
+
+    # All or nothing: one transaction for every schedule and its roles.
+    await storage.create_schedules(schedules)
+
+    summary = f"Imported {len(schedules)} schedules."
+    if skipped_roles:
+        summary += f" {skipped_roles} roles that don't exist in this server were left out."
+    await interaction.response.send_message(summary, ephemeral=True)
+
+
+reminders = app_commands.Group(name="reminders", description="Your event reminders")
+
+@reminders.command(name="defaults", description="Pick reminders added whenever you sign up for an event")
+async def reminder_defaults(interaction: discord.Interaction) -> None:
+    current = await storage.get_reminder_defaults(interaction.user.id)
+    await interaction.response.send_message(
+        "Choose the reminders you want for every event you sign up for:",
+        view=ReminderDefaultsView(current),
+        ephemeral=True,
+    )
+
+
+@reminders.command(name="mode", description="Send reminders as DMs or as one message in the event thread")
+@app_commands.describe(
+    mode="dm: one DM per person. thread: one message in the event's thread mentioning everyone due",
+    event_id="Only change this event (default: the whole server)",
+)
+async def reminder_mode(
+    interaction: discord.Interaction,
+    mode: Literal["dm", "thread"],
+    event_id: int | None = None,
+) -> None:
+    # /reminders defaults works in DMs, so the group can't be guild-only.
+    if interaction.guild_id is None:
+        await interaction.response.send_message("Reminder modes can only be changed in a server.", ephemeral=True)
+        return
+
+    is_admin = isinstance(interaction.user, discord.Member) and interaction.user.guild_permissions.administrator
+
+    if event_id is None:
+        if not is_admin:
             await interaction.response.send_message(
-                "Select allowed roles (max 5):",
-                view=view,
-                ephemeral=True
+                "Only server admins can change the server's reminder mode.", ephemeral=True
             )
             return
+        await storage.set_guild_reminder_mode(interaction.guild_id, mode)
+        await interaction.response.send_message(f"Reminders in this server are now sent as: {mode}.", ephemeral=True)
+        return
 
-        # Otherwise update directly
-        conn.execute(
-            """
-            UPDATE schedules
-            SET title = ?,
-                category = ?,
-                frequency = ?,
-                interval = ?,
-                day_of_week = ?,
-                time_of_day = ?,
-                duration = ?,
-                start_date = ?,
-                end_date = ?,
-                signup_mode = ?,
-                ping_roles = ?,
-                announcement_message = ?,
-                next_run_at = ?
-            WHERE id = ?
-            """,
-            (
-                new_title,
-                new_category,
-                new_frequency,
-                new_interval,
-                new_day_of_week,
-                new_time_ts,
-                new_duration,
-                new_start_ts,
-                new_end_ts,
-                new_signup_mode,
-                int(new_ping_roles),
-                new_announcement_message,
-                first_run_at,
-                id,
-            ),
+    event = await storage.get_event(event_id)
+    if not event or event["guild_id"] != interaction.guild_id:
+        await interaction.response.send_message("Event not found.", ephemeral=True)
+        return
+    if event["creator_id"] != interaction.user.id and not is_admin:
+        await interaction.response.send_message(
+            "Only the host or a server admin can change this event's reminders.", ephemeral=True
         )
+        return
+
+    await storage.set_event_reminder_mode(event_id, mode)
+    await interaction.response.send_message(f"Reminders for event {event_id} are now sent as: {mode}.", ephemeral=True)
+
 
-        # If leaving Role, clear allowed roles
-        conn.execute("DELETE FROM schedule_allowed_roles WHERE schedule_id = ?", (id,))
+list_ = app_commands.Group(name="list", description="List this server's events and schedules", guild_only=True)
 
-        conn.commit()
-    finally:
-        conn.close()
+@list_.command(name="events", description="Upcoming events in this server, soonest first")
+async def list_events(interaction: discord.Interaction) -> None:
+    view = GuildListView(kind="events", guild_id=interaction.guild_id)
+    await interaction.response.send_message(embed=await view.render(), view=view, ephemeral=True)
 
-    await interaction.response.send_message("Schedule updated.", ephemeral=True)
+
+@list_.command(name="schedules", description="Schedules in this server, by their next run")
+async def list_schedules(interaction: discord.Interaction) -> None:
+    view = GuildListView(kind="schedules", guild_id=interaction.guild_id)
+    await interaction.response.send_message(embed=await view.render(), view=view, ephemeral=True)
+
+
+stats = app_commands.Group(name="stats", description="Attendance stats of finished events", guild_only=True)
+
+@stats.command(name="member", description="Someone's signups per category")
+@app_commands.describe(member="Whose stats to show (default: yours)", weeks="How many weeks back to count")
+async def stats_member(
+    interaction: discord.Interaction,
+    member: discord.Member | None = None,
+    weeks: app_commands.Range[int, 1, 52] = 12,
+) -> None:
+    member = member or interaction.user
+    now_ts = int(datetime.now(tz=timezone.utc).timestamp())
+    rows = await storage.member_attendance(interaction.guild_id, member.id, since=stats_since(now_ts, weeks))
+    embed = build_member_stats_embed(name=member.display_name, rows=rows, weeks=weeks)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+@stats.command(name="leaderboard", description="Members who signed up as available most often")
+@app_commands.describe(category="Only count this category", weeks="How many weeks back to count")
+async def stats_leaderboard(
+    interaction: discord.Interaction,
+    category: Literal["Raids", "Dungeons", "Fractals", "Other"] | None = None,
+    weeks: app_commands.Range[int, 1, 52] = 12,
+) -> None:
+    now_ts = int(datetime.now(tz=timezone.utc).timestamp())
+    since = stats_since(now_ts, weeks)
+    rows = await storage.attendance_leaderboard(
+        interaction.guild_id,
+        since=since,
+        category=category,
+        limit=LEADERBOARD_SIZE,
+    )
+    events = sum(
+        row["events"]
+        for row in await storage.category_stats(interaction.guild_id, since=since)
+        if category is None or row["category"] == category
+    )
+    embed = build_leaderboard_embed(rows=rows, events=events, category=category, weeks=weeks)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+@stats.command(name="categories", description="Events and signups per category")
+@app_commands.describe(weeks="How many weeks back to count")
+async def stats_categories(
+    interaction: discord.Interaction,
+    weeks: app_commands.Range[int, 1, 52] = 12,
+) -> None:
+    now_ts = int(datetime.now(tz=timezone.utc).timestamp())
+    rows = await storage.category_stats(interaction.guild_id, since=stats_since(now_ts, weeks))
+    await interaction.response.send_message(embed=build_category_stats_embed(rows=rows, weeks=weeks), ephemeral=True)
@@ -1,4 +1,5 @@
 import os
+import discord
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,6 +12,16 @@ def _get_env(name: str, default: str | None = None) -> str | None:
     return value
 
 
+def _get_int_env(name: str, default: int) -> int:
+    value = _get_env(name)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise RuntimeError(f"Invalid {name} value: {value!r} (expected an integer)")
+
+
 # ---- Core environment ----
 
 ENV = (_get_env("ENV", "dev") or "dev").lower()
@@ -23,12 +34,158 @@ CLEAR_COMMANDS = os.getenv("CLEAR_COMMANDS", "false").lower() in ("1", "true", "
 DISCORD_TOKEN = _get_env("DISCORD_TOKEN")
 DEV_GUILD_ID = _get_env("DEV_GUILD_ID")
 
+# ---- Gateway caches ----
+
+# Interactions arrive without any intent; guilds keeps channels and roles cached.
+GATEWAY_INTENTS = [
+    part.strip().lower()
+    for part in (_get_env("GATEWAY_INTENTS", "guilds") or "guilds").split(",")
+    if part.strip()
+]
+# signups = no library member cache; display names of members seen in signup
+# clicks (and fetched hosts) are kept in a bounded cache instead.
+# all = discord.py's own member cache (grows with the members intent).
+MEMBER_CACHE = (_get_env("MEMBER_CACHE", "signups") or "signups").lower()
+MEMBER_NAME_CACHE_SIZE = _get_int_env("MEMBER_NAME_CACHE_SIZE", 5000)
+# Messages kept by discord.py; nothing in the bot reads them.
+MESSAGE_CACHE_SIZE = _get_int_env("MESSAGE_CACHE_SIZE", 0)
+# Minutes between resident memory log lines; 0 disables them.
+MEMORY_LOG_MINUTES = _get_int_env("MEMORY_LOG_MINUTES", 60)
+
+# ---- Process role ----
+
+# all = gateway and background jobs in one process (default)
+# gateway = commands and buttons only
+# worker = scheduler, reminders and housekeeping over the REST API, no gateway connection
+PROCESS_ROLE = (_get_env("PROCESS_ROLE", "all") or "all").lower()
+LEASE_SECONDS = _get_int_env("LEASE_SECONDS", 90)
+VIEW_SYNC_SECONDS = _get_int_env("VIEW_SYNC_SECONDS", 10)
+
+# ---- Database ----
+
+# sqlite (default) or postgres
+STORAGE_BACKEND = (_get_env("STORAGE_BACKEND", "sqlite") or "sqlite").lower()
+DATABASE_URL = _get_env("DATABASE_URL")
+PG_POOL_MIN_SIZE = _get_int_env("PG_POOL_MIN_SIZE", 2)
+PG_POOL_MAX_SIZE = _get_int_env("PG_POOL_MAX_SIZE", 10)
+
+
+DB_SYNCHRONOUS = (_get_env("DB_SYNCHRONOUS", "NORMAL") or "NORMAL").upper()
+DB_CACHE_SIZE_KIB = _get_int_env("DB_CACHE_SIZE_KIB", 8192)
+DB_MMAP_SIZE = _get_int_env("DB_MMAP_SIZE", 64 * 1024 * 1024)
+DB_BUSY_TIMEOUT_MS = _get_int_env("DB_BUSY_TIMEOUT_MS", 5000)
+DB_JOURNAL_SIZE_LIMIT = _get_int_env("DB_JOURNAL_SIZE_LIMIT", 16 * 1024 * 1024)
+DB_MAINTENANCE_MINUTES = _get_int_env("DB_MAINTENANCE_MINUTES", 60)
+DB_VACUUM_PAGES = _get_int_env("DB_VACUUM_PAGES", 1000)
+
+# ---- Retention ----
+
+ARCHIVE_AFTER_DAYS = _get_int_env("ARCHIVE_AFTER_DAYS", 90)
+ARCHIVE_FORMAT = (_get_env("ARCHIVE_FORMAT", "sqlite") or "sqlite").lower()
+ARCHIVE_BATCH_SIZE = _get_int_env("ARCHIVE_BATCH_SIZE", 200)
+ARCHIVE_INTERVAL_MINUTES = _get_int_env("ARCHIVE_INTERVAL_MINUTES", 360)
+
+# ---- Bulk event creation ----
+
+BULK_MAX_EVENTS = _get_int_env("BULK_MAX_EVENTS", 50)
+BULK_POST_CONCURRENCY = _get_int_env("BULK_POST_CONCURRENCY", 3)
+
+# ---- Signup button rate limits ----
+
+# Token buckets per (user, event) and per event; PER_MINUTE=0 disables one.
+SIGNUP_USER_BURST = _get_int_env("SIGNUP_USER_BURST", 3)
+SIGNUP_USER_PER_MINUTE = _get_int_env("SIGNUP_USER_PER_MINUTE", 12)
+SIGNUP_EVENT_BURST = _get_int_env("SIGNUP_EVENT_BURST", 30)
+SIGNUP_EVENT_PER_MINUTE = _get_int_env("SIGNUP_EVENT_PER_MINUTE", 120)
+
+# ---- Scheduler failures ----
+
+# Consecutive failures after which a schedule is paused until it is edited.
+SCHEDULE_MAX_FAILURES = _get_int_env("SCHEDULE_MAX_FAILURES", 8)
+# Retry delay after the first failure; doubles per failure up to the maximum.
+SCHEDULE_RETRY_BASE_SECONDS = _get_int_env("SCHEDULE_RETRY_BASE_SECONDS", 120)
+SCHEDULE_RETRY_MAX_SECONDS = _get_int_env("SCHEDULE_RETRY_MAX_SECONDS", 6 * 3600)
+
+# ---- Catch-up after downtime ----
+
+# Occurrences missed within this window are posted for schedules whose
+# catch_up policy is "latest" or "all".
+CATCH_UP_WINDOW_HOURS = _get_int_env("CATCH_UP_WINDOW_HOURS", 12)
+CATCH_UP_POSTS_PER_MINUTE = _get_int_env("CATCH_UP_POSTS_PER_MINUTE", 6)
+
+# ---- Event lifecycle ----
+
+# Signups close and the buttons are disabled when an event starts, or with
+# "end" once its duration has passed.
+SIGNUPS_CLOSE_AT = (_get_env("SIGNUPS_CLOSE_AT", "start") or "start").lower()
+
+# ---- Schedule edits ----
+
+# Signup posts re-rendered per minute after a schedule edit.
+EMBED_REFRESH_PER_MINUTE = _get_int_env("EMBED_REFRESH_PER_MINUTE", 30)
+
+# ---- Interaction deadline ----
+
+# Discord fails an interaction that isn't answered within 3 seconds of its
+# creation. Handlers still working after this many ms defer and answer with a
+# followup instead.
+INTERACTION_DEFER_AFTER_MS = _get_int_env("INTERACTION_DEFER_AFTER_MS", 2000)
+
 
 # ---- Validation ----
 
 if ENV not in ("dev", "prod"):
     raise RuntimeError(f"Invalid ENV value: {ENV!r} (expected 'dev' or 'prod')")
 
+if STORAGE_BACKEND not in ("sqlite", "postgres"):
+    raise RuntimeError(f"Invalid STORAGE_BACKEND value: {STORAGE_BACKEND!r} (expected 'sqlite' or 'postgres')")
+
+if STORAGE_BACKEND == "postgres" and not DATABASE_URL:
+    raise RuntimeError("DATABASE_URL must be set when STORAGE_BACKEND=postgres")
+
+if DB_SYNCHRONOUS not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+    raise RuntimeError(f"Invalid DB_SYNCHRONOUS value: {DB_SYNCHRONOUS!r} (expected OFF, NORMAL, FULL or EXTRA)")
+
+if ARCHIVE_FORMAT not in ("sqlite", "jsonl"):
+    raise RuntimeError(f"Invalid ARCHIVE_FORMAT value: {ARCHIVE_FORMAT!r} (expected 'sqlite' or 'jsonl')")
+
+if PROCESS_ROLE not in ("all", "gateway", "worker"):
+    raise RuntimeError(f"Invalid PROCESS_ROLE value: {PROCESS_ROLE!r} (expected 'all', 'gateway' or 'worker')")
+
+if BULK_MAX_EVENTS < 1 or BULK_POST_CONCURRENCY < 1:
+    raise RuntimeError("BULK_MAX_EVENTS and BULK_POST_CONCURRENCY must be at least 1")
+
+if min(SIGNUP_USER_BURST, SIGNUP_EVENT_BURST) < 1 or min(SIGNUP_USER_PER_MINUTE, SIGNUP_EVENT_PER_MINUTE) < 0:
+    raise RuntimeError("SIGNUP_*_BURST must be at least 1 and SIGNUP_*_PER_MINUTE at least 0")
+
+if SCHEDULE_MAX_FAILURES < 1 or SCHEDULE_RETRY_BASE_SECONDS < 1 or SCHEDULE_RETRY_MAX_SECONDS < SCHEDULE_RETRY_BASE_SECONDS:
+    raise RuntimeError(
+        "SCHEDULE_MAX_FAILURES and SCHEDULE_RETRY_BASE_SECONDS must be at least 1 "
+        "and SCHEDULE_RETRY_MAX_SECONDS at least SCHEDULE_RETRY_BASE_SECONDS"
+    )
+
+if CATCH_UP_WINDOW_HOURS < 0 or CATCH_UP_POSTS_PER_MINUTE < 1:
+    raise RuntimeError("CATCH_UP_WINDOW_HOURS must be at least 0 and CATCH_UP_POSTS_PER_MINUTE at least 1")
+
+if SIGNUPS_CLOSE_AT not in ("start", "end"):
+    raise RuntimeError("SIGNUPS_CLOSE_AT must be 'start' or 'end'")
+
+if EMBED_REFRESH_PER_MINUTE < 1:
+    raise RuntimeError("EMBED_REFRESH_PER_MINUTE must be at least 1")
+
+unknown_intents = [name for name in GATEWAY_INTENTS if name not in discord.Intents.VALID_FLAGS]
+if unknown_intents:
+    raise RuntimeError(f"Unknown GATEWAY_INTENTS: {', '.join(unknown_intents)}")
+
+if MEMBER_CACHE not in ("signups", "all"):
+    raise RuntimeError("MEMBER_CACHE must be 'signups' or 'all'")
+
+if MEMBER_NAME_CACHE_SIZE < 0 or MESSAGE_CACHE_SIZE < 0 or MEMORY_LOG_MINUTES < 0:
+    raise RuntimeError("MEMBER_NAME_CACHE_SIZE, MESSAGE_CACHE_SIZE and MEMORY_LOG_MINUTES must be at least 0")
+
+if not 0 <= INTERACTION_DEFER_AFTER_MS <= 2800:
+    raise RuntimeError("INTERACTION_DEFER_AFTER_MS must be between 0 and 2800")
+
 if not DISCORD_TOKEN:
     raise RuntimeError("DISCORD_TOKEN is not set")
 
@@ -1,5 +1,61 @@
 import discord
-from storage.db import get_connection
+from config import MEMBER_NAME_CACHE_SIZE
+from storage.backend import storage
+from cache import LRUCache
+
+# Names listed per status in the signup embed; the rest are in the roster view.
+ROSTER_PREVIEW = 10
+# Discord rejects embed field values longer than this.
+FIELD_LIMIT = 1024
+# Titles are cut to this in list embeds so a full page stays under the description limit.
+LIST_TITLE_LIMIT = 80
+
+ROSTER_LABELS = {
+    "available": "Available",
+    "unavailable": "Unavailable",
+    "maybe": "Maybe",
+    "waitlist": "Waitlist",
+}
+
+
+# (guild_id, user_id) -> display name, for members seen in signups. Far
+# smaller than Member objects, so the library's member cache can stay off.
+member_names = LRUCache(MEMBER_NAME_CACHE_SIZE)
+
+
+def remember_member(member: discord.Member | discord.User) -> None:
+    if isinstance(member, discord.Member):
+        member_names.set((member.guild.id, member.id), member.display_name)
+
+
+def cached_display_name(guild: discord.Guild | None, user_id: int) -> str | None:
+    if not guild:
+        return None
+    m = guild.get_member(user_id)
+    if m:
+        return m.display_name
+    return member_names.get((guild.id, user_id))
+
+
+def member_display_name(guild: discord.Guild | None, user_id: int) -> str:
+    # Discord clients resolve mentions themselves.
+    return cached_display_name(guild, user_id) or f"<@{user_id}>"
+
+
+def bounded_name_list(names: list[str], total: int, *, numbered: bool = False, start: int = 1) -> str:
+    """Join names one per line, cut to fit an embed field, ending with "+N more" if needed."""
+    lines: list[str] = []
+    length = 0
+    for i, name in enumerate(names, start=start):
+        line = f"{i}. {name}" if numbered else name
+        # Leave room for the "+N more" line.
+        if length + len(line) + 1 > FIELD_LIMIT - 20:
+            break
+        lines.append(line)
+        length += len(line) + 1
+    if total > len(lines):
+        lines.append(f"+{total - len(lines)} more")
+    return "\n".join(lines) or "-"
 
 
 async def build_signup_embed(
@@ -15,26 +71,13 @@ async def build_signup_embed(
     event_id: int,
     allowed_role_ids: list[int] | None = None,
     schedule_id: int | None = None,
+    closed: bool = False,
 ) -> discord.Embed:
-    def display_name(user_id: int) -> str:
-        if guild:
-            m = guild.get_member(user_id)
-            if m:
-                return m.display_name
-        return f"<@{user_id}>"
-
-    conn = get_connection()
-    try:
-        rows = conn.execute(
-            "SELECT user_id, status FROM event_signups WHERE event_id = ?",
-            (event_id,),
-        ).fetchall()
-    finally:
-        conn.close()
-
-    available = [display_name(r["user_id"]) for r in rows if r["status"] == "available"]
-    unavailable = [display_name(r["user_id"]) for r in rows if r["status"] == "unavailable"]
-    maybe = [display_name(r["user_id"]) for r in rows if r["status"] == "maybe"]
+    counts, previews = await storage.signup_overview(event_id, preview=ROSTER_PREVIEW)
+
+    def field(status: str, numbered: bool = False) -> str:
+        names = [member_display_name(guild, user_id) for user_id in previews.get(status, [])]
+        return bounded_name_list(names, counts.get(status, 0), numbered=numbered)
 
     embed = discord.Embed(
         title=title or "Event",
@@ -43,14 +86,21 @@ async def build_signup_embed(
             f"**Signup-Mode:** {(signup_mode or 'open').capitalize()}\n"
             f"**Date:** <t:{timestamp}:F>\n"
             f"**Duration:** {duration if duration is not None else '-'} hours\n"
-            f"**Signups:** {len(available)}/{max_slots}"
+            f"**Signups:** {counts.get('available', 0)}/{max_slots}"
+            + (" (closed)" if closed else "")
         ),
-        color=discord.Color.blurple(),
+        color=discord.Color.dark_grey() if closed else discord.Color.blurple(),
     )
 
-    embed.add_field(name="Available", value="\n".join(available) or "-", inline=True)
-    embed.add_field(name="Unavailable", value="\n".join(unavailable) or "-", inline=True)
-    embed.add_field(name="Maybe", value="\n".join(maybe) or "-", inline=True)
+    embed.add_field(name="Available", value=field("available"), inline=True)
+    embed.add_field(name="Unavailable", value=field("unavailable"), inline=True)
+    embed.add_field(name="Maybe", value=field("maybe"), inline=True)
+    if counts.get("waitlist"):
+        embed.add_field(
+            name=f"Waitlist ({counts['waitlist']})",
+            value=field("waitlist", numbered=True),
+            inline=False,
+        )
 
     embed.add_field(
         name="Allowed Roles",
@@ -58,15 +108,14 @@ async def build_signup_embed(
         inline=False,
     )
 
-    creator_name = None
-    if guild:
-        m = guild.get_member(creator_id)
-        if not m:
-            try:
-                m = await guild.fetch_member(creator_id)
-            except discord.NotFound:
-                m = None
+    creator_name = cached_display_name(guild, creator_id)
+    if guild and creator_name is None:
+        try:
+            m = await guild.fetch_member(creator_id)
+        except discord.NotFound:
+            m = None
         if m:
+            remember_member(m)
             creator_name = m.display_name
 
     footer = f"Event ID: {event_id}"
@@ -92,3 +141,130 @@ def role_names_text(guild: discord.Guild | None, role_ids: list[int] | None, sig
         if role:
             names.append(role.name)
     return ", ".join(names) if names else "Roles set"
+
+
+def build_events_list_embed(*, guild_id: int, rows: list, page: int) -> discord.Embed:
+    lines = []
+    for row in rows:
+        title = (row["title"] or "Event")[:LIST_TITLE_LIMIT]
+        if row["message_id"] is not None:
+            title = f"[{title}](https://discord.com/channels/{guild_id}/{row['channel_id']}/{row['message_id']})"
+        line = f"`{row['id']}` <t:{row['timestamp']}:f> · {title} · {row['category']}"
+        if row["schedule_id"] is not None:
+            line += f" · schedule `{row['schedule_id']}`"
+        lines.append(line)
+
+    embed = discord.Embed(
+        title="Upcoming events",
+        description="\n".join(lines) if lines else "No upcoming events.",
+        color=discord.Color.blurple(),
+    )
+    embed.set_footer(text=f"Page {page + 1}")
+    return embed
+
+
+def build_schedules_list_embed(*, rows: list, page: int) -> discord.Embed:
+    lines = []
+    for row in rows:
+        every = row["frequency"]
+        if row["interval"] != 1:
+            unit = "days" if row["frequency"] == "daily" else "weeks"
+            every = f"every {row['interval']} {unit}"
+        title = (row["title"] or "Event")[:LIST_TITLE_LIMIT]
+        line = f"`{row['id']}` {title} · {every} · <#{row['channel_id']}>"
+        if row["quarantined_at"] is not None:
+            line += " · ⚠️ paused"
+        elif row["end_date"] is not None and row["next_run_at"] > row["end_date"]:
+            line += " · ended"
+        else:
+            line += f" · next <t:{row['next_run_at']}:R>"
+        lines.append(line)
+
+    embed = discord.Embed(
+        title="Schedules",
+        description="\n".join(lines) if lines else "No schedules.",
+        color=discord.Color.blurple(),
+    )
+    embed.set_footer(text=f"Page {page + 1}")
+    return embed
+
+
+def percent(part: int, whole: int) -> str:
+    return f"{part * 100 // whole}%" if whole else "-"
+
+
+def build_member_stats_embed(*, name: str, rows: list, weeks: int) -> discord.Embed:
+    embed = discord.Embed(
+        title=f"Attendance: {name}",
+        description=f"Finished events of the last {weeks} weeks.",
+        color=discord.Color.blurple(),
+    )
+    for row in rows:
+        embed.add_field(
+            name=row["category"],
+            value=(
+                f"Available for {row['available']}/{row['events']} ({percent(row['available'], row['events'])})\n"
+                f"Maybe: {row['maybe']} · Declined: {row['unavailable']} · Waitlisted: {row['waitlist']}"
+            ),
+            inline=False,
+        )
+    if not rows:
+        embed.description += "\nNo finished events yet."
+    return embed
+
+
+def build_leaderboard_embed(*, rows: list, events: int, category: str | None, weeks: int) -> discord.Embed:
+    lines = [
+        f"{rank}. <@{row['user_id']}> · {row['available']}/{events} ({percent(row['available'], events)})"
+        f" · maybe {row['maybe']} · declined {row['unavailable']}"
+        for rank, row in enumerate(rows, start=1)
+    ]
+    embed = discord.Embed(
+        title=f"Attendance leaderboard{f': {category}' if category else ''}",
+        description="\n".join(lines) if lines else "No signups for finished events yet.",
+        color=discord.Color.blurple(),
+    )
+    embed.set_footer(text=f"Last {weeks} weeks · {events} events")
+    return embed
+
+
+def build_category_stats_embed(*, rows: list, weeks: int) -> discord.Embed:
+    lines = [
+        f"**{row['category']}** · {row['events']} events"
+        f" · {row['available'] / row['events']:.1f} available on average"
+        f" · {percent(row['available'], row['slots'])} of slots filled"
+        for row in rows
+    ]
+    embed = discord.Embed(
+        title="Category stats",
+        description="\n".join(lines) if lines else "No finished events yet.",
+        color=discord.Color.blurple(),
+    )
+    embed.set_footer(text=f"Last {weeks} weeks")
+    return embed
+
+
+def build_roster_embed(
+    *,
+    guild: discord.Guild | None,
+    title: str,
+    status: str,
+    user_ids: list[int],
+    page: int,
+    page_size: int,
+    total: int,
+) -> discord.Embed:
+    names = [member_display_name(guild, user_id) for user_id in user_ids]
+    pages = max(1, -(-total // page_size))
+    embed = discord.Embed(
+        title=f"{title or 'Event'}: {ROSTER_LABELS.get(status, status)} ({total})",
+        description=bounded_name_list(
+            names,
+            len(names),
+            numbered=True,
+            start=page * page_size + 1,
+        ) if names else "Nobody yet.",
+        color=discord.Color.blurple(),
+    )
+    embed.set_footer(text=f"Page {page + 1}/{pages}")
+    return embed
@@ -1,10 +1,49 @@
+import csv
+import io
+import json
+import math
 import re
 from datetime import datetime, timezone
-from storage.db import get_connection
+from storage.backend import storage
 import discord
 
 
 DISCORD_TIMESTAMP_RE = re.compile(r"<t:(\d+)(?::[a-zA-Z])?>")
+ROLE_MENTION_RE = re.compile(r"<@&(\d+)>")
+BULK_CSV_COLUMNS = ("timestamp", "title", "duration", "message")
+
+SCHEDULE_EXPORT_VERSION = 1
+SCHEDULE_EXPORT_FIELDS = (
+    "channel_id",
+    "title",
+    "category",
+    "duration",
+    "frequency",
+    "interval",
+    "day_of_week",
+    "time_of_day",
+    "start_date",
+    "end_date",
+    "signup_mode",
+    "ping_roles",
+    "announcement_message",
+    "allowed_role_ids",
+    "catch_up",
+)
+SCHEDULE_CATEGORIES = ("Raids", "Dungeons", "Fractals", "Other")
+CATCH_UP_POLICIES = ("skip", "latest", "all")
+# Reminder choices: label -> seconds before the event.
+REMINDER_OFFSETS = {
+    "10 minutes before": 600,
+    "30 minutes before": 1800,
+    "1 hour before": 3600,
+    "6 hours before": 21600,
+}
+MAX_REMINDER_OFFSET = max(REMINDER_OFFSETS.values())
+# Discord's limit for message content.
+MESSAGE_LIMIT = 2000
+WEEK_SECONDS = 7 * 86400
+
 
 def parse_unix_timestamp(value: str) -> int | None:
     """
@@ -49,22 +88,6 @@ def user_has_allowed_role(member: discord.Member | None, allowed_role_ids: list[
     return any(rid in member_role_ids for rid in allowed_role_ids)
 
 
-def get_allowed_role_ids(conn, event_id: int) -> list[int]:
-    rows = conn.execute(
-        "SELECT role_id FROM event_allowed_roles WHERE event_id = ?",
-        (event_id,),
-    ).fetchall()
-    return [r[0] for r in rows]
-
-
-def count_signups(conn, event_id: int) -> int:
-    row = conn.execute(
-        "SELECT COUNT(*) FROM event_signups WHERE event_id = ? AND status = 'available'",
-        (event_id,),
-    ).fetchone()
-    return row[0] if row else 0
-
-
 async def send_invalid_timestamp(interaction: discord.Interaction) -> None:
     embed = discord.Embed(
         title="Invalid timestamp",
@@ -113,52 +136,419 @@ def build_event_announcement_content(
 async def insert_schedule(*, interaction, title, category, frequency, interval_value,
                           day_of_week, time_ts, start_ts, end_ts, next_run_at,
                           duration,
-                          signup_mode, allowed_role_ids, ping_roles, announcement_message):
+                          signup_mode, allowed_role_ids, ping_roles, announcement_message,
+                          catch_up="skip"):
     now_ts = int(datetime.now(tz=timezone.utc).timestamp())
-    conn = get_connection()
+    await storage.create_schedule(
+        guild_id=interaction.guild_id,
+        channel_id=interaction.channel_id,
+        creator_id=interaction.user.id,
+        title=title,
+        category=category,
+        duration=duration,
+        frequency=frequency,
+        interval=interval_value,
+        day_of_week=day_of_week,
+        time_of_day=time_ts,
+        start_date=start_ts,
+        end_date=end_ts,
+        signup_mode=signup_mode,
+        ping_roles=ping_roles,
+        announcement_message=announcement_message,
+        next_run_at=next_run_at,
+        allowed_role_ids=allowed_role_ids,
+        created_at=now_ts,
+        catch_up=catch_up,
+    )
+
+
+def parse_role_mentions(value: str | None) -> list[int]:
+    if not value:
+        return []
+    return list(dict.fromkeys(int(role_id) for role_id in ROLE_MENTION_RE.findall(value)))
+
+
+def parse_timestamp_list(value: str) -> tuple[list[dict], list[str]]:
+    """
+    Parse timestamps separated by spaces, commas or semicolons.
+
+    Returns one row per valid timestamp and a list of the values that were not.
+    """
+
+    rows: list[dict] = []
+    invalid: list[str] = []
+    for part in re.split(r"[\s,;]+", value.strip()):
+        if not part:
+            continue
+        ts = parse_unix_timestamp(part)
+        if ts is None:
+            invalid.append(part)
+        else:
+            rows.append({"timestamp": ts})
+    return rows, invalid
+
+
+def parse_events_csv(text: str) -> tuple[list[dict], list[str]]:
+    """
+    Parse a CSV of events with the columns timestamp, title, duration and
+    message (all but timestamp optional). A header row is optional; without
+    one the columns are read in that order.
+
+    Returns the parsed rows and a list of error messages with line numbers.
+    """
+
+    rows: list[dict] = []
+    errors: list[str] = []
+
+    lines = list(csv.reader(io.StringIO(text)))
+    first = [cell.strip().lower() for cell in lines[0]] if lines else []
+    if "timestamp" in first:
+        columns = first
+        start = 1
+    else:
+        columns = list(BULK_CSV_COLUMNS)
+        start = 0
+
+    for line_no, cells in enumerate(lines[start:], start=start + 1):
+        record = {
+            column: cell.strip()
+            for column, cell in zip(columns, cells)
+            if column in BULK_CSV_COLUMNS and cell.strip()
+        }
+        if not record:
+            continue
+
+        ts = parse_unix_timestamp(record.get("timestamp", ""))
+        if ts is None:
+            errors.append(f"line {line_no}: invalid timestamp")
+            continue
+        row: dict = {"timestamp": ts}
+
+        if "title" in record:
+            row["title"] = record["title"][:256]
+        if "duration" in record:
+            try:
+                row["duration"] = int(record["duration"])
+            except ValueError:
+                errors.append(f"line {line_no}: invalid duration")
+                continue
+            if row["duration"] <= 0:
+                errors.append(f"line {line_no}: duration must be greater than 0")
+                continue
+        if "message" in record:
+            row["message"] = record["message"]
+
+        rows.append(row)
+
+    return rows, errors
+
+
+def mention_messages(header: str, mentions: list[str], limit: int = MESSAGE_LIMIT) -> list[tuple[str, int]]:
+    """
+    Split a header plus mentions into as few messages as fit Discord's length
+    limit. Returns each message with the number of mentions it carries.
+    """
+    messages: list[tuple[str, int]] = []
+    current, count, separator = header, 0, "\n"
+    for mention in mentions:
+        if len(current) + len(separator) + len(mention) > limit:
+            messages.append((current, count))
+            current, count = mention, 0
+        else:
+            current += separator + mention
+        count += 1
+        separator = " "
+    messages.append((current, count))
+    return messages
+
+
+def schedule_step_seconds(frequency: str, interval: int) -> int:
+    return (86400 if frequency == "daily" else 7 * 86400) * interval
+
+
+def next_run_not_before(time_ts: int, step_seconds: int, not_before: int) -> int:
+    """First occurrence of `time_ts + n * step_seconds` (n >= 0) at or after `not_before`."""
+    if time_ts >= not_before:
+        return time_ts
+    return time_ts + math.ceil((not_before - time_ts) / step_seconds) * step_seconds
+
+
+def schedule_time_shift(old_time_ts: int, new_time_ts: int, step_seconds: int) -> int:
+    """Smallest move, earlier or later, that takes the old occurrence times onto the new ones."""
+    shift = (new_time_ts - old_time_ts) % step_seconds
+    return shift - step_seconds if shift > step_seconds // 2 else shift
+
+
+def schedule_updated_text(updated_events: int) -> str:
+    if not updated_events:
+        return "Schedule updated."
+    events = "event" if updated_events == 1 else "events"
+    return f"Schedule updated, along with {updated_events} upcoming {events}. Their posts are refreshed shortly."
+
+
+def stats_since(now_ts: int, weeks: int) -> int:
+    """Start of the attendance rollup week `weeks - 1` weeks before the current one (weeks start Monday, UTC)."""
+    # 1970-01-01 was a Thursday; Monday is 4 days later.
+    this_week = now_ts - (now_ts - 4 * 86400) % WEEK_SECONDS
+    return this_week - (weeks - 1) * WEEK_SECONDS
+
+
+def export_schedules_json(schedules: list[dict], *, guild_id: int, now_ts: int) -> bytes:
+    payload = {
+        "version": SCHEDULE_EXPORT_VERSION,
+        "guild_id": str(guild_id),
+        "exported_at": now_ts,
+        "schedules": [
+            {field: schedule[field] for field in SCHEDULE_EXPORT_FIELDS}
+            for schedule in schedules
+        ],
+    }
+    # Snowflakes as strings: JSON readers outside Python lose precision on them.
+    for entry in payload["schedules"]:
+        entry["channel_id"] = str(entry["channel_id"])
+        entry["allowed_role_ids"] = [str(role_id) for role_id in entry["allowed_role_ids"]]
+        entry["ping_roles"] = bool(entry["ping_roles"])
+    return json.dumps(payload, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def ics_text(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\n", "\\n")
+    )
+
+
+def ics_time(ts: int) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def ics_line(line: str) -> bytes:
+    """Encode one content line, folded at 75 octets without splitting a UTF-8 character."""
+    data = line.encode("utf-8")
+    parts = []
+    # Continuation lines start with a space, which counts towards their 75.
+    width = 75
+    while len(data) > width:
+        cut = width
+        while data[cut] & 0xC0 == 0x80:
+            cut -= 1
+        parts.append(data[:cut])
+        data = data[cut:]
+        width = 74
+    parts.append(data)
+    return b"\r\n ".join(parts) + b"\r\n"
+
+
+def ics_vevent(
+    *,
+    uid: str,
+    now_ts: int,
+    start: int,
+    duration: int | None,
+    title: str | None,
+    category: str,
+    url: str,
+    rrule: str | None = None,
+) -> bytes:
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{ics_time(now_ts)}",
+        f"DTSTART:{ics_time(start)}",
+    ]
+    if duration:
+        lines.append(f"DURATION:PT{duration}H")
+    if rrule:
+        lines.append(f"RRULE:{rrule}")
+    lines += [
+        f"SUMMARY:{ics_text(title or 'Event')}",
+        f"CATEGORIES:{ics_text(category)}",
+        f"URL:{url}",
+        "END:VEVENT",
+    ]
+    return b"".join(ics_line(line) for line in lines)
+
+
+async def write_ics_calendar(
+    fp,
+    *,
+    name: str,
+    guild_id: int,
+    schedules: list,
+    event_batches,
+    now_ts: int,
+    max_bytes: int,
+) -> tuple[int, int, bool]:
+    """
+    Write an iCalendar file to the binary file `fp`: one recurring VEVENT per
+    schedule, then one per event from the `event_batches` async iterator.
+
+    Stops before `max_bytes` would be exceeded. Returns the number of events
+    and schedules written, and whether anything was left out.
+    """
+
+    header = b"".join(ics_line(line) for line in (
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//Synar//Discord events//EN",
+        "CALSCALE:GREGORIAN",
+        f"X-WR-CALNAME:{ics_text(name)}",
+    ))
+    footer = ics_line("END:VCALENDAR")
+    written = fp.write(header)
+    budget = max_bytes - len(footer)
+
+    def add(vevent: bytes) -> bool:
+        nonlocal written
+        if written + len(vevent) > budget:
+            return False
+        written += fp.write(vevent)
+        return True
+
+    schedule_count = event_count = 0
+    truncated = False
+    for row in schedules:
+        rrule = f"FREQ={row['frequency'].upper()};INTERVAL={row['interval']}"
+        if row["end_date"] is not None:
+            rrule += f";UNTIL={ics_time(row['end_date'])}"
+        if not add(ics_vevent(
+            uid=f"schedule-{row['id']}@synar",
+            now_ts=now_ts,
+            start=row["next_run_at"],
+            duration=row["duration"],
+            title=row["title"],
+            category=row["category"],
+            url=f"https://discord.com/channels/{guild_id}/{row['channel_id']}",
+            rrule=rrule,
+        )):
+            truncated = True
+            break
+        schedule_count += 1
+
+    if not truncated:
+        async for rows in event_batches:
+            for row in rows:
+                url = f"https://discord.com/channels/{guild_id}/{row['channel_id']}"
+                if row["message_id"] is not None:
+                    url += f"/{row['message_id']}"
+                if not add(ics_vevent(
+                    uid=f"event-{row['id']}@synar",
+                    now_ts=now_ts,
+                    start=row["timestamp"],
+                    duration=row["duration"],
+                    title=row["title"],
+                    category=row["category"],
+                    url=url,
+                )):
+                    truncated = True
+                    break
+                event_count += 1
+            if truncated:
+                break
+
+    fp.write(footer)
+    return event_count, schedule_count, truncated
+
+
+def _optional_int(entry: dict, field: str) -> int | None:
+    value = entry.get(field)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"{field} must be an integer")
+    return int(value)
+
+
+def parse_schedules_json(data: bytes) -> tuple[list[dict], list[str]]:
+    """
+    Validate an export made by `export_schedules_json`.
+
+    Returns the schedules with IDs as ints and a list of error messages.
+    Schedules are returned only if there are no errors.
+    """
+
     try:
-        cursor = conn.execute(
-            """
-            INSERT INTO schedules (
-                guild_id, channel_id, creator_id,
-                title, category,
-                duration,
-                frequency, interval, day_of_week,
-                time_of_day, start_date, end_date,
-                signup_mode, ping_roles, announcement_message,
-                created_at, next_run_at
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                interaction.guild_id,
-                interaction.channel_id,
-                interaction.user.id,
-                title,
-                category,
-                duration,
-                frequency,
-                interval_value,
-                day_of_week,
-                time_ts,
-                start_ts,
-                end_ts,
-                signup_mode.lower(),
-                int(ping_roles),
-                announcement_message,
-                now_ts,
-                next_run_at,
-            ),
-        )
-        schedule_id = cursor.lastrowid
-
-        if allowed_role_ids:
-            for role_id in allowed_role_ids:
-                conn.execute(
-                    "INSERT OR IGNORE INTO schedule_allowed_roles (schedule_id, role_id) VALUES (?, ?)",
-                    (schedule_id, role_id),
-                )
-
-        conn.commit()
-    finally:
-        conn.close()
+        payload = json.loads(data.decode("utf-8-sig"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        return [], [f"not a valid JSON file ({e})"]
+
+    if not isinstance(payload, dict) or not isinstance(payload.get("schedules"), list):
+        return [], ["missing the schedules list"]
+    if payload.get("version") != SCHEDULE_EXPORT_VERSION:
+        return [], [f"unsupported export version {payload.get('version')!r}"]
+
+    schedules: list[dict] = []
+    errors: list[str] = []
+
+    for index, entry in enumerate(payload["schedules"], start=1):
+        try:
+            if not isinstance(entry, dict):
+                raise ValueError("not an object")
+
+            title = entry.get("title")
+            if not isinstance(title, str) or not title.strip():
+                raise ValueError("title is missing")
+            if entry.get("category") not in SCHEDULE_CATEGORIES:
+                raise ValueError(f"unknown category {entry.get('category')!r}")
+            if entry.get("frequency") not in ("daily", "weekly"):
+                raise ValueError(f"unknown frequency {entry.get('frequency')!r}")
+            signup_mode = str(entry.get("signup_mode") or "open").lower()
+            if signup_mode not in ("open", "role"):
+                raise ValueError(f"unknown signup_mode {entry.get('signup_mode')!r}")
+
+            interval = _optional_int(entry, "interval")
+            if interval is None or interval < 1:
+                raise ValueError("interval must be at least 1")
+            day_of_week = _optional_int(entry, "day_of_week")
+            if entry["frequency"] == "weekly" and (day_of_week is None or not 0 <= day_of_week <= 6):
+                raise ValueError("weekly schedules need a day_of_week between 0 and 6")
+            time_of_day = _optional_int(entry, "time_of_day")
+            if time_of_day is None:
+                raise ValueError("time_of_day is missing")
+            duration = _optional_int(entry, "duration")
+            if duration is not None and duration <= 0:
+                raise ValueError("duration must be greater than 0")
+            start_date = _optional_int(entry, "start_date")
+            end_date = _optional_int(entry, "end_date")
+            if start_date is not None and end_date is not None and end_date <= start_date:
+                raise ValueError("end_date must be after start_date")
+
+            role_ids = entry.get("allowed_role_ids") or []
+            if not isinstance(role_ids, list):
+                raise ValueError("allowed_role_ids must be a list")
+            allowed_role_ids = [int(role_id) for role_id in role_ids]
+            if signup_mode == "role" and not allowed_role_ids:
+                raise ValueError("role signup mode needs allowed_role_ids")
+
+            # Exports from before catch_up existed don't have it.
+            catch_up = entry.get("catch_up", "skip")
+            if catch_up not in CATCH_UP_POLICIES:
+                raise ValueError(f"unknown catch_up {catch_up!r}")
+
+            message = entry.get("announcement_message")
+            if message is not None and not isinstance(message, str):
+                raise ValueError("announcement_message must be a string")
+
+            schedules.append({
+                "channel_id": _optional_int(entry, "channel_id"),
+                "title": title.strip(),
+                "category": entry["category"],
+                "duration": duration,
+                "frequency": entry["frequency"],
+                "interval": interval,
+                "day_of_week": day_of_week if entry["frequency"] == "weekly" else None,
+                "time_of_day": time_of_day - time_of_day % 60,
+                "start_date": start_date,
+                "end_date": end_date,
+                "signup_mode": signup_mode,
+                "ping_roles": bool(entry.get("ping_roles")) and signup_mode == "role",
+                "announcement_message": normalize_announcement_message(message),
+                "allowed_role_ids": allowed_role_ids if signup_mode == "role" else [],
+                "catch_up": catch_up,
+            })
+        except (ValueError, TypeError) as e:
+            errors.append(f"schedule {index}: {e}")
+
+    return (schedules, errors) if not errors else ([], errors)
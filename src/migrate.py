@@ -0,0 +1,43 @@
+import argparse
+import logging
+
+from config import LOG_LEVEL
+from storage.db import get_connection, run_migrations, run_pending_backfills
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply pending database migrations.")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="run pending migrations inside a transaction that is rolled back",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=getattr(logging, LOG_LEVEL, logging.INFO),
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+
+    conn = get_connection()
+    try:
+        results = run_migrations(conn, dry_run=args.dry_run)
+    finally:
+        conn.close()
+
+    if not results:
+        print("No pending migrations.")
+    for r in results:
+        line = f"{r['id']}: {r['statements']} statements, {r['duration_ms']} ms"
+        if r["backfill_statements"]:
+            line += f", {r['backfill_statements']} backfill statements"
+            if r["backfill_rows_first_batch"] is not None:
+                line += f" ({r['backfill_rows_first_batch']} rows in the first batch)"
+        print(line)
+
+    if not args.dry_run:
+        run_pending_backfills()
+
+
+if __name__ == "__main__":
+    main()
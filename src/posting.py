@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import discord
+
+from config import BULK_POST_CONCURRENCY, EMBED_REFRESH_PER_MINUTE
+from storage.backend import storage
+from helpers import build_event_announcement_content
+from embeds import build_signup_embed
+from views import SignupView
+from refresher import refresh_queue, queued_refreshes
+
+log = logging.getLogger("synar.posting")
+
+
+async def post_event(channel: discord.abc.Messageable, event_id: int, event: dict) -> discord.Message:
+    """
+    Send the signup post for a stored event. `event` holds the keyword
+    arguments it was created with (see Storage.create_event).
+    """
+
+    signup_mode = (event["signup_mode"] or "open").lower()
+    allowed_role_ids = event.get("allowed_role_ids") or None
+    ping_roles = bool(event["ping_roles"]) and signup_mode == "role"
+
+    embed = await build_signup_embed(
+        guild=getattr(channel, "guild", None),
+        title=event["title"],
+        category=event["category"],
+        timestamp=event["timestamp"],
+        duration=event["duration"],
+        signup_mode=signup_mode,
+        max_slots=event["max_slots"],
+        creator_id=event["creator_id"],
+        event_id=event_id,
+        allowed_role_ids=allowed_role_ids,
+        schedule_id=event.get("schedule_id"),
+    )
+    content = build_event_announcement_content(
+        ping_roles=ping_roles,
+        allowed_role_ids=allowed_role_ids,
+        message=event["announcement_message"],
+    )
+    message = await channel.send(
+        content=content,
+        embed=embed,
+        view=SignupView(event_id),
+        allowed_mentions=discord.AllowedMentions(
+            roles=ping_roles,
+            users=False,
+            everyone=False,
+        ),
+    )
+    await storage.set_event_message(event_id, message.id)
+    return message
+
+
+async def post_events(
+    channel: discord.abc.Messageable,
+    events: list[tuple[int, dict]],
+    *,
+    concurrency: int = BULK_POST_CONCURRENCY,
+) -> list[int]:
+    """
+    Post many stored events to one channel and open a discussion thread for each.
+
+    Messages go out one after another so the channel stays in event order,
+    while thread creation for earlier posts overlaps with later sends, at most
+    `concurrency` requests in flight. Events whose post fails are deleted
+    again. Returns the IDs of those events.
+    """
+
+    semaphore = asyncio.Semaphore(concurrency)
+    failed: list[int] = []
+    threads: list[asyncio.Task] = []
+
+    async def create_thread(message: discord.Message, title: str) -> None:
+        try:
+            await message.create_thread(name=f"{title} Discussion")
+        except discord.HTTPException:
+            log.warning("Could not create thread for message %s", message.id)
+        finally:
+            semaphore.release()
+
+    for event_id, event in events:
+        await semaphore.acquire()
+        try:
+            message = await post_event(channel, event_id, event)
+        except discord.HTTPException:
+            semaphore.release()
+            log.exception("Posting event %s failed", event_id)
+            await storage.delete_event(event_id)
+            failed.append(event_id)
+            continue
+        # The slot is handed over to the thread request.
+        threads.append(asyncio.create_task(create_thread(message, event["title"])))
+
+    await asyncio.gather(*threads)
+    return failed
+
+
+async def refresh_event_post(client: discord.Client, event_id: int) -> None:
+    event = await storage.get_event(event_id)
+    if event is None or event["message_id"] is None:
+        return
+
+    closed = event["closed_at"] is not None
+    signup_mode = (event["signup_mode"] or "open").lower()
+    allowed_role_ids = await storage.get_allowed_role_ids(event_id) or None
+    embed = await build_signup_embed(
+        guild=client.get_guild(event["guild_id"]),
+        title=event["title"],
+        category=event["category"],
+        timestamp=event["timestamp"],
+        duration=event["duration"],
+        signup_mode=signup_mode,
+        max_slots=event["max_slots"],
+        creator_id=event["creator_id"],
+        event_id=event_id,
+        allowed_role_ids=allowed_role_ids,
+        schedule_id=event["schedule_id"],
+        closed=closed,
+    )
+    content = build_event_announcement_content(
+        ping_roles=bool(event["ping_roles"]) and signup_mode == "role",
+        allowed_role_ids=allowed_role_ids,
+        message=event["announcement_message"],
+    )
+
+    channel = client.get_partial_messageable(event["channel_id"])
+    message = channel.get_partial_message(event["message_id"])
+    # Closed events get their buttons disabled with the same edit.
+    extra = {"view": SignupView(event_id, closed=True)} if closed else {}
+    try:
+        # Edits never ping, so the roles in the content stay silent.
+        await message.edit(content=content, embed=embed, **extra)
+    except discord.NotFound:
+        await storage.set_event_message(event_id, None)
+
+
+async def refresh_worker(client: discord.Client) -> None:
+    """Re-render the signup posts queued through `refresher.queue_refreshes`."""
+
+    # Paced so editing a busy schedule stays clear of Discord's edit limits.
+    pause = 60 / EMBED_REFRESH_PER_MINUTE
+    while True:
+        event_id = await refresh_queue.get()
+        # Dropped before rendering: a change that lands meanwhile queues it again.
+        queued_refreshes.discard(event_id)
+        try:
+            await refresh_event_post(client, event_id)
+        except Exception as e:
+            log.warning("Refreshing the post of event %s failed: %s", event_id, e)
+        await asyncio.sleep(pause)
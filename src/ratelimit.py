@@ -0,0 +1,50 @@
+import time
+from collections.abc import Hashable
+
+
+class RateLimiter:
+    """
+    In-memory token buckets, one per key. Each bucket holds up to `burst`
+    tokens and refills at `per_minute` tokens per minute. A per_minute of 0
+    disables the limiter.
+
+    Buckets that have refilled completely are dropped, so memory stays
+    proportional to the keys that were active recently.
+    """
+
+    def __init__(self, burst: int, per_minute: int) -> None:
+        self.burst = burst
+        self.rate = per_minute / 60
+        # key -> (tokens, last update)
+        self._buckets: dict[Hashable, tuple[float, float]] = {}
+        self._next_prune = 0.0
+
+    def hit(self, key: Hashable, now: float | None = None) -> float:
+        """Take one token. Returns 0 if allowed, otherwise seconds until one is available."""
+        if self.rate <= 0:
+            return 0.0
+        if now is None:
+            now = time.monotonic()
+        if now >= self._next_prune:
+            self._prune(now)
+
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / self.rate
+
+        self._buckets[key] = (tokens - 1, now)
+        return 0.0
+
+    def forget(self, key: Hashable) -> None:
+        self._buckets.pop(key, None)
+
+    def _prune(self, now: float) -> None:
+        refill_seconds = self.burst / self.rate
+        self._buckets = {
+            key: (tokens, updated)
+            for key, (tokens, updated) in self._buckets.items()
+            if now - updated < refill_seconds
+        }
+        self._next_prune = now + refill_seconds
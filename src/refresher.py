@@ -0,0 +1,13 @@
+import asyncio
+
+# Events whose signup post should be re-rendered from the database, after
+# a schedule edit or when signups close. Drained by posting.refresh_worker.
+refresh_queue: asyncio.Queue[int] = asyncio.Queue()
+queued_refreshes: set[int] = set()
+
+
+def queue_refreshes(event_ids: list[int]) -> None:
+    for event_id in event_ids:
+        if event_id not in queued_refreshes:
+            queued_refreshes.add(event_id)
+            refresh_queue.put_nowait(event_id)
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import discord
+
+from config import INTERACTION_DEFER_AFTER_MS
+
+log = logging.getLogger("synar.responder")
+
+
+class Responder:
+    """
+    Answers one interaction within Discord's 3-second deadline.
+
+    Everything sent through it goes to `interaction.response` while that is
+    still open, and to the followup webhook once the interaction was
+    deferred. A watchdog defers it on its own when nothing was sent
+    `INTERACTION_DEFER_AFTER_MS` after Discord created the interaction, so
+    slow database or API calls end in a late answer instead of "This
+    interaction failed". Call `defer()` before work that is known to be slow.
+
+    With `update=True` (component clicks that usually edit their own
+    message) deferring shows no "thinking" state.
+    """
+
+    def __init__(self, interaction: discord.Interaction, *, update: bool = False, ephemeral: bool = True):
+        self.interaction = interaction
+        self.update = update
+        self.ephemeral = ephemeral
+        # Held while answering, so the watchdog and the handler never both
+        # use the initial response.
+        self._lock = asyncio.Lock()
+        self._watchdog = asyncio.create_task(self._defer_at_deadline())
+
+    def elapsed(self) -> float:
+        """Seconds since Discord created the interaction."""
+        return (discord.utils.utcnow() - self.interaction.created_at).total_seconds()
+
+    async def _defer_at_deadline(self) -> None:
+        await asyncio.sleep(max(0.0, INTERACTION_DEFER_AFTER_MS / 1000 - self.elapsed()))
+        async with self._lock:
+            try:
+                await self._defer()
+            except discord.HTTPException as e:
+                log.warning("Deferring interaction %s failed: %s", self.interaction.id, e)
+            else:
+                log.debug("Deferred interaction %s after %.2fs", self.interaction.id, self.elapsed())
+
+    async def _defer(self) -> None:
+        if self.interaction.response.is_done():
+            return
+        if self.update:
+            await self.interaction.response.defer()
+        else:
+            await self.interaction.response.defer(ephemeral=self.ephemeral, thinking=True)
+
+    async def defer(self) -> None:
+        """Acknowledge now. Also how a handler answers that has nothing to say."""
+        async with self._lock:
+            self._watchdog.cancel()
+            await self._defer()
+
+    async def send(self, content: str | None = None, **kwargs) -> None:
+        """Send a new message, ephemeral unless told otherwise."""
+        kwargs.setdefault("ephemeral", self.ephemeral)
+        async with self._lock:
+            self._watchdog.cancel()
+            if self.interaction.response.is_done():
+                await self.interaction.followup.send(content, **kwargs)
+            else:
+                await self.interaction.response.send_message(content, **kwargs)
+
+    async def edit(self, **kwargs) -> None:
+        """Edit the message the component belongs to, or the deferred response of a command."""
+        async with self._lock:
+            self._watchdog.cancel()
+            if self.interaction.response.is_done():
+                await self.interaction.edit_original_response(**kwargs)
+            else:
+                await self.interaction.response.edit_message(**kwargs)
@@ -0,0 +1,17 @@
+from config import STORAGE_BACKEND, DATABASE_URL, PG_POOL_MIN_SIZE, PG_POOL_MAX_SIZE
+from storage.base import Storage
+
+
+def create_storage() -> Storage:
+    if STORAGE_BACKEND == "postgres":
+        from storage.postgres_backend import PostgresStorage
+
+        return PostgresStorage(DATABASE_URL, min_size=PG_POOL_MIN_SIZE, max_size=PG_POOL_MAX_SIZE)
+
+    from storage.sqlite_backend import SQLiteStorage
+
+    return SQLiteStorage()
+
+
+# Shared by views, commands and loops; connected in MyClient.setup_hook.
+storage = create_storage()
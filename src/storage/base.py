@@ -0,0 +1,405 @@
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from typing import Any
+
+# Rows come back as sqlite3.Row or asyncpg.Record; both support row["column"]
+# and dict(row).
+Row = Any
+
+
+class EventFullError(Exception):
+    """The database refused a signup that would exceed the event's max_slots."""
+
+
+def signup_unchanged(previous: str | None, status: str) -> bool:
+    # Asking for a slot while holding one, or while waiting for one, changes nothing.
+    return previous == status or (status == "available" and previous == "waitlist")
+
+
+class Storage(ABC):
+    """
+    Every query the bot runs against events, schedules, signups, reminders
+    and worker leases. Views, commands and loops only talk to this interface,
+    so the database behind it can change without touching them.
+    """
+
+    name: str
+    # Exceptions the backend raises when the database itself fails
+    # (locked file, lost connection, ...), for loops that should log and retry.
+    errors: tuple[type[Exception], ...]
+
+    @abstractmethod
+    async def connect(self) -> None:
+        """Open connections and bring the schema up to date."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        ...
+
+    # ---- Events ----
+
+    @abstractmethod
+    async def get_event(self, event_id: int) -> Row | None:
+        ...
+
+    @abstractmethod
+    async def create_event(
+        self,
+        *,
+        guild_id: int,
+        channel_id: int,
+        creator_id: int,
+        title: str,
+        category: str,
+        duration: int | None,
+        signup_mode: str,
+        max_slots: int,
+        timestamp: int,
+        ping_roles: bool,
+        announcement_message: str | None,
+        allowed_role_ids: list[int] | None = None,
+        schedule_id: int | None = None,
+        created_at: int,
+    ) -> int:
+        ...
+
+    @abstractmethod
+    async def create_events(self, events: list[dict]) -> list[int]:
+        """
+        Insert several events in one transaction; each dict takes the keyword
+        arguments of `create_event`. Returns the new IDs in the same order.
+        """
+
+    @abstractmethod
+    async def delete_event(self, event_id: int) -> None:
+        ...
+
+    @abstractmethod
+    async def set_event_message(self, event_id: int, message_id: int | None) -> None:
+        """Remember the signup post of an event."""
+
+    @abstractmethod
+    async def get_allowed_role_ids(self, event_id: int) -> list[int]:
+        ...
+
+    @abstractmethod
+    async def max_event_id(self) -> int:
+        ...
+
+    @abstractmethod
+    def iter_open_event_ids(
+        self,
+        *,
+        max_id: int,
+        batch_size: int,
+    ) -> AsyncIterator[list[int]]:
+        """Yield IDs of events whose signups are still open, soonest first, in batches."""
+
+    @abstractmethod
+    async def event_ids_after(self, event_id: int) -> list[int]:
+        """IDs of open events newer than `event_id`."""
+
+    @abstractmethod
+    async def close_due_events(
+        self,
+        *,
+        now_ts: int,
+        at_end: bool,
+        limit: int,
+    ) -> list[int]:
+        """
+        Close signups of up to `limit` events that started (or, with
+        `at_end`, ended) by `now_ts`, oldest first, drop their pending
+        reminders and add their signups to the attendance rollups. Returns
+        their IDs.
+        """
+
+    @abstractmethod
+    async def closed_event_ids(self, *, since: int) -> list[int]:
+        """IDs of events closed at or after `since`."""
+
+    @abstractmethod
+    async def guild_events_page(
+        self,
+        guild_id: int,
+        *,
+        now_ts: int,
+        after: tuple[int, int] | None,
+        limit: int,
+    ) -> list[Row]:
+        """
+        A guild's events from `now_ts` on, ordered by (timestamp, id) and
+        starting after the `after` cursor.
+        """
+
+    @abstractmethod
+    def iter_guild_calendar_events(
+        self,
+        guild_id: int,
+        *,
+        now_ts: int,
+        batch_size: int,
+    ) -> AsyncIterator[list[Row]]:
+        """
+        Yield a guild's events from `now_ts` on in batches, soonest first,
+        leaving out those covered by the recurrence of `calendar_schedules`.
+        """
+
+    @abstractmethod
+    def iter_user_calendar_events(
+        self,
+        guild_id: int,
+        user_id: int,
+        *,
+        now_ts: int,
+        batch_size: int,
+    ) -> AsyncIterator[list[Row]]:
+        """Yield the guild's events from `now_ts` on that the user signed up for (not declined), in batches."""
+
+    # ---- Signups ----
+
+    @abstractmethod
+    async def signup_overview(self, event_id: int, *, preview: int) -> tuple[dict[str, int], dict[str, list[int]]]:
+        """
+        Signup counts per status, and the user IDs of the first `preview`
+        signups of each status in roster order.
+        """
+
+    @abstractmethod
+    async def signup_page(
+        self,
+        event_id: int,
+        status: str,
+        *,
+        after: tuple[int, int] | None,
+        limit: int,
+    ) -> list[Row]:
+        """
+        One page of a status's signups in roster order (sign-up time, or
+        waitlist position). Rows have user_id and sort_key; pass the last
+        row's (sort_key, user_id) as `after` to get the next page.
+        """
+
+    @abstractmethod
+    async def count_available(self, event_id: int) -> int:
+        ...
+
+    @abstractmethod
+    async def set_signup(self, event_id: int, user_id: int, status: str, *, now_ts: int) -> dict:
+        """
+        Record a signup in one transaction. Signing up for a full event puts
+        the user on the waitlist instead; leaving an available slot promotes
+        the first waitlisted user into it.
+
+        Repeating the current status writes nothing and takes no write lock.
+
+        Returns {"status", "position", "promoted_user_id", "changed"} where
+        status is the stored status ("waitlist" when the event was full) or
+        None if the event no longer exists, position is the place in the
+        waitlist, and changed is False when nothing was written.
+
+        Raises EventFullError if the capacity triggers reject the write, which
+        only happens when another writer bypassed the waitlist.
+        """
+
+    # ---- Schedules ----
+
+    @abstractmethod
+    async def get_schedule(self, schedule_id: int) -> Row | None:
+        ...
+
+    @abstractmethod
+    async def create_schedule(
+        self,
+        *,
+        guild_id: int,
+        channel_id: int,
+        creator_id: int,
+        title: str,
+        category: str,
+        duration: int | None,
+        frequency: str,
+        interval: int,
+        day_of_week: int | None,
+        time_of_day: int,
+        start_date: int,
+        end_date: int | None,
+        signup_mode: str,
+        ping_roles: bool,
+        announcement_message: str | None,
+        next_run_at: int,
+        allowed_role_ids: list[int] | None,
+        created_at: int,
+        catch_up: str = "skip",
+    ) -> int:
+        ...
+
+    @abstractmethod
+    async def create_schedules(self, schedules: list[dict]) -> list[int]:
+        """Insert several schedules in one transaction; see `create_events`."""
+
+    @abstractmethod
+    async def guild_schedules(self, guild_id: int) -> list[dict]:
+        """All schedules of a guild as dicts, each with its `allowed_role_ids`."""
+
+    @abstractmethod
+    async def guild_schedules_page(
+        self,
+        guild_id: int,
+        *,
+        after: tuple[int, int] | None,
+        limit: int,
+    ) -> list[Row]:
+        """A guild's schedules ordered by (next_run_at, id), starting after the `after` cursor."""
+
+    @abstractmethod
+    async def calendar_schedules(self, guild_id: int) -> list[Row]:
+        """A guild's schedules that still have occurrences ahead and aren't quarantined."""
+
+    @abstractmethod
+    async def update_schedule(
+        self,
+        schedule_id: int,
+        *,
+        title: str,
+        category: str,
+        frequency: str,
+        interval: int,
+        day_of_week: int | None,
+        time_of_day: int,
+        duration: int | None,
+        start_date: int | None,
+        end_date: int | None,
+        signup_mode: str,
+        ping_roles: bool,
+        announcement_message: str | None,
+        next_run_at: int,
+        catch_up: str,
+        allowed_role_ids: list[int],
+        now_ts: int,
+        event_shift: int = 0,
+    ) -> list[int]:
+        """
+        Overwrite a schedule; its allowed roles are replaced by
+        `allowed_role_ids`. Failure counters and quarantine are reset.
+
+        Events of the schedule that haven't started yet take over the new
+        details and roles in the same transaction, and are moved by
+        `event_shift` seconds. Returns the IDs of those events.
+        """
+
+    @abstractmethod
+    async def delete_schedule(self, schedule_id: int, *, now_ts: int) -> None:
+        """Delete a schedule together with the events it created that have not started yet."""
+
+    @abstractmethod
+    async def active_schedules(self, *, now_ts: int) -> list[Row]:
+        """Schedules that haven't ended, aren't quarantined and aren't waiting out a retry."""
+
+    @abstractmethod
+    async def mark_schedule_failed(
+        self,
+        schedule_id: int,
+        *,
+        error: str,
+        retry_at: int,
+        quarantined_at: int | None,
+    ) -> None:
+        """Count one more failure and push the next attempt back to `retry_at`."""
+
+    @abstractmethod
+    async def clear_schedule_failures(self, schedule_id: int) -> None:
+        ...
+
+    @abstractmethod
+    async def set_schedule_next_run(self, schedule_id: int, next_run_at: int) -> None:
+        ...
+
+    @abstractmethod
+    async def schedule_event_exists(self, schedule_id: int, timestamp: int) -> bool:
+        ...
+
+    @abstractmethod
+    async def latest_schedule_event_ts(self, schedule_id: int, *, before: int) -> int | None:
+        """Timestamp of the newest event of a schedule at or before `before`, if any."""
+
+    @abstractmethod
+    async def get_schedule_role_ids(self, schedule_id: int) -> list[int]:
+        ...
+
+    # ---- Reminders ----
+
+    @abstractmethod
+    async def add_reminder(self, event_id: int, user_id: int, offset_seconds: int, *, now_ts: int) -> None:
+        """Remind the user `offset_seconds` before the event, wherever it moves."""
+
+    @abstractmethod
+    async def apply_reminder_defaults(self, event_id: int, user_id: int, *, event_ts: int, now_ts: int) -> None:
+        """Add the user's default reminders for an event, skipping those already due."""
+
+    @abstractmethod
+    async def clear_reminders(self, event_id: int, user_id: int) -> None:
+        ...
+
+    @abstractmethod
+    async def due_reminders(self, *, now_ts: int, max_offset: int) -> list[Row]:
+        """
+        Reminders of open events that are due by `now_ts`. `max_offset` is
+        the largest offset in use; only events starting within it are looked at.
+        Each row carries the event's effective `reminder_mode` ("dm" or "thread").
+        """
+
+    @abstractmethod
+    async def delete_reminders(self, reminder_ids: list[int]) -> None:
+        ...
+
+    @abstractmethod
+    async def set_guild_reminder_mode(self, guild_id: int, mode: str) -> None:
+        ...
+
+    @abstractmethod
+    async def set_event_reminder_mode(self, event_id: int, mode: str | None) -> None:
+        """Override the guild's reminder mode for one event; None goes back to the guild's."""
+
+    @abstractmethod
+    async def get_reminder_defaults(self, user_id: int) -> list[int]:
+        ...
+
+    @abstractmethod
+    async def set_reminder_defaults(self, user_id: int, offsets: list[int]) -> None:
+        ...
+
+    # ---- Stats ----
+
+    @abstractmethod
+    async def member_attendance(self, guild_id: int, user_id: int, *, since: int) -> list[Row]:
+        """
+        Per category with events in weeks starting at or after `since`: the
+        number of events and the member's available, maybe, unavailable and
+        waitlist signups for them.
+        """
+
+    @abstractmethod
+    async def attendance_leaderboard(
+        self,
+        guild_id: int,
+        *,
+        since: int,
+        category: str | None,
+        limit: int,
+    ) -> list[Row]:
+        """Members with the most available signups since `since`, with their other signup counts."""
+
+    @abstractmethod
+    async def category_stats(self, guild_id: int, *, since: int) -> list[Row]:
+        """Events, slots and available signups per category since `since`."""
+
+    # ---- Leases ----
+
+    @abstractmethod
+    async def acquire_lease(self, name: str, owner: str, ttl_seconds: int, *, now_ts: int) -> bool:
+        """Take or renew a lease; False while another live owner holds it."""
+
+    @abstractmethod
+    async def release_lease(self, name: str, owner: str) -> None:
+        ...
@@ -1,12 +1,44 @@
+import hashlib
+import logging
+import re
 import sqlite3
 import time
 from pathlib import Path
 
+from config import (
+    DB_SYNCHRONOUS,
+    DB_CACHE_SIZE_KIB,
+    DB_MMAP_SIZE,
+    DB_BUSY_TIMEOUT_MS,
+    DB_JOURNAL_SIZE_LIMIT,
+    DB_VACUUM_PAGES,
+)
+
 REPO_ROOT = Path(__file__).resolve().parents[2]
 DATA_DIR = REPO_ROOT / "data"
 DB_PATH = DATA_DIR / "synar.db"
 MIGRATIONS_DIR = REPO_ROOT / "migrations"
 
+log = logging.getLogger("synar.db")
+
+BACKFILL_MARKER_RE = re.compile(r"^--\s*backfill\s*$", re.MULTILINE | re.IGNORECASE)
+MIGRATION_BATCH_SIZE = 1000
+MIGRATION_BATCH_PAUSE_SECONDS = 0.05
+
+# Applied to every new connection, in this order.
+# synchronous=NORMAL is durable under WAL (a power loss can only drop the last
+# commits, never corrupt the file) and avoids an fsync on every commit.
+PRAGMA_PROFILE: tuple[tuple[str, str | int], ...] = (
+    ("foreign_keys", "ON"),
+    ("journal_mode", "WAL"),
+    ("synchronous", DB_SYNCHRONOUS),
+    ("cache_size", -DB_CACHE_SIZE_KIB),  # negative = KiB instead of pages
+    ("mmap_size", DB_MMAP_SIZE),
+    ("busy_timeout", DB_BUSY_TIMEOUT_MS),
+    ("temp_store", "MEMORY"),
+    ("journal_size_limit", DB_JOURNAL_SIZE_LIMIT),
+)
+
 
 def get_connection() -> sqlite3.Connection:
     DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -14,42 +46,314 @@ def get_connection() -> sqlite3.Connection:
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
 
-    # Good defaults
-    conn.execute("PRAGMA foreign_keys = ON;")
-    conn.execute("PRAGMA journal_mode = WAL;")  # better for concurrency
+    for name, value in PRAGMA_PROFILE:
+        conn.execute(f"PRAGMA {name} = {value};")
     return conn
 
 
-def run_migrations(conn: sqlite3.Connection) -> None:
+def migration_version(path: Path) -> int:
+    # "0000_0014_add_duration..." -> 14
+    major, minor = path.stem.split("_")[:2]
+    return int(major + minor)
+
+
+def latest_migration_version() -> int:
+    # Only lists file names; nothing is read until a migration is pending.
+    return max((migration_version(p) for p in MIGRATIONS_DIR.glob("*.sql")), default=0)
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _ensure_migrations_table(conn: sqlite3.Connection) -> None:
     conn.execute("""
                  CREATE TABLE IF NOT EXISTS schema_migrations (
                  id TEXT PRIMARY KEY,
                  applied_at INTEGER NOT NULL)
                  """)
-    
-    applied = {
-        row["id"] for row in conn.execute("SELECT id FROM schema_migrations")
+
+    # Columns added after the table shipped; it can't migrate itself.
+    existing = {row["name"] for row in conn.execute("PRAGMA table_info(schema_migrations)")}
+    for name, definition in (
+        ("checksum", "TEXT"),
+        ("duration_ms", "INTEGER"),
+        ("backfilled_at", "INTEGER"),
+    ):
+        if name not in existing:
+            conn.execute(f"ALTER TABLE schema_migrations ADD COLUMN {name} {definition}")
+    if "backfilled_at" not in existing:
+        # Older migrations had no backfill step.
+        conn.execute("UPDATE schema_migrations SET backfilled_at = applied_at")
+    conn.commit()
+
+
+def _has_sql(text: str) -> bool:
+    return any(line.strip() and not line.strip().startswith("--") for line in text.splitlines())
+
+
+def _split_statements(sql: str) -> list[str]:
+    statements: list[str] = []
+    current = ""
+    for line in sql.splitlines(keepends=True):
+        current += line
+        if sqlite3.complete_statement(current):
+            if _has_sql(current):
+                statements.append(current.strip())
+            current = ""
+    if _has_sql(current):
+        statements.append(current.strip())
+    return statements
+
+
+def parse_migration(path: Path) -> dict:
+    raw = path.read_bytes()
+    sql = raw.decode("utf-8")
+
+    # Statements after a "-- backfill" line run outside the schema transaction,
+    # repeatedly, until a batch touches fewer than :batch_size rows. They must
+    # LIMIT themselves to :batch_size and skip rows that are already done.
+    schema_sql, *backfill_sql = BACKFILL_MARKER_RE.split(sql, maxsplit=1)
+
+    return {
+        "id": path.stem,
+        "version": migration_version(path),
+        "checksum": hashlib.sha256(raw).hexdigest(),
+        "schema": _split_statements(schema_sql),
+        "backfill": _split_statements(backfill_sql[0]) if backfill_sql else [],
     }
 
-    files = sorted(MIGRATIONS_DIR.glob("*.sql"))
 
-    for path in files:
-        mig_id = path.stem
-        if mig_id in applied:
-            continue
+def _apply_schema(conn: sqlite3.Connection, migration: dict, *, dry_run: bool) -> dict:
+    started = time.monotonic()
+    now_ts = int(time.time())
+
+    # Statements run one by one instead of through executescript, which would
+    # commit on its own and leave a half-applied file behind on errors.
+    if not dry_run:
+        conn.execute("BEGIN IMMEDIATE")
+    for stmt in migration["schema"]:
+        conn.execute(stmt)
+
+    conn.execute(
+        """
+        INSERT INTO schema_migrations (id, applied_at, checksum, backfilled_at)
+        VALUES (?, ?, ?, ?)
+        """,
+        (
+            migration["id"],
+            now_ts,
+            migration["checksum"],
+            None if migration["backfill"] else now_ts,
+        ),
+    )
+    conn.execute(f"PRAGMA user_version = {migration['version']};")
+
+    backfill_rows = None
+    if dry_run and migration["backfill"]:
+        # Preview one batch of each backfill on top of the new schema.
+        backfill_rows = sum(
+            conn.execute(stmt, {"batch_size": MIGRATION_BATCH_SIZE}).rowcount
+            for stmt in migration["backfill"]
+        )
 
-        sql = path.read_text(encoding="utf-8")
-        conn.executescript(sql)
+    duration_ms = int((time.monotonic() - started) * 1000)
+    if not dry_run:
         conn.execute(
-            "INSERT INTO schema_migrations (id, applied_at) VALUES (?, ?)",
-            (mig_id, int(time.time()))
+            "UPDATE schema_migrations SET duration_ms = ? WHERE id = ?",
+            (duration_ms, migration["id"]),
         )
         conn.commit()
 
+    if not migration["schema"]:
+        log.warning("Migration %s has no schema statements", migration["id"])
+    log.info(
+        "%s migration %s (%d statements) in %d ms",
+        "Checked" if dry_run else "Applied",
+        migration["id"],
+        len(migration["schema"]),
+        duration_ms,
+    )
+
+    return {
+        "id": migration["id"],
+        "statements": len(migration["schema"]),
+        "duration_ms": duration_ms,
+        "backfill_statements": len(migration["backfill"]),
+        "backfill_rows_first_batch": backfill_rows,
+    }
+
+
+def run_backfill(conn: sqlite3.Connection, migration: dict) -> int:
+    started = time.monotonic()
+    total = 0
+
+    for stmt in migration["backfill"]:
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                changed = conn.execute(stmt, {"batch_size": MIGRATION_BATCH_SIZE}).rowcount
+                conn.commit()
+            except sqlite3.Error as e:
+                conn.rollback()
+                raise RuntimeError(f"Backfill of migration {migration['id']} failed: {e}") from e
+
+            total += changed
+            if changed < MIGRATION_BATCH_SIZE:
+                break
+            # Give other writers a chance at the lock between batches.
+            time.sleep(MIGRATION_BATCH_PAUSE_SECONDS)
+
+    conn.execute(
+        "UPDATE schema_migrations SET backfilled_at = ? WHERE id = ?",
+        (int(time.time()), migration["id"]),
+    )
+    conn.commit()
+
+    log.info(
+        "Backfilled %d rows for migration %s in %d ms",
+        total,
+        migration["id"],
+        int((time.monotonic() - started) * 1000),
+    )
+    return total
+
+
+def pending_backfills(conn: sqlite3.Connection) -> list[dict]:
+    ids = [
+        row["id"]
+        for row in conn.execute(
+            "SELECT id FROM schema_migrations WHERE backfilled_at IS NULL ORDER BY id"
+        )
+    ]
+    return [parse_migration(MIGRATIONS_DIR / f"{mig_id}.sql") for mig_id in ids]
+
+
+def run_pending_backfills() -> None:
+    conn = get_connection()
+    try:
+        for migration in pending_backfills(conn):
+            run_backfill(conn, migration)
+    finally:
+        conn.close()
+
+
+def run_migrations(conn: sqlite3.Connection, *, dry_run: bool = False) -> list[dict]:
+    """
+    Apply every pending migration in its own transaction.
+
+    Checksums of already applied migrations are verified first, so an edited
+    migration stops the run before anything changes. With `dry_run`, all
+    pending migrations (and one batch of each backfill) are executed in a
+    single transaction that is rolled back, which reports timings and errors
+    without touching the schema. Backfills are not run here; see
+    `run_pending_backfills`.
+    """
+
+    _ensure_migrations_table(conn)
+
+    applied = {
+        row["id"]: row["checksum"]
+        for row in conn.execute("SELECT id, checksum FROM schema_migrations")
+    }
+
+    migrations = [parse_migration(path) for path in sorted(MIGRATIONS_DIR.glob("*.sql"))]
+
+    for migration in migrations:
+        if migration["id"] not in applied:
+            continue
+        recorded = applied[migration["id"]]
+        if recorded is None:
+            # Applied before checksums were recorded; trust the current file.
+            if not dry_run:
+                conn.execute(
+                    "UPDATE schema_migrations SET checksum = ? WHERE id = ?",
+                    (migration["checksum"], migration["id"]),
+                )
+        elif recorded != migration["checksum"]:
+            raise RuntimeError(
+                f"Migration {migration['id']} was modified after it was applied "
+                f"(recorded checksum {recorded[:12]}, file {migration['checksum'][:12]})"
+            )
+    conn.commit()
+
+    pending = [m for m in migrations if m["id"] not in applied]
+    results = []
+
+    # A dry run stacks every pending migration in one transaction, so later
+    # files see the tables created by earlier ones, then throws it all away.
+    if dry_run and pending:
+        conn.execute("BEGIN IMMEDIATE")
+    try:
+        for migration in pending:
+            try:
+                results.append(_apply_schema(conn, migration, dry_run=dry_run))
+            except sqlite3.Error as e:
+                conn.rollback()
+                raise RuntimeError(f"Migration {migration['id']} failed and was rolled back: {e}") from e
+    finally:
+        if dry_run:
+            conn.rollback()
+
+    # Databases migrated before user_version was tracked catch up here.
+    if migrations and not dry_run:
+        conn.execute(f"PRAGMA user_version = {migrations[-1]['version']};")
+        conn.commit()
+
+    return results
+
+
+def ensure_incremental_vacuum(conn: sqlite3.Connection) -> None:
+    # auto_vacuum can only be switched on an empty database or by a full VACUUM,
+    # so existing databases pay for one VACUUM the first time this runs.
+    mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    if mode == 2:  # INCREMENTAL
+        return
+
+    log.info("Switching database to auto_vacuum=INCREMENTAL (one-time VACUUM)")
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+    conn.execute("VACUUM;")
+
+
+def run_maintenance(conn: sqlite3.Connection) -> dict[str, int]:
+    started = time.monotonic()
+
+    conn.execute("PRAGMA optimize;")
+
+    freelist_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if freelist_before:
+        # The pragma frees one page per step, so the cursor must be drained.
+        conn.execute(f"PRAGMA incremental_vacuum({DB_VACUUM_PAGES});").fetchall()
+        conn.commit()
+    freelist_after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    busy, wal_frames, checkpointed = conn.execute(
+        "PRAGMA wal_checkpoint(TRUNCATE);"
+    ).fetchone()
+
+    return {
+        "pages_freed": freelist_before - freelist_after,
+        "freelist": freelist_after,
+        "wal_busy": busy,
+        "wal_frames": wal_frames,
+        "wal_checkpointed": checkpointed,
+        "duration_ms": int((time.monotonic() - started) * 1000),
+    }
+
+
+def maintain_db() -> dict[str, int]:
+    conn = get_connection()
+    try:
+        return run_maintenance(conn)
+    finally:
+        conn.close()
+
 
 def init_db() -> None:
     conn = get_connection()
     try:
-        run_migrations(conn)
+        if schema_version(conn) < latest_migration_version():
+            run_migrations(conn)
+        ensure_incremental_vacuum(conn)
     finally:
-        conn.close()
\ No newline at end of file
+        conn.close()
@@ -0,0 +1,24 @@
+import os
+import socket
+import time
+import uuid
+
+from storage.backend import storage
+
+# Identifies this process in worker_leases.
+LEASE_OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+async def acquire_lease(name: str, ttl_seconds: int, owner: str = LEASE_OWNER) -> bool:
+    """
+    Take or renew the lease `name` for `ttl_seconds`.
+
+    Returns False while another live owner holds it. A lease whose owner
+    stopped renewing it is taken over once it expires.
+    """
+
+    return await storage.acquire_lease(name, owner, ttl_seconds, now_ts=int(time.time()))
+
+
+async def release_lease(name: str, owner: str = LEASE_OWNER) -> None:
+    await storage.release_lease(name, owner)
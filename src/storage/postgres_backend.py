@@ -0,0 +1,1059 @@
+import hashlib
+import logging
+import time
+from collections.abc import AsyncIterator
+
+from storage.base import EventFullError, Row, Storage, signup_unchanged
+from storage.db import MIGRATIONS_DIR
+
+PG_MIGRATIONS_DIR = MIGRATIONS_DIR / "postgres"
+
+# Arbitrary key for pg_advisory_lock; keeps concurrent starts from migrating twice.
+MIGRATION_LOCK_ID = 0x53594E4152  # "SYNAR"
+
+
+log = logging.getLogger("synar.db.postgres")
+
+
+# Monday 00:00 UTC of an event's week; see migrations/postgres/0013.
+WEEK_START_SQL = "e.timestamp - (e.timestamp - 345600) % 604800"
+
+# SQLSTATE raised by the event capacity trigger (migrations/postgres/0003).
+CHECK_VIOLATION = "23514"
+
+
+def _affected(status: str) -> int:
+    # asyncpg returns command tags such as "INSERT 0 1" or "UPDATE 3".
+    return int(status.rsplit(" ", 1)[-1])
+
+
+class PostgresStorage(Storage):
+    """PostgreSQL implementation on an asyncpg connection pool."""
+
+    name = "postgres"
+    # asyncpg's errors are added once connect() has imported it.
+    errors: tuple[type[Exception], ...] = (OSError,)
+
+    def __init__(self, dsn: str, *, min_size: int, max_size: int) -> None:
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self._pool = None
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            raise RuntimeError("PostgresStorage.connect() has not been called")
+        return self._pool
+
+    async def connect(self) -> None:
+        try:
+            import asyncpg
+        except ImportError:
+            raise RuntimeError("STORAGE_BACKEND=postgres requires the asyncpg package (pip install asyncpg)")
+        self.errors = (asyncpg.PostgresError, asyncpg.InterfaceError, OSError)
+
+        self._pool = await asyncpg.create_pool(
+            self.dsn,
+            min_size=self.min_size,
+            max_size=self.max_size,
+        )
+        await self._migrate()
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def _migrate(self) -> None:
+        async with self.pool.acquire() as conn:
+            await conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_ID)
+            try:
+                await conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS schema_migrations (
+                        id TEXT PRIMARY KEY,
+                        applied_at BIGINT NOT NULL,
+                        checksum TEXT NOT NULL,
+                        duration_ms INTEGER
+                    )
+                    """
+                )
+                applied = {
+                    r["id"]: r["checksum"]
+                    for r in await conn.fetch("SELECT id, checksum FROM schema_migrations")
+                }
+
+                for path in sorted(PG_MIGRATIONS_DIR.glob("*.sql")):
+                    raw = path.read_bytes()
+                    checksum = hashlib.sha256(raw).hexdigest()
+
+                    if path.stem in applied:
+                        if applied[path.stem] != checksum:
+                            raise RuntimeError(f"Migration postgres/{path.stem} was modified after it was applied")
+                        continue
+
+                    started = time.monotonic()
+                    async with conn.transaction():
+                        await conn.execute(raw.decode("utf-8"))
+                        duration_ms = int((time.monotonic() - started) * 1000)
+                        await conn.execute(
+                            """
+                            INSERT INTO schema_migrations (id, applied_at, checksum, duration_ms)
+                            VALUES ($1, $2, $3, $4)
+                            """,
+                            path.stem,
+                            int(time.time()),
+                            checksum,
+                            duration_ms,
+                        )
+                    log.info("Applied migration postgres/%s in %d ms", path.stem, duration_ms)
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+
+    # ---- Events ----
+
+    async def get_event(self, event_id: int) -> Row | None:
+        return await self.pool.fetchrow("SELECT * FROM events WHERE id = $1", event_id)
+
+    @staticmethod
+    async def _insert_event(conn, event: dict) -> int:
+        event_id = await conn.fetchval(
+            """
+            INSERT INTO events (
+                schedule_id,
+                guild_id, channel_id, creator_id,
+                title, category, duration, signup_mode, max_slots,
+                timestamp, ping_roles, announcement_message, created_at
+            )
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)
+            RETURNING id
+            """,
+            event.get("schedule_id"),
+            event["guild_id"],
+            event["channel_id"],
+            event["creator_id"],
+            event["title"],
+            event["category"],
+            event["duration"],
+            event["signup_mode"].lower(),
+            event["max_slots"],
+            event["timestamp"],
+            int(event["ping_roles"]),
+            event["announcement_message"],
+            event["created_at"],
+        )
+        if event.get("allowed_role_ids"):
+            await conn.executemany(
+                """
+                INSERT INTO event_allowed_roles (event_id, role_id) VALUES ($1, $2)
+                ON CONFLICT DO NOTHING
+                """,
+                [(event_id, role_id) for role_id in event["allowed_role_ids"]],
+            )
+        return event_id
+
+    async def create_event(self, **event) -> int:
+        return (await self.create_events([event]))[0]
+
+    async def create_events(self, events: list[dict]) -> list[int]:
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                return [await self._insert_event(conn, event) for event in events]
+
+    async def delete_event(self, event_id: int) -> None:
+        await self.pool.execute("DELETE FROM events WHERE id = $1", event_id)
+
+    async def set_event_message(self, event_id: int, message_id: int | None) -> None:
+        await self.pool.execute("UPDATE events SET message_id = $2 WHERE id = $1", event_id, message_id)
+
+    async def get_allowed_role_ids(self, event_id: int) -> list[int]:
+        rows = await self.pool.fetch(
+            "SELECT role_id FROM event_allowed_roles WHERE event_id = $1",
+            event_id,
+        )
+        return [r["role_id"] for r in rows]
+
+    async def max_event_id(self) -> int:
+        return await self.pool.fetchval("SELECT COALESCE(MAX(id), 0) FROM events")
+
+    async def iter_open_event_ids(
+        self,
+        *,
+        max_id: int,
+        batch_size: int,
+    ) -> AsyncIterator[list[int]]:
+        after = (0, 0)
+        while True:
+            rows = await self.pool.fetch(
+                """
+                SELECT id, timestamp FROM events
+                WHERE closed_at IS NULL AND (timestamp, id) > ($1, $2) AND id <= $3
+                ORDER BY timestamp, id
+                LIMIT $4
+                """,
+                *after,
+                max_id,
+                batch_size,
+            )
+            if not rows:
+                return
+            yield [r["id"] for r in rows]
+            after = (rows[-1]["timestamp"], rows[-1]["id"])
+
+    async def event_ids_after(self, event_id: int) -> list[int]:
+        rows = await self.pool.fetch(
+            """
+            SELECT id FROM events
+            WHERE id > $1 AND closed_at IS NULL
+            ORDER BY id
+            """,
+            event_id,
+        )
+        return [r["id"] for r in rows]
+
+    async def close_due_events(
+        self,
+        *,
+        now_ts: int,
+        at_end: bool,
+        limit: int,
+    ) -> list[int]:
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                # Walks idx_events_open up to now; the end check only filters.
+                rows = await conn.fetch(
+                    """
+                    UPDATE events SET closed_at = $1
+                    WHERE id IN (
+                        SELECT id FROM events
+                        WHERE closed_at IS NULL AND timestamp <= $1
+                          AND (NOT $2 OR timestamp + COALESCE(duration, 0) * 3600 <= $1)
+                        ORDER BY timestamp, id
+                        LIMIT $3
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING id
+                    """,
+                    now_ts,
+                    at_end,
+                    limit,
+                )
+                event_ids = [r["id"] for r in rows]
+                if event_ids:
+                    await conn.execute(
+                        "DELETE FROM event_reminders WHERE event_id = ANY($1::bigint[])",
+                        event_ids,
+                    )
+                    # Signups can't change once closed, so this is their final tally.
+                    await conn.execute(
+                        f"""
+                        INSERT INTO attendance_weekly
+                            (guild_id, week_start, category, user_id, available, maybe, unavailable, waitlist)
+                        SELECT e.guild_id, {WEEK_START_SQL}, e.category, s.user_id,
+                               COUNT(*) FILTER (WHERE s.status = 'available'),
+                               COUNT(*) FILTER (WHERE s.status = 'maybe'),
+                               COUNT(*) FILTER (WHERE s.status = 'unavailable'),
+                               COUNT(*) FILTER (WHERE s.status = 'waitlist')
+                        FROM events e
+                        JOIN event_signups s ON s.event_id = e.id
+                        WHERE e.id = ANY($1::bigint[])
+                        GROUP BY 1, 2, 3, 4
+                        ON CONFLICT (guild_id, week_start, category, user_id) DO UPDATE SET
+                            available = attendance_weekly.available + excluded.available,
+                            maybe = attendance_weekly.maybe + excluded.maybe,
+                            unavailable = attendance_weekly.unavailable + excluded.unavailable,
+                            waitlist = attendance_weekly.waitlist + excluded.waitlist
+                        """,
+                        event_ids,
+                    )
+                    await conn.execute(
+                        f"""
+                        INSERT INTO category_weekly (guild_id, week_start, category, events, slots, available)
+                        SELECT e.guild_id, {WEEK_START_SQL}, e.category, COUNT(*), SUM(e.max_slots),
+                               SUM((
+                                   SELECT COUNT(*) FROM event_signups s
+                                   WHERE s.event_id = e.id AND s.status = 'available'
+                               ))
+                        FROM events e
+                        WHERE e.id = ANY($1::bigint[])
+                        GROUP BY 1, 2, 3
+                        ON CONFLICT (guild_id, week_start, category) DO UPDATE SET
+                            events = category_weekly.events + excluded.events,
+                            slots = category_weekly.slots + excluded.slots,
+                            available = category_weekly.available + excluded.available
+                        """,
+                        event_ids,
+                    )
+        return event_ids
+
+    async def closed_event_ids(self, *, since: int) -> list[int]:
+        rows = await self.pool.fetch(
+            "SELECT id FROM events WHERE closed_at >= $1",
+            since,
+        )
+        return [r["id"] for r in rows]
+
+    async def guild_events_page(
+        self,
+        guild_id: int,
+        *,
+        now_ts: int,
+        after: tuple[int, int] | None,
+        limit: int,
+    ) -> list[Row]:
+        after_ts, after_id = after or (now_ts, -1)
+        return await self.pool.fetch(
+            """
+            SELECT id, schedule_id, channel_id, message_id, title, category, timestamp, closed_at
+            FROM events
+            WHERE guild_id = $1 AND (timestamp, id) > ($2, $3)
+            ORDER BY timestamp, id
+            LIMIT $4
+            """,
+            guild_id,
+            after_ts,
+            after_id,
+            limit,
+        )
+
+    async def iter_guild_calendar_events(
+        self,
+        guild_id: int,
+        *,
+        now_ts: int,
+        batch_size: int,
+    ) -> AsyncIterator[list[Row]]:
+        after = (now_ts, -1)
+        while True:
+            # Events at or after their schedule's next run are part of its RRULE.
+            rows = await self.pool.fetch(
+                """
+                SELECT e.id, e.schedule_id, e.channel_id, e.message_id, e.title, e.category, e.timestamp, e.duration
+                FROM events e
+                WHERE e.guild_id = $1 AND (e.timestamp, e.id) > ($2, $3)
+                  AND NOT EXISTS (
+                      SELECT 1 FROM schedules s
+                      WHERE s.id = e.schedule_id AND e.timestamp >= s.next_run_at
+                        AND s.quarantined_at IS NULL
+                        AND (s.end_date IS NULL OR s.next_run_at <= s.end_date)
+                  )
+                ORDER BY e.timestamp, e.id
+                LIMIT $4
+                """,
+                guild_id,
+                *after,
+                batch_size,
+            )
+            if not rows:
+                return
+            yield rows
+            after = (rows[-1]["timestamp"], rows[-1]["id"])
+
+    async def iter_user_calendar_events(
+        self,
+        guild_id: int,
+        user_id: int,
+        *,
+        now_ts: int,
+        batch_size: int,
+    ) -> AsyncIterator[list[Row]]:
+        after = (now_ts, -1)
+        while True:
+            rows = await self.pool.fetch(
+                """
+                SELECT e.id, e.schedule_id, e.channel_id, e.message_id, e.title, e.category, e.timestamp, e.duration
+                FROM event_signups su
+                JOIN events e ON e.id = su.event_id
+                WHERE su.user_id = $1 AND su.status != 'unavailable'
+                  AND e.guild_id = $2 AND (e.timestamp, e.id) > ($3, $4)
+                ORDER BY e.timestamp, e.id
+                LIMIT $5
+                """,
+                user_id,
+                guild_id,
+                *after,
+                batch_size,
+            )
+            if not rows:
+                return
+            yield rows
+            after = (rows[-1]["timestamp"], rows[-1]["id"])
+
+    # ---- Signups ----
+
+    async def signup_overview(self, event_id: int, *, preview: int) -> tuple[dict[str, int], dict[str, list[int]]]:
+        counts = {
+            row["status"]: row["n"]
+            for row in await self.pool.fetch(
+                "SELECT status, COUNT(*) AS n FROM event_signups WHERE event_id = $1 GROUP BY status",
+                event_id,
+            )
+        }
+        previews: dict[str, list[int]] = {}
+        for row in await self.pool.fetch(
+            """
+            SELECT status, user_id FROM (
+                SELECT status, user_id,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY status
+                           ORDER BY COALESCE(position, created_at), user_id
+                       ) AS rn
+                FROM event_signups
+                WHERE event_id = $1
+            ) ranked
+            WHERE rn <= $2
+            ORDER BY status, rn
+            """,
+            event_id,
+            preview,
+        ):
+            previews.setdefault(row["status"], []).append(row["user_id"])
+        return counts, previews
+
+    async def signup_page(
+        self,
+        event_id: int,
+        status: str,
+        *,
+        after: tuple[int, int] | None,
+        limit: int,
+    ) -> list[Row]:
+        after_key, after_user = after or (-1, -1)
+        return await self.pool.fetch(
+            """
+            SELECT user_id, COALESCE(position, created_at) AS sort_key
+            FROM event_signups
+            WHERE event_id = $1 AND status = $2
+              AND (COALESCE(position, created_at), user_id) > ($3, $4)
+            ORDER BY sort_key, user_id
+            LIMIT $5
+            """,
+            event_id,
+            status,
+            after_key,
+            after_user,
+            limit,
+        )
+
+    async def count_available(self, event_id: int) -> int:
+        return await self._count_available(self.pool, event_id)
+
+    @staticmethod
+    async def _count_available(conn, event_id: int) -> int:
+        return await conn.fetchval(
+            "SELECT COUNT(*) FROM event_signups WHERE event_id = $1 AND status = 'available'",
+            event_id,
+        )
+
+    @staticmethod
+    async def _current_signup(conn, event_id: int, user_id: int) -> Row | None:
+        return await conn.fetchrow(
+            "SELECT status, position FROM event_signups WHERE event_id = $1 AND user_id = $2",
+            event_id,
+            user_id,
+        )
+
+    async def _unchanged(self, conn, event_id: int, current: Row) -> dict:
+        return {
+            "status": current["status"],
+            "position": await self._waitlist_rank(conn, event_id, current["position"]),
+            "promoted_user_id": None,
+            "changed": False,
+        }
+
+    async def set_signup(self, event_id: int, user_id: int, status: str, *, now_ts: int) -> dict:
+        async with self.pool.acquire() as conn:
+            current = await self._current_signup(conn, event_id, user_id)
+            if current and signup_unchanged(current["status"], status):
+                return await self._unchanged(conn, event_id, current)
+
+            try:
+                async with conn.transaction():
+                    # Locking the event row serializes signups per event, so the
+                    # slot count can't change between the count and the insert.
+                    max_slots = await conn.fetchval(
+                        "SELECT max_slots FROM events WHERE id = $1 FOR UPDATE",
+                        event_id,
+                    )
+                    if max_slots is None:
+                        return {"status": None, "position": None, "promoted_user_id": None, "changed": False}
+
+                    # Read again under the lock; another click may have landed meanwhile.
+                    current = await self._current_signup(conn, event_id, user_id)
+                    previous = current["status"] if current else None
+                    if current and signup_unchanged(previous, status):
+                        return await self._unchanged(conn, event_id, current)
+
+                    position = None
+                    if status == "available" and await self._count_available(conn, event_id) >= max_slots:
+                        status = "waitlist"
+                        position = await conn.fetchval(
+                            """
+                            SELECT COALESCE(MAX(position), 0) + 1
+                            FROM event_signups
+                            WHERE event_id = $1 AND status = 'waitlist'
+                            """,
+                            event_id,
+                        )
+
+                    await conn.execute(
+                        """
+                        INSERT INTO event_signups (event_id, user_id, status, position, created_at)
+                        VALUES ($1, $2, $3, $4, $5)
+                        ON CONFLICT (event_id, user_id) DO UPDATE SET
+                            status = EXCLUDED.status,
+                            position = EXCLUDED.position,
+                            created_at = EXCLUDED.created_at
+                        """,
+                        event_id,
+                        user_id,
+                        status,
+                        position,
+                        now_ts,
+                    )
+
+                    promoted_user_id = None
+                    if previous == "available" and await self._count_available(conn, event_id) < max_slots:
+                        promoted_user_id = await conn.fetchval(
+                            """
+                            UPDATE event_signups
+                            SET status = 'available', position = NULL, created_at = $2
+                            WHERE (event_id, user_id) = (
+                                SELECT event_id, user_id FROM event_signups
+                                WHERE event_id = $1 AND status = 'waitlist'
+                                ORDER BY position
+                                LIMIT 1
+                            )
+                            RETURNING user_id
+                            """,
+                            event_id,
+                            now_ts,
+                        )
+
+                    rank = await self._waitlist_rank(conn, event_id, position)
+            except Exception as e:
+                if getattr(e, "sqlstate", None) != CHECK_VIOLATION:
+                    raise
+                raise EventFullError(str(e)) from e
+
+        return {"status": status, "position": rank, "promoted_user_id": promoted_user_id, "changed": True}
+
+    @staticmethod
+    async def _waitlist_rank(conn, event_id: int, position: int | None) -> int | None:
+        # Positions only grow, so the place in line is the number of entries up to ours.
+        if position is None:
+            return None
+        return await conn.fetchval(
+            """
+            SELECT COUNT(*) FROM event_signups
+            WHERE event_id = $1 AND status = 'waitlist' AND position <= $2
+            """,
+            event_id,
+            position,
+        )
+
+    # ---- Schedules ----
+
+    async def get_schedule(self, schedule_id: int) -> Row | None:
+        return await self.pool.fetchrow("SELECT * FROM schedules WHERE id = $1", schedule_id)
+
+    @staticmethod
+    async def _insert_schedule(conn, schedule: dict) -> int:
+        schedule_id = await conn.fetchval(
+            """
+            INSERT INTO schedules (
+                guild_id, channel_id, creator_id,
+                title, category,
+                duration,
+                frequency, "interval", day_of_week,
+                time_of_day, start_date, end_date,
+                signup_mode, ping_roles, announcement_message,
+                created_at, next_run_at, catch_up
+            )
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18)
+            RETURNING id
+            """,
+            schedule["guild_id"],
+            schedule["channel_id"],
+            schedule["creator_id"],
+            schedule["title"],
+            schedule["category"],
+            schedule["duration"],
+            schedule["frequency"],
+            schedule["interval"],
+            schedule["day_of_week"],
+            schedule["time_of_day"],
+            schedule["start_date"],
+            schedule["end_date"],
+            schedule["signup_mode"].lower(),
+            int(schedule["ping_roles"]),
+            schedule["announcement_message"],
+            schedule["created_at"],
+            schedule["next_run_at"],
+            schedule.get("catch_up", "skip"),
+        )
+        if schedule.get("allowed_role_ids"):
+            await conn.executemany(
+                """
+                INSERT INTO schedule_allowed_roles (schedule_id, role_id) VALUES ($1, $2)
+                ON CONFLICT DO NOTHING
+                """,
+                [(schedule_id, role_id) for role_id in schedule["allowed_role_ids"]],
+            )
+        return schedule_id
+
+    async def create_schedule(self, **schedule) -> int:
+        return (await self.create_schedules([schedule]))[0]
+
+    async def create_schedules(self, schedules: list[dict]) -> list[int]:
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                return [await self._insert_schedule(conn, schedule) for schedule in schedules]
+
+    async def guild_schedules(self, guild_id: int) -> list[dict]:
+        rows = await self.pool.fetch(
+            """
+            SELECT s.*,
+                   ARRAY(
+                       SELECT r.role_id FROM schedule_allowed_roles r WHERE r.schedule_id = s.id
+                   ) AS allowed_role_ids
+            FROM schedules s
+            WHERE s.guild_id = $1
+            ORDER BY s.id
+            """,
+            guild_id,
+        )
+        return [{**dict(row), "allowed_role_ids": list(row["allowed_role_ids"])} for row in rows]
+
+    async def guild_schedules_page(
+        self,
+        guild_id: int,
+        *,
+        after: tuple[int, int] | None,
+        limit: int,
+    ) -> list[Row]:
+        after_ts, after_id = after or (-1, -1)
+        return await self.pool.fetch(
+            """
+            SELECT id, channel_id, title, category, frequency, "interval", next_run_at, end_date, quarantined_at
+            FROM schedules
+            WHERE guild_id = $1 AND (next_run_at, id) > ($2, $3)
+            ORDER BY next_run_at, id
+            LIMIT $4
+            """,
+            guild_id,
+            after_ts,
+            after_id,
+            limit,
+        )
+
+    async def calendar_schedules(self, guild_id: int) -> list[Row]:
+        return await self.pool.fetch(
+            """
+            SELECT s.id, s.channel_id, s.title, s.category, s.duration, s.frequency, s.interval,
+                   s.next_run_at, s.end_date
+            FROM schedules s
+            WHERE s.guild_id = $1 AND s.quarantined_at IS NULL
+              AND (s.end_date IS NULL OR s.next_run_at <= s.end_date)
+            ORDER BY s.next_run_at, s.id
+            """,
+            guild_id,
+        )
+
+    async def update_schedule(
+        self,
+        schedule_id: int,
+        *,
+        title: str,
+        category: str,
+        frequency: str,
+        interval: int,
+        day_of_week: int | None,
+        time_of_day: int,
+        duration: int | None,
+        start_date: int | None,
+        end_date: int | None,
+        signup_mode: str,
+        ping_roles: bool,
+        announcement_message: str | None,
+        next_run_at: int,
+        catch_up: str,
+        allowed_role_ids: list[int],
+        now_ts: int,
+        event_shift: int = 0,
+    ) -> list[int]:
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    """
+                    UPDATE schedules
+                    SET title = $1,
+                        category = $2,
+                        frequency = $3,
+                        "interval" = $4,
+                        day_of_week = $5,
+                        time_of_day = $6,
+                        duration = $7,
+                        start_date = $8,
+                        end_date = $9,
+                        signup_mode = $10,
+                        ping_roles = $11,
+                        announcement_message = $12,
+                        next_run_at = $13,
+                        catch_up = $15,
+                        failure_count = 0,
+                        retry_at = NULL,
+                        last_error = NULL,
+                        quarantined_at = NULL
+                    WHERE id = $14
+                    """,
+                    title,
+                    category,
+                    frequency,
+                    interval,
+                    day_of_week,
+                    time_of_day,
+                    duration,
+                    start_date,
+                    end_date,
+                    signup_mode,
+                    int(ping_roles),
+                    announcement_message,
+                    next_run_at,
+                    schedule_id,
+                    catch_up,
+                )
+                await conn.execute(
+                    "DELETE FROM schedule_allowed_roles WHERE schedule_id = $1",
+                    schedule_id,
+                )
+                if allowed_role_ids:
+                    await conn.executemany(
+                        """
+                        INSERT INTO schedule_allowed_roles (schedule_id, role_id) VALUES ($1, $2)
+                        ON CONFLICT DO NOTHING
+                        """,
+                        [(schedule_id, role_id) for role_id in allowed_role_ids],
+                    )
+
+                # Upcoming events that were already created follow the edit.
+                rows = await conn.fetch(
+                    """
+                    UPDATE events
+                    SET title = $3,
+                        category = $4,
+                        duration = $5,
+                        signup_mode = $6,
+                        ping_roles = $7,
+                        announcement_message = $8
+                    WHERE schedule_id = $1 AND timestamp > $2
+                    RETURNING id
+                    """,
+                    schedule_id,
+                    now_ts,
+                    title,
+                    category,
+                    duration,
+                    signup_mode.lower(),
+                    int(ping_roles),
+                    announcement_message,
+                )
+                event_ids = [r["id"] for r in rows]
+                if not event_ids:
+                    return []
+
+                await conn.execute(
+                    "DELETE FROM event_allowed_roles WHERE event_id = ANY($1::bigint[])",
+                    event_ids,
+                )
+                await conn.execute(
+                    """
+                    INSERT INTO event_allowed_roles (event_id, role_id)
+                    SELECT e.id, r.role_id
+                    FROM unnest($1::bigint[]) AS e(id)
+                    JOIN schedule_allowed_roles r ON r.schedule_id = $2
+                    """,
+                    event_ids,
+                    schedule_id,
+                )
+
+                # Reminders are offsets from the event and move along by themselves.
+                if event_shift:
+                    # Negated on the way so no row trips the unique index while
+                    # its neighbours haven't moved yet.
+                    await conn.execute(
+                        "UPDATE events SET timestamp = -(timestamp + $2) WHERE id = ANY($1::bigint[])",
+                        event_ids,
+                        event_shift,
+                    )
+                    await conn.execute(
+                        "UPDATE events SET timestamp = -timestamp WHERE id = ANY($1::bigint[])",
+                        event_ids,
+                    )
+
+                return event_ids
+
+    async def delete_schedule(self, schedule_id: int, *, now_ts: int) -> None:
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("DELETE FROM schedules WHERE id = $1", schedule_id)
+                await conn.execute(
+                    "DELETE FROM events WHERE schedule_id = $1 AND timestamp > $2",
+                    schedule_id,
+                    now_ts,
+                )
+
+    async def active_schedules(self, *, now_ts: int) -> list[Row]:
+        return await self.pool.fetch(
+            """
+            SELECT * FROM schedules
+            WHERE (end_date IS NULL OR end_date > $1)
+              AND quarantined_at IS NULL
+              AND (retry_at IS NULL OR retry_at <= $1)
+            """,
+            now_ts,
+        )
+
+    async def mark_schedule_failed(
+        self,
+        schedule_id: int,
+        *,
+        error: str,
+        retry_at: int,
+        quarantined_at: int | None,
+    ) -> None:
+        await self.pool.execute(
+            """
+            UPDATE schedules
+            SET failure_count = failure_count + 1,
+                retry_at = $2,
+                last_error = $3,
+                quarantined_at = $4
+            WHERE id = $1
+            """,
+            schedule_id,
+            retry_at,
+            error,
+            quarantined_at,
+        )
+
+    async def clear_schedule_failures(self, schedule_id: int) -> None:
+        await self.pool.execute(
+            """
+            UPDATE schedules
+            SET failure_count = 0, retry_at = NULL, last_error = NULL
+            WHERE id = $1
+            """,
+            schedule_id,
+        )
+
+    async def set_schedule_next_run(self, schedule_id: int, next_run_at: int) -> None:
+        await self.pool.execute(
+            "UPDATE schedules SET next_run_at = $1 WHERE id = $2",
+            next_run_at,
+            schedule_id,
+        )
+
+    async def schedule_event_exists(self, schedule_id: int, timestamp: int) -> bool:
+        return await self.pool.fetchval(
+            "SELECT EXISTS (SELECT 1 FROM events WHERE schedule_id = $1 AND timestamp = $2)",
+            schedule_id,
+            timestamp,
+        )
+
+    async def latest_schedule_event_ts(self, schedule_id: int, *, before: int) -> int | None:
+        return await self.pool.fetchval(
+            "SELECT MAX(timestamp) FROM events WHERE schedule_id = $1 AND timestamp <= $2",
+            schedule_id,
+            before,
+        )
+
+    async def get_schedule_role_ids(self, schedule_id: int) -> list[int]:
+        rows = await self.pool.fetch(
+            "SELECT role_id FROM schedule_allowed_roles WHERE schedule_id = $1",
+            schedule_id,
+        )
+        return [r["role_id"] for r in rows]
+
+    # ---- Reminders ----
+
+    async def add_reminder(self, event_id: int, user_id: int, offset_seconds: int, *, now_ts: int) -> None:
+        await self.pool.execute(
+            """
+            INSERT INTO event_reminders (event_id, user_id, offset_seconds, created_at)
+            VALUES ($1, $2, $3, $4)
+            ON CONFLICT DO NOTHING
+            """,
+            event_id,
+            user_id,
+            offset_seconds,
+            now_ts,
+        )
+
+    async def apply_reminder_defaults(self, event_id: int, user_id: int, *, event_ts: int, now_ts: int) -> None:
+        await self.pool.execute(
+            """
+            INSERT INTO event_reminders (event_id, user_id, offset_seconds, created_at)
+            SELECT $1, user_id, offset_seconds, $4
+            FROM user_reminder_defaults
+            WHERE user_id = $2 AND $3 - offset_seconds > $4
+            ON CONFLICT DO NOTHING
+            """,
+            event_id,
+            user_id,
+            event_ts,
+            now_ts,
+        )
+
+    async def clear_reminders(self, event_id: int, user_id: int) -> None:
+        await self.pool.execute(
+            "DELETE FROM event_reminders WHERE event_id = $1 AND user_id = $2",
+            event_id,
+            user_id,
+        )
+
+    async def due_reminders(self, *, now_ts: int, max_offset: int) -> list[Row]:
+        return await self.pool.fetch(
+            """
+            SELECT
+                r.id, r.user_id, r.event_id, r.offset_seconds,
+                e.title, e.timestamp, e.message_id,
+                COALESCE(e.reminder_mode, g.reminder_mode, 'dm') AS reminder_mode
+            FROM events e
+            JOIN event_reminders r ON r.event_id = e.id
+            LEFT JOIN guild_settings g ON g.guild_id = e.guild_id
+            WHERE e.closed_at IS NULL AND e.timestamp <= $1 + $2
+              AND e.timestamp - r.offset_seconds <= $1
+            """,
+            now_ts,
+            max_offset,
+        )
+
+    async def delete_reminders(self, reminder_ids: list[int]) -> None:
+        await self.pool.execute("DELETE FROM event_reminders WHERE id = ANY($1::bigint[])", reminder_ids)
+
+    async def set_guild_reminder_mode(self, guild_id: int, mode: str) -> None:
+        await self.pool.execute(
+            """
+            INSERT INTO guild_settings (guild_id, reminder_mode) VALUES ($1, $2)
+            ON CONFLICT (guild_id) DO UPDATE SET reminder_mode = EXCLUDED.reminder_mode
+            """,
+            guild_id,
+            mode,
+        )
+
+    async def set_event_reminder_mode(self, event_id: int, mode: str | None) -> None:
+        await self.pool.execute("UPDATE events SET reminder_mode = $2 WHERE id = $1", event_id, mode)
+
+    async def get_reminder_defaults(self, user_id: int) -> list[int]:
+        rows = await self.pool.fetch(
+            "SELECT offset_seconds FROM user_reminder_defaults WHERE user_id = $1 ORDER BY offset_seconds",
+            user_id,
+        )
+        return [r["offset_seconds"] for r in rows]
+
+    async def set_reminder_defaults(self, user_id: int, offsets: list[int]) -> None:
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("DELETE FROM user_reminder_defaults WHERE user_id = $1", user_id)
+                if offsets:
+                    await conn.executemany(
+                        """
+                        INSERT INTO user_reminder_defaults (user_id, offset_seconds) VALUES ($1, $2)
+                        ON CONFLICT DO NOTHING
+                        """,
+                        [(user_id, offset) for offset in offsets],
+                    )
+
+    # ---- Stats ----
+
+    async def member_attendance(self, guild_id: int, user_id: int, *, since: int) -> list[Row]:
+        return await self.pool.fetch(
+            """
+            SELECT c.category, c.events,
+                   COALESCE(a.available, 0) AS available, COALESCE(a.maybe, 0) AS maybe,
+                   COALESCE(a.unavailable, 0) AS unavailable, COALESCE(a.waitlist, 0) AS waitlist
+            FROM (
+                SELECT category, SUM(events) AS events FROM category_weekly
+                WHERE guild_id = $1 AND week_start >= $3
+                GROUP BY category
+            ) c
+            LEFT JOIN (
+                SELECT category, SUM(available) AS available, SUM(maybe) AS maybe,
+                       SUM(unavailable) AS unavailable, SUM(waitlist) AS waitlist
+                FROM attendance_weekly
+                WHERE guild_id = $1 AND user_id = $2 AND week_start >= $3
+                GROUP BY category
+            ) a ON a.category = c.category
+            ORDER BY c.category
+            """,
+            guild_id,
+            user_id,
+            since,
+        )
+
+    async def attendance_leaderboard(
+        self,
+        guild_id: int,
+        *,
+        since: int,
+        category: str | None,
+        limit: int,
+    ) -> list[Row]:
+        return await self.pool.fetch(
+            """
+            SELECT user_id, SUM(available) AS available, SUM(maybe) AS maybe,
+                   SUM(unavailable) AS unavailable, SUM(waitlist) AS waitlist
+            FROM attendance_weekly
+            WHERE guild_id = $1 AND week_start >= $2 AND ($3::text IS NULL OR category = $3)
+            GROUP BY user_id
+            HAVING SUM(available) > 0
+            ORDER BY available DESC, user_id
+            LIMIT $4
+            """,
+            guild_id,
+            since,
+            category,
+            limit,
+        )
+
+    async def category_stats(self, guild_id: int, *, since: int) -> list[Row]:
+        return await self.pool.fetch(
+            """
+            SELECT category, SUM(events) AS events, SUM(slots) AS slots, SUM(available) AS available
+            FROM category_weekly
+            WHERE guild_id = $1 AND week_start >= $2
+            GROUP BY category
+            ORDER BY events DESC, category
+            """,
+            guild_id,
+            since,
+        )
+
+    # ---- Leases ----
+
+    async def acquire_lease(self, name: str, owner: str, ttl_seconds: int, *, now_ts: int) -> bool:
+        status = await self.pool.execute(
+            """
+            INSERT INTO worker_leases (name, owner, expires_at)
+            VALUES ($1, $2, $3)
+            ON CONFLICT (name) DO UPDATE SET
+                owner = EXCLUDED.owner,
+                expires_at = EXCLUDED.expires_at
+            WHERE worker_leases.owner = EXCLUDED.owner
+               OR worker_leases.expires_at <= $4
+            """,
+            name,
+            owner,
+            now_ts + ttl_seconds,
+            now_ts,
+        )
+        return _affected(status) == 1
+
+    async def release_lease(self, name: str, owner: str) -> None:
+        await self.pool.execute(
+            "DELETE FROM worker_leases WHERE name = $1 AND owner = $2",
+            name,
+            owner,
+        )
@@ -0,0 +1,302 @@
+import gzip
+import json
+import logging
+import sqlite3
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from config import ARCHIVE_AFTER_DAYS, ARCHIVE_FORMAT, ARCHIVE_BATCH_SIZE
+from storage.db import DATA_DIR, get_connection
+
+ARCHIVE_DB_PATH = DATA_DIR / "synar_archive.db"
+ARCHIVE_JSONL_DIR = DATA_DIR / "archive"
+# JSONL batches carry this suffix until their events are deleted from the
+# live database; see _recover_jsonl_archive.
+PENDING_SUFFIX = ".pending"
+
+# Archived tables and the columns that identify a row, so re-archiving a batch
+# after a crash overwrites the SQLite archive instead of duplicating.
+ARCHIVE_TABLES = {
+    "events": ("id",),
+    "event_signups": ("event_id", "user_id"),
+    "event_allowed_roles": ("event_id", "role_id"),
+}
+
+# Pause between batches so interactive writes can grab the lock.
+BATCH_PAUSE_SECONDS = 0.05
+
+log = logging.getLogger("synar.retention")
+
+
+def _fetch_children(conn: sqlite3.Connection, table: str, event_ids: list[int]) -> list[sqlite3.Row]:
+    placeholders = ", ".join("?" for _ in event_ids)
+    return conn.execute(
+        f"SELECT * FROM {table} WHERE event_id IN ({placeholders})",
+        event_ids,
+    ).fetchall()
+
+
+def _sync_archive_table(archive: sqlite3.Connection, conn: sqlite3.Connection, table: str) -> list[str]:
+    columns = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    names = [c["name"] for c in columns]
+
+    column_defs = ", ".join(f"{c['name']} {c['type']}" for c in columns)
+    key = ", ".join(ARCHIVE_TABLES[table])
+    archive.execute(f"CREATE TABLE IF NOT EXISTS {table} ({column_defs}, PRIMARY KEY ({key}))")
+
+    # Live tables keep growing columns through migrations; follow them.
+    existing = {c[1] for c in archive.execute(f"PRAGMA table_info({table})")}
+    for c in columns:
+        if c["name"] not in existing:
+            archive.execute(f"ALTER TABLE {table} ADD COLUMN {c['name']} {c['type']}")
+
+    return names
+
+
+def _write_sqlite_archive(
+    archive: sqlite3.Connection,
+    columns: dict[str, list[str]],
+    rows: dict[str, list[sqlite3.Row]],
+) -> None:
+    for table, table_rows in rows.items():
+        if not table_rows:
+            continue
+        names = columns[table]
+        placeholders = ", ".join("?" for _ in names)
+        archive.executemany(
+            f"INSERT OR REPLACE INTO {table} ({', '.join(names)}) VALUES ({placeholders})",
+            [tuple(r[name] for name in names) for r in table_rows],
+        )
+    archive.commit()
+
+
+def _write_jsonl_archive(rows: dict[str, list[sqlite3.Row]]) -> list[Path]:
+    ARCHIVE_JSONL_DIR.mkdir(parents=True, exist_ok=True)
+
+    children: dict[str, dict[int, list[dict]]] = {}
+    for table in ("event_signups", "event_allowed_roles"):
+        by_event: dict[int, list[dict]] = defaultdict(list)
+        for r in rows[table]:
+            by_event[r["event_id"]].append(dict(r))
+        children[table] = by_event
+
+    # One file per batch and month of the event date, named after its lowest
+    # event ID. Events are archived once, so the names never collide.
+    records_by_month: dict[str, list[tuple[int, str]]] = defaultdict(list)
+    for event in rows["events"]:
+        month = datetime.fromtimestamp(event["timestamp"], tz=timezone.utc).strftime("%Y-%m")
+        record = {
+            "event": dict(event),
+            "signups": children["event_signups"].get(event["id"], []),
+            "allowed_roles": [r["role_id"] for r in children["event_allowed_roles"].get(event["id"], [])],
+        }
+        records_by_month[month].append((event["id"], json.dumps(record, separators=(",", ":"))))
+
+    pending = []
+    for month, records in records_by_month.items():
+        first_id = min(event_id for event_id, _ in records)
+        path = ARCHIVE_JSONL_DIR / f"events-{month}-{first_id}.jsonl.gz{PENDING_SUFFIX}"
+        with gzip.open(path, "wt", encoding="utf-8") as fp:
+            fp.write("\n".join(line for _, line in records) + "\n")
+        pending.append(path)
+    return pending
+
+
+def _publish_jsonl_archive(pending: list[Path]) -> None:
+    for path in pending:
+        path.replace(path.with_suffix(""))
+
+
+def _recover_jsonl_archive(conn: sqlite3.Connection) -> None:
+    """
+    Settle the pending files of a run that stopped mid-batch. If the batch's
+    events are gone its delete committed, so the file is published; otherwise
+    the events are still live and will be archived again, so it is dropped.
+    """
+
+    for path in sorted(ARCHIVE_JSONL_DIR.glob(f"*{PENDING_SUFFIX}")):
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as fp:
+                event_ids = [json.loads(line)["event"]["id"] for line in fp]
+        except (OSError, EOFError, ValueError, KeyError):
+            # Cut off while being written, which is before its delete.
+            path.unlink()
+            continue
+
+        placeholders = ", ".join("?" for _ in event_ids)
+        still_live = conn.execute(
+            f"SELECT 1 FROM events WHERE id IN ({placeholders}) LIMIT 1",
+            event_ids,
+        ).fetchone()
+        if still_live:
+            path.unlink()
+        else:
+            log.info("Publishing archive batch %s left by an interrupted run", path.name)
+            _publish_jsonl_archive([path])
+
+
+def _guild_stats(rows: dict[str, list[sqlite3.Row]]) -> dict[int, dict[str, int]]:
+    guild_of_event = {e["id"]: e["guild_id"] for e in rows["events"]}
+    stats: dict[int, dict[str, int]] = {}
+
+    for e in rows["events"]:
+        s = stats.setdefault(e["guild_id"], {
+            "events": 0,
+            "available": 0,
+            "maybe": 0,
+            "unavailable": 0,
+            "first_event_at": e["timestamp"],
+            "last_event_at": e["timestamp"],
+        })
+        s["events"] += 1
+        s["first_event_at"] = min(s["first_event_at"], e["timestamp"])
+        s["last_event_at"] = max(s["last_event_at"], e["timestamp"])
+
+    for r in rows["event_signups"]:
+        s = stats[guild_of_event[r["event_id"]]]
+        if r["status"] in ("available", "maybe", "unavailable"):
+            s[r["status"]] += 1
+
+    return stats
+
+
+def _delete_batch(conn: sqlite3.Connection, event_ids: list[int], stats: dict[int, dict[str, int]]) -> None:
+    placeholders = ", ".join("?" for _ in event_ids)
+    now_ts = int(time.time())
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Signups, allowed roles and reminders follow through ON DELETE CASCADE.
+        conn.execute(f"DELETE FROM events WHERE id IN ({placeholders})", event_ids)
+
+        conn.executemany(
+            """
+            INSERT INTO guild_archive_stats (
+                guild_id, events,
+                signups_available, signups_maybe, signups_unavailable,
+                first_event_at, last_event_at, updated_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(guild_id) DO UPDATE SET
+                events = events + excluded.events,
+                signups_available = signups_available + excluded.signups_available,
+                signups_maybe = signups_maybe + excluded.signups_maybe,
+                signups_unavailable = signups_unavailable + excluded.signups_unavailable,
+                first_event_at = MIN(COALESCE(first_event_at, excluded.first_event_at), excluded.first_event_at),
+                last_event_at = MAX(COALESCE(last_event_at, excluded.last_event_at), excluded.last_event_at),
+                updated_at = excluded.updated_at
+            """,
+            [
+                (
+                    guild_id,
+                    s["events"],
+                    s["available"],
+                    s["maybe"],
+                    s["unavailable"],
+                    s["first_event_at"],
+                    s["last_event_at"],
+                    now_ts,
+                )
+                for guild_id, s in stats.items()
+            ],
+        )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def delete_stale_reminders(conn: sqlite3.Connection, now_ts: int) -> int:
+    cursor = conn.execute(
+        """
+        DELETE FROM event_reminders
+        WHERE event_id IN (SELECT id FROM events WHERE timestamp <= ?)
+        """,
+        (now_ts,),
+    )
+    conn.commit()
+    return cursor.rowcount
+
+
+def archive_past_events(
+    *,
+    older_than_days: int = ARCHIVE_AFTER_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    archive_format: str = ARCHIVE_FORMAT,
+) -> dict[str, int]:
+    """
+    Move events that started more than `older_than_days` ago, together with
+    their signups and allowed roles, out of the live database.
+
+    Rows are copied to the archive first and deleted afterwards in one short
+    write transaction per batch, so the bot never waits long for the lock.
+    A run interrupted between the two archives each event exactly once when
+    it is started again.
+    """
+
+    now_ts = int(time.time())
+    cutoff = now_ts - older_than_days * 86400
+    summary = {"events": 0, "signups": 0, "batches": 0, "stale_reminders": 0}
+
+    conn = get_connection()
+    archive = None
+    try:
+        summary["stale_reminders"] = delete_stale_reminders(conn, now_ts)
+
+        columns: dict[str, list[str]] = {}
+        if archive_format == "sqlite":
+            archive = sqlite3.connect(ARCHIVE_DB_PATH)
+            archive.execute("PRAGMA journal_mode = WAL;")
+            for table in ARCHIVE_TABLES:
+                columns[table] = _sync_archive_table(archive, conn, table)
+            archive.commit()
+        elif ARCHIVE_JSONL_DIR.exists():
+            _recover_jsonl_archive(conn)
+            conn.commit()
+
+        while True:
+            events = conn.execute(
+                "SELECT * FROM events WHERE timestamp < ? ORDER BY timestamp LIMIT ?",
+                (cutoff, batch_size),
+            ).fetchall()
+            if not events:
+                break
+
+            event_ids = [e["id"] for e in events]
+            rows = {
+                "events": events,
+                "event_signups": _fetch_children(conn, "event_signups", event_ids),
+                "event_allowed_roles": _fetch_children(conn, "event_allowed_roles", event_ids),
+            }
+            # End the implicit read transaction before writing elsewhere.
+            conn.commit()
+
+            pending = []
+            if archive is not None:
+                _write_sqlite_archive(archive, columns, rows)
+            else:
+                pending = _write_jsonl_archive(rows)
+
+            _delete_batch(conn, event_ids, _guild_stats(rows))
+            _publish_jsonl_archive(pending)
+
+            summary["events"] += len(events)
+            summary["signups"] += len(rows["event_signups"])
+            summary["batches"] += 1
+
+            if len(events) < batch_size:
+                break
+            time.sleep(BATCH_PAUSE_SECONDS)
+    finally:
+        if archive is not None:
+            archive.close()
+        conn.close()
+
+    if summary["events"]:
+        log.info(
+            "Archived %d events with %d signups in %d batches (%s)",
+            summary["events"], summary["signups"], summary["batches"], archive_format,
+        )
+    return summary
@@ -0,0 +1,955 @@
+import sqlite3
+from collections.abc import AsyncIterator
+
+from storage.base import EventFullError, Row, Storage, signup_unchanged
+from storage.db import get_connection, init_db
+
+# Monday 00:00 UTC of an event's week; see migrations/0000_0029.
+WEEK_START_SQL = "e.timestamp - (e.timestamp - 345600) % 604800"
+
+
+class SQLiteStorage(Storage):
+    """
+    SQLite implementation. Queries run synchronously on one long-lived
+    connection; none of them await, so each method is atomic with respect to
+    the event loop and commits before returning.
+    """
+
+    name = "sqlite"
+    errors = (sqlite3.Error,)
+
+    def __init__(self) -> None:
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = get_connection()
+        return self._conn
+
+    async def connect(self) -> None:
+        init_db()
+        self._conn = get_connection()
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # ---- Events ----
+
+    async def get_event(self, event_id: int) -> Row | None:
+        return self.conn.execute(
+            "SELECT * FROM events WHERE id = ?",
+            (event_id,),
+        ).fetchone()
+
+    def _insert_event(self, event: dict) -> int:
+        cursor = self.conn.execute(
+            """
+            INSERT INTO events (
+                schedule_id,
+                guild_id, channel_id, creator_id,
+                title, category, duration, signup_mode, max_slots,
+                timestamp, ping_roles, announcement_message, created_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                event.get("schedule_id"),
+                event["guild_id"],
+                event["channel_id"],
+                event["creator_id"],
+                event["title"],
+                event["category"],
+                event["duration"],
+                event["signup_mode"].lower(),
+                event["max_slots"],
+                event["timestamp"],
+                int(event["ping_roles"]),
+                event["announcement_message"],
+                event["created_at"],
+            ),
+        )
+        event_id = cursor.lastrowid
+
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO event_allowed_roles (event_id, role_id) VALUES (?, ?)",
+            [(event_id, role_id) for role_id in event.get("allowed_role_ids") or []],
+        )
+        return event_id
+
+    async def create_event(self, **event) -> int:
+        with self.conn:
+            return self._insert_event(event)
+
+    async def create_events(self, events: list[dict]) -> list[int]:
+        with self.conn:
+            return [self._insert_event(event) for event in events]
+
+    async def delete_event(self, event_id: int) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM events WHERE id = ?", (event_id,))
+
+    async def set_event_message(self, event_id: int, message_id: int | None) -> None:
+        with self.conn:
+            self.conn.execute("UPDATE events SET message_id = ? WHERE id = ?", (message_id, event_id))
+
+    async def get_allowed_role_ids(self, event_id: int) -> list[int]:
+        rows = self.conn.execute(
+            "SELECT role_id FROM event_allowed_roles WHERE event_id = ?",
+            (event_id,),
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    async def max_event_id(self) -> int:
+        return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+
+    async def iter_open_event_ids(
+        self,
+        *,
+        max_id: int,
+        batch_size: int,
+    ) -> AsyncIterator[list[int]]:
+        after = (0, 0)
+        while True:
+            rows = self.conn.execute(
+                """
+                SELECT id, timestamp FROM events
+                WHERE closed_at IS NULL AND (timestamp, id) > (?, ?) AND id <= ?
+                ORDER BY timestamp, id
+                LIMIT ?
+                """,
+                (*after, max_id, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            yield [r["id"] for r in rows]
+            after = (rows[-1]["timestamp"], rows[-1]["id"])
+
+    async def event_ids_after(self, event_id: int) -> list[int]:
+        rows = self.conn.execute(
+            """
+            SELECT id FROM events
+            WHERE id > ? AND closed_at IS NULL
+            ORDER BY id
+            """,
+            (event_id,),
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    async def close_due_events(
+        self,
+        *,
+        now_ts: int,
+        at_end: bool,
+        limit: int,
+    ) -> list[int]:
+        with self.conn:
+            # Walks idx_events_open up to now; the end check only filters.
+            event_ids = [
+                row[0]
+                for row in self.conn.execute(
+                    """
+                    SELECT id FROM events
+                    WHERE closed_at IS NULL AND timestamp <= ?
+                      AND (? = 0 OR timestamp + COALESCE(duration, 0) * 3600 <= ?)
+                    ORDER BY timestamp, id
+                    LIMIT ?
+                    """,
+                    (now_ts, int(at_end), now_ts, limit),
+                )
+            ]
+            if not event_ids:
+                return []
+
+            placeholders = ", ".join("?" for _ in event_ids)
+            self.conn.execute(
+                f"UPDATE events SET closed_at = ? WHERE id IN ({placeholders})",
+                (now_ts, *event_ids),
+            )
+            self.conn.execute(
+                f"DELETE FROM event_reminders WHERE event_id IN ({placeholders})",
+                event_ids,
+            )
+            # Signups can't change once closed, so this is their final tally.
+            self.conn.execute(
+                f"""
+                INSERT INTO attendance_weekly
+                    (guild_id, week_start, category, user_id, available, maybe, unavailable, waitlist)
+                SELECT e.guild_id, {WEEK_START_SQL}, e.category, s.user_id,
+                       SUM(s.status = 'available'), SUM(s.status = 'maybe'),
+                       SUM(s.status = 'unavailable'), SUM(s.status = 'waitlist')
+                FROM events e
+                JOIN event_signups s ON s.event_id = e.id
+                WHERE e.id IN ({placeholders})
+                GROUP BY 1, 2, 3, 4
+                ON CONFLICT (guild_id, week_start, category, user_id) DO UPDATE SET
+                    available = available + excluded.available,
+                    maybe = maybe + excluded.maybe,
+                    unavailable = unavailable + excluded.unavailable,
+                    waitlist = waitlist + excluded.waitlist
+                """,
+                event_ids,
+            )
+            self.conn.execute(
+                f"""
+                INSERT INTO category_weekly (guild_id, week_start, category, events, slots, available)
+                SELECT e.guild_id, {WEEK_START_SQL}, e.category, COUNT(*), SUM(e.max_slots),
+                       SUM((SELECT COUNT(*) FROM event_signups s WHERE s.event_id = e.id AND s.status = 'available'))
+                FROM events e
+                WHERE e.id IN ({placeholders})
+                GROUP BY 1, 2, 3
+                ON CONFLICT (guild_id, week_start, category) DO UPDATE SET
+                    events = events + excluded.events,
+                    slots = slots + excluded.slots,
+                    available = available + excluded.available
+                """,
+                event_ids,
+            )
+        return event_ids
+
+    async def closed_event_ids(self, *, since: int) -> list[int]:
+        rows = self.conn.execute(
+            "SELECT id FROM events WHERE closed_at >= ?",
+            (since,),
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    async def guild_events_page(
+        self,
+        guild_id: int,
+        *,
+        now_ts: int,
+        after: tuple[int, int] | None,
+        limit: int,
+    ) -> list[Row]:
+        after_ts, after_id = after or (now_ts, -1)
+        return self.conn.execute(
+            """
+            SELECT id, schedule_id, channel_id, message_id, title, category, timestamp, closed_at
+            FROM events
+            WHERE guild_id = ? AND (timestamp, id) > (?, ?)
+            ORDER BY timestamp, id
+            LIMIT ?
+            """,
+            (guild_id, after_ts, after_id, limit),
+        ).fetchall()
+
+    async def iter_guild_calendar_events(
+        self,
+        guild_id: int,
+        *,
+        now_ts: int,
+        batch_size: int,
+    ) -> AsyncIterator[list[Row]]:
+        after = (now_ts, -1)
+        while True:
+            # Events at or after their schedule's next run are part of its RRULE.
+            rows = self.conn.execute(
+                """
+                SELECT e.id, e.schedule_id, e.channel_id, e.message_id, e.title, e.category, e.timestamp, e.duration
+                FROM events e
+                WHERE e.guild_id = ? AND (e.timestamp, e.id) > (?, ?)
+                  AND NOT EXISTS (
+                      SELECT 1 FROM schedules s
+                      WHERE s.id = e.schedule_id AND e.timestamp >= s.next_run_at
+                        AND s.quarantined_at IS NULL
+                        AND (s.end_date IS NULL OR s.next_run_at <= s.end_date)
+                  )
+                ORDER BY e.timestamp, e.id
+                LIMIT ?
+                """,
+                (guild_id, *after, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            yield rows
+            after = (rows[-1]["timestamp"], rows[-1]["id"])
+
+    async def iter_user_calendar_events(
+        self,
+        guild_id: int,
+        user_id: int,
+        *,
+        now_ts: int,
+        batch_size: int,
+    ) -> AsyncIterator[list[Row]]:
+        after = (now_ts, -1)
+        while True:
+            rows = self.conn.execute(
+                """
+                SELECT e.id, e.schedule_id, e.channel_id, e.message_id, e.title, e.category, e.timestamp, e.duration
+                FROM event_signups su
+                JOIN events e ON e.id = su.event_id
+                WHERE su.user_id = ? AND su.status != 'unavailable'
+                  AND e.guild_id = ? AND (e.timestamp, e.id) > (?, ?)
+                ORDER BY e.timestamp, e.id
+                LIMIT ?
+                """,
+                (user_id, guild_id, *after, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            yield rows
+            after = (rows[-1]["timestamp"], rows[-1]["id"])
+
+    # ---- Signups ----
+
+    async def signup_overview(self, event_id: int, *, preview: int) -> tuple[dict[str, int], dict[str, list[int]]]:
+        counts = {
+            row["status"]: row["n"]
+            for row in self.conn.execute(
+                "SELECT status, COUNT(*) AS n FROM event_signups WHERE event_id = ? GROUP BY status",
+                (event_id,),
+            )
+        }
+        previews: dict[str, list[int]] = {}
+        for row in self.conn.execute(
+            """
+            SELECT status, user_id FROM (
+                SELECT status, user_id,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY status
+                           ORDER BY COALESCE(position, created_at), user_id
+                       ) AS rn
+                FROM event_signups
+                WHERE event_id = ?
+            )
+            WHERE rn <= ?
+            ORDER BY status, rn
+            """,
+            (event_id, preview),
+        ):
+            previews.setdefault(row["status"], []).append(row["user_id"])
+        return counts, previews
+
+    async def signup_page(
+        self,
+        event_id: int,
+        status: str,
+        *,
+        after: tuple[int, int] | None,
+        limit: int,
+    ) -> list[Row]:
+        # Waitlist rows sort by position, everything else by sign-up time;
+        # a status never mixes the two.
+        after_key, after_user = after or (-1, -1)
+        return self.conn.execute(
+            """
+            SELECT user_id, COALESCE(position, created_at) AS sort_key
+            FROM event_signups
+            WHERE event_id = ? AND status = ?
+              AND (COALESCE(position, created_at), user_id) > (?, ?)
+            ORDER BY sort_key, user_id
+            LIMIT ?
+            """,
+            (event_id, status, after_key, after_user, limit),
+        ).fetchall()
+
+    async def count_available(self, event_id: int) -> int:
+        return self._count_available(event_id)
+
+    def _current_signup(self, event_id: int, user_id: int) -> Row | None:
+        return self.conn.execute(
+            "SELECT status, position FROM event_signups WHERE event_id = ? AND user_id = ?",
+            (event_id, user_id),
+        ).fetchone()
+
+    def _unchanged(self, event_id: int, current: Row) -> dict:
+        return {
+            "status": current["status"],
+            "position": self._waitlist_rank(event_id, current["position"]),
+            "promoted_user_id": None,
+            "changed": False,
+        }
+
+    async def set_signup(self, event_id: int, user_id: int, status: str, *, now_ts: int) -> dict:
+        conn = self.conn
+
+        current = self._current_signup(event_id, user_id)
+        if current and signup_unchanged(current["status"], status):
+            return self._unchanged(event_id, current)
+
+        # Take the write lock before counting slots, so another process can't
+        # fill the last slot between the count and the insert.
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            with conn:
+                event = conn.execute("SELECT max_slots FROM events WHERE id = ?", (event_id,)).fetchone()
+                if event is None:
+                    return {"status": None, "position": None, "promoted_user_id": None, "changed": False}
+
+                # Read again under the lock; another click may have landed meanwhile.
+                current = self._current_signup(event_id, user_id)
+                previous = current["status"] if current else None
+                if current and signup_unchanged(previous, status):
+                    return self._unchanged(event_id, current)
+
+                position = None
+                if status == "available" and self._count_available(event_id) >= event["max_slots"]:
+                    status = "waitlist"
+                    position = conn.execute(
+                        """
+                        SELECT COALESCE(MAX(position), 0) + 1
+                        FROM event_signups
+                        WHERE event_id = ? AND status = 'waitlist'
+                        """,
+                        (event_id,),
+                    ).fetchone()[0]
+
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO event_signups (event_id, user_id, status, position, created_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (event_id, user_id, status, position, now_ts),
+                )
+
+                promoted_user_id = None
+                if previous == "available":
+                    promoted_user_id = self._promote_waitlisted(event_id, event["max_slots"], now_ts)
+        except sqlite3.IntegrityError as e:
+            if "event is full" not in str(e):
+                raise
+            raise EventFullError(str(e)) from e
+
+        return {
+            "status": status,
+            "position": self._waitlist_rank(event_id, position),
+            "promoted_user_id": promoted_user_id,
+            "changed": True,
+        }
+
+    def _waitlist_rank(self, event_id: int, position: int | None) -> int | None:
+        # Positions only grow, so the place in line is the number of entries up to ours.
+        if position is None:
+            return None
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM event_signups WHERE event_id = ? AND status = 'waitlist' AND position <= ?",
+            (event_id, position),
+        ).fetchone()[0]
+
+    def _count_available(self, event_id: int) -> int:
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM event_signups WHERE event_id = ? AND status = 'available'",
+            (event_id,),
+        ).fetchone()[0]
+
+    def _promote_waitlisted(self, event_id: int, max_slots: int, now_ts: int) -> int | None:
+        if self._count_available(event_id) >= max_slots:
+            return None
+        row = self.conn.execute(
+            """
+            SELECT user_id FROM event_signups
+            WHERE event_id = ? AND status = 'waitlist'
+            ORDER BY position
+            LIMIT 1
+            """,
+            (event_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        self.conn.execute(
+            """
+            UPDATE event_signups
+            SET status = 'available', position = NULL, created_at = ?
+            WHERE event_id = ? AND user_id = ?
+            """,
+            (now_ts, event_id, row["user_id"]),
+        )
+        return row["user_id"]
+
+    # ---- Schedules ----
+
+    async def get_schedule(self, schedule_id: int) -> Row | None:
+        return self.conn.execute(
+            "SELECT * FROM schedules WHERE id = ?",
+            (schedule_id,),
+        ).fetchone()
+
+    def _insert_schedule(self, schedule: dict) -> int:
+        cursor = self.conn.execute(
+            """
+            INSERT INTO schedules (
+                guild_id, channel_id, creator_id,
+                title, category,
+                duration,
+                frequency, interval, day_of_week,
+                time_of_day, start_date, end_date,
+                signup_mode, ping_roles, announcement_message,
+                created_at, next_run_at, catch_up
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                schedule["guild_id"],
+                schedule["channel_id"],
+                schedule["creator_id"],
+                schedule["title"],
+                schedule["category"],
+                schedule["duration"],
+                schedule["frequency"],
+                schedule["interval"],
+                schedule["day_of_week"],
+                schedule["time_of_day"],
+                schedule["start_date"],
+                schedule["end_date"],
+                schedule["signup_mode"].lower(),
+                int(schedule["ping_roles"]),
+                schedule["announcement_message"],
+                schedule["created_at"],
+                schedule["next_run_at"],
+                schedule.get("catch_up", "skip"),
+            ),
+        )
+        schedule_id = cursor.lastrowid
+
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO schedule_allowed_roles (schedule_id, role_id) VALUES (?, ?)",
+            [(schedule_id, role_id) for role_id in schedule.get("allowed_role_ids") or []],
+        )
+        return schedule_id
+
+    async def create_schedule(self, **schedule) -> int:
+        with self.conn:
+            return self._insert_schedule(schedule)
+
+    async def create_schedules(self, schedules: list[dict]) -> list[int]:
+        with self.conn:
+            return [self._insert_schedule(schedule) for schedule in schedules]
+
+    async def guild_schedules(self, guild_id: int) -> list[dict]:
+        rows = self.conn.execute(
+            "SELECT * FROM schedules WHERE guild_id = ? ORDER BY id",
+            (guild_id,),
+        ).fetchall()
+        roles: dict[int, list[int]] = {}
+        for schedule_id, role_id in self.conn.execute(
+            """
+            SELECT r.schedule_id, r.role_id
+            FROM schedule_allowed_roles r
+            JOIN schedules s ON s.id = r.schedule_id
+            WHERE s.guild_id = ?
+            """,
+            (guild_id,),
+        ):
+            roles.setdefault(schedule_id, []).append(role_id)
+        return [{**dict(row), "allowed_role_ids": roles.get(row["id"], [])} for row in rows]
+
+    async def guild_schedules_page(
+        self,
+        guild_id: int,
+        *,
+        after: tuple[int, int] | None,
+        limit: int,
+    ) -> list[Row]:
+        after_ts, after_id = after or (-1, -1)
+        return self.conn.execute(
+            """
+            SELECT id, channel_id, title, category, frequency, interval, next_run_at, end_date, quarantined_at
+            FROM schedules
+            WHERE guild_id = ? AND (next_run_at, id) > (?, ?)
+            ORDER BY next_run_at, id
+            LIMIT ?
+            """,
+            (guild_id, after_ts, after_id, limit),
+        ).fetchall()
+
+    async def calendar_schedules(self, guild_id: int) -> list[Row]:
+        return self.conn.execute(
+            """
+            SELECT s.id, s.channel_id, s.title, s.category, s.duration, s.frequency, s.interval,
+                   s.next_run_at, s.end_date
+            FROM schedules s
+            WHERE s.guild_id = ? AND s.quarantined_at IS NULL
+              AND (s.end_date IS NULL OR s.next_run_at <= s.end_date)
+            ORDER BY s.next_run_at, s.id
+            """,
+            (guild_id,),
+        ).fetchall()
+
+    async def update_schedule(
+        self,
+        schedule_id: int,
+        *,
+        title: str,
+        category: str,
+        frequency: str,
+        interval: int,
+        day_of_week: int | None,
+        time_of_day: int,
+        duration: int | None,
+        start_date: int | None,
+        end_date: int | None,
+        signup_mode: str,
+        ping_roles: bool,
+        announcement_message: str | None,
+        next_run_at: int,
+        catch_up: str,
+        allowed_role_ids: list[int],
+        now_ts: int,
+        event_shift: int = 0,
+    ) -> list[int]:
+        with self.conn:
+            self.conn.execute(
+                """
+                UPDATE schedules
+                SET title = ?,
+                    category = ?,
+                    frequency = ?,
+                    interval = ?,
+                    day_of_week = ?,
+                    time_of_day = ?,
+                    duration = ?,
+                    start_date = ?,
+                    end_date = ?,
+                    signup_mode = ?,
+                    ping_roles = ?,
+                    announcement_message = ?,
+                    next_run_at = ?,
+                    catch_up = ?,
+                    failure_count = 0,
+                    retry_at = NULL,
+                    last_error = NULL,
+                    quarantined_at = NULL
+                WHERE id = ?
+                """,
+                (
+                    title,
+                    category,
+                    frequency,
+                    interval,
+                    day_of_week,
+                    time_of_day,
+                    duration,
+                    start_date,
+                    end_date,
+                    signup_mode,
+                    int(ping_roles),
+                    announcement_message,
+                    next_run_at,
+                    catch_up,
+                    schedule_id,
+                ),
+            )
+
+            self.conn.execute(
+                "DELETE FROM schedule_allowed_roles WHERE schedule_id = ?",
+                (schedule_id,),
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO schedule_allowed_roles (schedule_id, role_id) VALUES (?, ?)",
+                [(schedule_id, role_id) for role_id in allowed_role_ids],
+            )
+
+            # Upcoming events that were already created follow the edit.
+            future = "SELECT id FROM events WHERE schedule_id = ? AND timestamp > ?"
+            event_ids = [row[0] for row in self.conn.execute(future, (schedule_id, now_ts))]
+            if not event_ids:
+                return []
+
+            self.conn.execute(
+                """
+                UPDATE events
+                SET title = ?,
+                    category = ?,
+                    duration = ?,
+                    signup_mode = ?,
+                    ping_roles = ?,
+                    announcement_message = ?
+                WHERE schedule_id = ? AND timestamp > ?
+                """,
+                (
+                    title,
+                    category,
+                    duration,
+                    signup_mode.lower(),
+                    int(ping_roles),
+                    announcement_message,
+                    schedule_id,
+                    now_ts,
+                ),
+            )
+            self.conn.execute(
+                f"DELETE FROM event_allowed_roles WHERE event_id IN ({future})",
+                (schedule_id, now_ts),
+            )
+            self.conn.execute(
+                """
+                INSERT INTO event_allowed_roles (event_id, role_id)
+                SELECT e.id, r.role_id
+                FROM events e
+                JOIN schedule_allowed_roles r ON r.schedule_id = e.schedule_id
+                WHERE e.schedule_id = ? AND e.timestamp > ?
+                """,
+                (schedule_id, now_ts),
+            )
+
+            # Reminders are offsets from the event and move along by themselves.
+            if event_shift:
+                # Negated on the way so no row trips the unique index while
+                # its neighbours haven't moved yet.
+                self.conn.execute(
+                    "UPDATE events SET timestamp = -(timestamp + ?) WHERE schedule_id = ? AND timestamp > ?",
+                    (event_shift, schedule_id, now_ts),
+                )
+                self.conn.execute(
+                    "UPDATE events SET timestamp = -timestamp WHERE schedule_id = ? AND timestamp < 0",
+                    (schedule_id,),
+                )
+
+            return event_ids
+
+    async def delete_schedule(self, schedule_id: int, *, now_ts: int) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM schedule_allowed_roles WHERE schedule_id = ?", (schedule_id,))
+            self.conn.execute("DELETE FROM schedules WHERE id = ?", (schedule_id,))
+
+            # Signups, roles and reminders of these events go with them
+            # through ON DELETE CASCADE.
+            self.conn.execute(
+                "DELETE FROM events WHERE schedule_id = ? AND timestamp > ?",
+                (schedule_id, now_ts),
+            )
+
+    async def active_schedules(self, *, now_ts: int) -> list[Row]:
+        return self.conn.execute(
+            """
+            SELECT * FROM schedules
+            WHERE (end_date IS NULL OR end_date > ?)
+              AND quarantined_at IS NULL
+              AND (retry_at IS NULL OR retry_at <= ?)
+            """,
+            (now_ts, now_ts),
+        ).fetchall()
+
+    async def mark_schedule_failed(
+        self,
+        schedule_id: int,
+        *,
+        error: str,
+        retry_at: int,
+        quarantined_at: int | None,
+    ) -> None:
+        with self.conn:
+            self.conn.execute(
+                """
+                UPDATE schedules
+                SET failure_count = failure_count + 1,
+                    retry_at = ?,
+                    last_error = ?,
+                    quarantined_at = ?
+                WHERE id = ?
+                """,
+                (retry_at, error, quarantined_at, schedule_id),
+            )
+
+    async def clear_schedule_failures(self, schedule_id: int) -> None:
+        with self.conn:
+            self.conn.execute(
+                """
+                UPDATE schedules
+                SET failure_count = 0, retry_at = NULL, last_error = NULL
+                WHERE id = ?
+                """,
+                (schedule_id,),
+            )
+
+    async def set_schedule_next_run(self, schedule_id: int, next_run_at: int) -> None:
+        with self.conn:
+            self.conn.execute(
+                "UPDATE schedules SET next_run_at = ? WHERE id = ?",
+                (next_run_at, schedule_id),
+            )
+
+    async def schedule_event_exists(self, schedule_id: int, timestamp: int) -> bool:
+        row = self.conn.execute(
+            """
+            SELECT 1 FROM events
+            WHERE schedule_id = ? AND timestamp = ?
+            LIMIT 1
+            """,
+            (schedule_id, timestamp),
+        ).fetchone()
+        return row is not None
+
+    async def latest_schedule_event_ts(self, schedule_id: int, *, before: int) -> int | None:
+        return self.conn.execute(
+            "SELECT MAX(timestamp) FROM events WHERE schedule_id = ? AND timestamp <= ?",
+            (schedule_id, before),
+        ).fetchone()[0]
+
+    async def get_schedule_role_ids(self, schedule_id: int) -> list[int]:
+        rows = self.conn.execute(
+            "SELECT role_id FROM schedule_allowed_roles WHERE schedule_id = ?",
+            (schedule_id,),
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    # ---- Reminders ----
+
+    async def add_reminder(self, event_id: int, user_id: int, offset_seconds: int, *, now_ts: int) -> None:
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT OR IGNORE INTO event_reminders (event_id, user_id, offset_seconds, created_at)
+                VALUES (?, ?, ?, ?)
+                """,
+                (event_id, user_id, offset_seconds, now_ts),
+            )
+
+    async def apply_reminder_defaults(self, event_id: int, user_id: int, *, event_ts: int, now_ts: int) -> None:
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT OR IGNORE INTO event_reminders (event_id, user_id, offset_seconds, created_at)
+                SELECT ?, user_id, offset_seconds, ?
+                FROM user_reminder_defaults
+                WHERE user_id = ? AND ? - offset_seconds > ?
+                """,
+                (event_id, now_ts, user_id, event_ts, now_ts),
+            )
+
+    async def clear_reminders(self, event_id: int, user_id: int) -> None:
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM event_reminders WHERE event_id = ? AND user_id = ?",
+                (event_id, user_id),
+            )
+
+    async def due_reminders(self, *, now_ts: int, max_offset: int) -> list[Row]:
+        return self.conn.execute(
+            """
+            SELECT
+                r.id, r.user_id, r.event_id, r.offset_seconds,
+                e.title, e.timestamp, e.message_id,
+                COALESCE(e.reminder_mode, g.reminder_mode, 'dm') AS reminder_mode
+            FROM events e
+            JOIN event_reminders r ON r.event_id = e.id
+            LEFT JOIN guild_settings g ON g.guild_id = e.guild_id
+            WHERE e.closed_at IS NULL AND e.timestamp <= ?
+              AND e.timestamp - r.offset_seconds <= ?
+            """,
+            (now_ts + max_offset, now_ts),
+        ).fetchall()
+
+    async def delete_reminders(self, reminder_ids: list[int]) -> None:
+        with self.conn:
+            self.conn.executemany(
+                "DELETE FROM event_reminders WHERE id = ?",
+                [(reminder_id,) for reminder_id in reminder_ids],
+            )
+
+    async def set_guild_reminder_mode(self, guild_id: int, mode: str) -> None:
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO guild_settings (guild_id, reminder_mode) VALUES (?, ?)
+                ON CONFLICT (guild_id) DO UPDATE SET reminder_mode = excluded.reminder_mode
+                """,
+                (guild_id, mode),
+            )
+
+    async def set_event_reminder_mode(self, event_id: int, mode: str | None) -> None:
+        with self.conn:
+            self.conn.execute("UPDATE events SET reminder_mode = ? WHERE id = ?", (mode, event_id))
+
+    async def get_reminder_defaults(self, user_id: int) -> list[int]:
+        rows = self.conn.execute(
+            "SELECT offset_seconds FROM user_reminder_defaults WHERE user_id = ? ORDER BY offset_seconds",
+            (user_id,),
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    async def set_reminder_defaults(self, user_id: int, offsets: list[int]) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM user_reminder_defaults WHERE user_id = ?", (user_id,))
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO user_reminder_defaults (user_id, offset_seconds) VALUES (?, ?)",
+                [(user_id, offset) for offset in offsets],
+            )
+
+    # ---- Stats ----
+
+    async def member_attendance(self, guild_id: int, user_id: int, *, since: int) -> list[Row]:
+        return self.conn.execute(
+            """
+            SELECT c.category, c.events,
+                   COALESCE(a.available, 0) AS available, COALESCE(a.maybe, 0) AS maybe,
+                   COALESCE(a.unavailable, 0) AS unavailable, COALESCE(a.waitlist, 0) AS waitlist
+            FROM (
+                SELECT category, SUM(events) AS events FROM category_weekly
+                WHERE guild_id = ? AND week_start >= ?
+                GROUP BY category
+            ) c
+            LEFT JOIN (
+                SELECT category, SUM(available) AS available, SUM(maybe) AS maybe,
+                       SUM(unavailable) AS unavailable, SUM(waitlist) AS waitlist
+                FROM attendance_weekly
+                WHERE guild_id = ? AND user_id = ? AND week_start >= ?
+                GROUP BY category
+            ) a ON a.category = c.category
+            ORDER BY c.category
+            """,
+            (guild_id, since, guild_id, user_id, since),
+        ).fetchall()
+
+    async def attendance_leaderboard(
+        self,
+        guild_id: int,
+        *,
+        since: int,
+        category: str | None,
+        limit: int,
+    ) -> list[Row]:
+        return self.conn.execute(
+            """
+            SELECT user_id, SUM(available) AS available, SUM(maybe) AS maybe,
+                   SUM(unavailable) AS unavailable, SUM(waitlist) AS waitlist
+            FROM attendance_weekly
+            WHERE guild_id = ? AND week_start >= ? AND (? IS NULL OR category = ?)
+            GROUP BY user_id
+            HAVING SUM(available) > 0
+            ORDER BY available DESC, user_id
+            LIMIT ?
+            """,
+            (guild_id, since, category, category, limit),
+        ).fetchall()
+
+    async def category_stats(self, guild_id: int, *, since: int) -> list[Row]:
+        return self.conn.execute(
+            """
+            SELECT category, SUM(events) AS events, SUM(slots) AS slots, SUM(available) AS available
+            FROM category_weekly
+            WHERE guild_id = ? AND week_start >= ?
+            GROUP BY category
+            ORDER BY events DESC, category
+            """,
+            (guild_id, since),
+        ).fetchall()
+
+    # ---- Leases ----
+
+    async def acquire_lease(self, name: str, owner: str, ttl_seconds: int, *, now_ts: int) -> bool:
+        with self.conn:
+            cursor = self.conn.execute(
+                """
+                INSERT INTO worker_leases (name, owner, expires_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    owner = excluded.owner,
+                    expires_at = excluded.expires_at
+                WHERE worker_leases.owner = excluded.owner
+                   OR worker_leases.expires_at <= ?
+                """,
+                (name, owner, now_ts + ttl_seconds, now_ts),
+            )
+        return cursor.rowcount == 1
+
+    async def release_lease(self, name: str, owner: str) -> None:
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM worker_leases WHERE name = ? AND owner = ?",
+                (name, owner),
+            )
@@ -1,17 +1,38 @@
+import asyncio
 from datetime import datetime, timezone
 import discord
 
-from storage.db import get_connection
+from config import (
+    SIGNUP_USER_BURST,
+    SIGNUP_USER_PER_MINUTE,
+    SIGNUP_EVENT_BURST,
+    SIGNUP_EVENT_PER_MINUTE,
+)
+from storage.backend import storage
+from storage.base import EventFullError
+from ratelimit import RateLimiter
+from cache import ExpiringCache
 from helpers import (
     parse_unix_timestamp,
     default_max_slots,
     user_has_allowed_role,
-    get_allowed_role_ids,
     insert_schedule,
     build_event_announcement_content,
+    schedule_updated_text,
+    schedule_step_seconds,
+    REMINDER_OFFSETS,
 )
 
-from embeds import build_signup_embed
+from embeds import (
+    build_signup_embed,
+    build_roster_embed,
+    build_events_list_embed,
+    build_schedules_list_embed,
+    remember_member,
+    ROSTER_LABELS,
+)
+from refresher import queue_refreshes
+from responder import Responder
 
 
 
@@ -39,16 +60,44 @@ WEEKDAY_OPTIONS = [
     discord.SelectOption(label="Sunday", value="6"),
 ]
 
+# Spam clicks are turned away before any database or embed work.
+user_click_limiter = RateLimiter(SIGNUP_USER_BURST, SIGNUP_USER_PER_MINUTE)
+event_click_limiter = RateLimiter(SIGNUP_EVENT_BURST, SIGNUP_EVENT_PER_MINUTE)
+# (user_id, event_id) -> last status this process stored for the user.
+recent_signups = ExpiringCache(ttl_seconds=60)
+# Signup views this process dispatches clicks to, dropped when the event closes.
+live_signup_views: dict[int, "SignupView"] = {}
+
+ROSTER_PAGE_SIZE = 20
+LIST_PAGE_SIZE = 10
+
 REMIND_OPTIONS = [
-    discord.SelectOption(label="10 minutes before", value="600"),
-    discord.SelectOption(label="30 minutes before", value="1800"),
-    discord.SelectOption(label="1 hour before", value="3600"),
-    discord.SelectOption(label="6 hours before", value="21600"),
+    discord.SelectOption(label=label, value=str(seconds))
+    for label, seconds in REMINDER_OFFSETS.items()
 ]
 
 
+async def notify_promoted(client: discord.Client, user_id: int, event) -> None:
+    try:
+        user = client.get_user(user_id) or await client.fetch_user(user_id)
+        await user.send(
+            f"✅ A slot opened up: you're now signed up for **{event['title']}** "
+            f"at <t:{event['timestamp']}:F>."
+        )
+    except discord.HTTPException:
+        pass
+
+
+def retire_signup_view(event_id: int) -> None:
+    view = live_signup_views.pop(event_id, None)
+    if view is not None:
+        # Stopping removes it from discord.py's view store.
+        view.stop()
+    event_click_limiter.forget(event_id)
+
+
 class SignupView(discord.ui.View):
-    def __init__(self, event_id: int):
+    def __init__(self, event_id: int, *, closed: bool = False):
         super().__init__(timeout=None)
         self.event_id = event_id
 
@@ -62,55 +111,98 @@ class SignupView(discord.ui.View):
                     child.custom_id = f"signup:maybe:{event_id}"
                 if child.label == "Remind Me":
                     child.custom_id = f"signup:remind:{event_id}"
-                    
+                if child.label == "View full roster":
+                    child.custom_id = f"signup:roster:{event_id}"
+                child.disabled = closed
+
+        if closed:
+            # Only sent once as the final state; never dispatched to.
+            self.stop()
+        else:
+            live_signup_views[event_id] = self
 
     async def _set_status(self, interaction: discord.Interaction, status: str):
-        conn = get_connection()
-        try:
-            event = conn.execute(
-                "SELECT * FROM events WHERE id = ?",
-                (self.event_id,),
-            ).fetchone()
-            if not event:
-                await interaction.response.send_message("Event not found.", ephemeral=True)
+        respond = Responder(interaction, update=True)
+        # The click carries the member; keep their name for the embeds.
+        remember_member(interaction.user)
+        key = (interaction.user.id, self.event_id)
+        if recent_signups.get(key) == status:
+            # Same button again: nothing to store or redraw.
+            await respond.defer()
+            return
+
+        retry_after = user_click_limiter.hit(key) or event_click_limiter.hit(self.event_id)
+        if retry_after:
+            await respond.send(f"Slow down a little, try again in {max(1, round(retry_after))}s.")
+            return
+
+        event = await storage.get_event(self.event_id)
+        if not event:
+            await respond.send("Event not found.")
+            return
+        if event["closed_at"] is not None:
+            await respond.send("Signups for this event are closed.")
+            return
+
+        allowed_roles = await storage.get_allowed_role_ids(self.event_id)
+        signup_mode = (event["signup_mode"] or "open").lower()
+
+        if signup_mode == "invite":
+            if interaction.user.id != event["creator_id"]:
+                await respond.send("Invite-only. Ask the host.")
                 return
 
-            allowed_roles = get_allowed_role_ids(conn, self.event_id)
-            signup_mode = (event["signup_mode"] or "open").lower()
-
-            if signup_mode == "invite":
-                if interaction.user.id != event["creator_id"]:
-                    await interaction.response.send_message("Invite-only. Ask the host.", ephemeral=True)
-                    return
-
-            if signup_mode == "role":
-                member = interaction.user if isinstance(interaction.user, discord.Member) else None
-                if member is None and interaction.guild:
-                    member = await interaction.guild.fetch_member(interaction.user.id)
-                if not user_has_allowed_role(member, allowed_roles):
-                    await interaction.response.send_message("You don't have the required role(s).", ephemeral=True)
-                    return
-
-            if status == "available":
-                current = conn.execute(
-                    "SELECT COUNT(*) FROM event_signups WHERE event_id = ? AND status = 'available'",
-                    (self.event_id,),
-                ).fetchone()[0]
-                max_slots = event["max_slots"]
-                if current >= max_slots:
-                    await interaction.response.send_message("Event is full.", ephemeral=True)
-                    return
-
-            conn.execute(
-                """
-                INSERT OR REPLACE INTO event_signups (event_id, user_id, status, created_at)
-                VALUES (?, ?, ?, ?)
-                """,
-                (self.event_id, interaction.user.id, status, int(datetime.now(tz=timezone.utc).timestamp())),
+        if signup_mode == "role":
+            member = interaction.user if isinstance(interaction.user, discord.Member) else None
+            if member is None and interaction.guild:
+                # An API round trip; don't let it eat the response deadline.
+                await respond.defer()
+                member = await interaction.guild.fetch_member(interaction.user.id)
+            if not user_has_allowed_role(member, allowed_roles):
+                await respond.send("You don't have the required role(s).")
+                return
+
+        # A full event puts the user on the waitlist; leaving a slot promotes
+        # the next waitlisted user in the same transaction.
+        try:
+            result = await storage.set_signup(
+                self.event_id,
+                interaction.user.id,
+                status,
+                now_ts=int(datetime.now(tz=timezone.utc).timestamp()),
             )
-            conn.commit()
-        finally:
-            conn.close()
+        except EventFullError:
+            await respond.send("Event is full.")
+            return
+        if result["status"] is None:
+            await respond.send("Event not found.")
+            return
+        # Cache what was stored: a full event turns "available" into "waitlist".
+        recent_signups.set(key, result["status"])
+
+        if result["changed"]:
+            # Reminders are only wanted while the user plans to come.
+            if result["status"] == "unavailable":
+                await storage.clear_reminders(self.event_id, interaction.user.id)
+            else:
+                await storage.apply_reminder_defaults(
+                    self.event_id,
+                    interaction.user.id,
+                    event_ts=event["timestamp"],
+                    now_ts=int(datetime.now(tz=timezone.utc).timestamp()),
+                )
+
+        waitlist_text = (
+            f"Event is full. You're #{result['position']} on the waitlist and "
+            "will get a message if a slot opens up."
+        )
+        if not result["changed"]:
+            # Nothing was written, so the posted embed is still accurate.
+            if result["status"] == "waitlist":
+                await respond.send(waitlist_text)
+            else:
+                await respond.defer()
+            return
 
         embed = await build_signup_embed(
             guild=interaction.guild,
@@ -126,7 +218,12 @@ class SignupView(discord.ui.View):
             schedule_id=event["schedule_id"],
         )
 
-        await interaction.response.edit_message(embed=embed, view=self)
+        await respond.edit(embed=embed, view=self)
+
+        if result["status"] == "waitlist":
+            await respond.send(waitlist_text)
+        if result["promoted_user_id"] is not None:
+            asyncio.create_task(notify_promoted(interaction.client, result["promoted_user_id"], event))
 
     @discord.ui.button(label="Sign Up", style=discord.ButtonStyle.green, row=0)
     async def signup(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -149,6 +246,156 @@ class SignupView(discord.ui.View):
         )
 
 
+    @discord.ui.button(label="View full roster", style=discord.ButtonStyle.secondary, emoji="📋", row=1)
+    async def roster(self, interaction: discord.Interaction, button: discord.ui.Button):
+        respond = Responder(interaction)
+        event = await storage.get_event(self.event_id)
+        if not event:
+            await respond.send("Event not found.")
+            return
+
+        counts, _ = await storage.signup_overview(self.event_id, preview=0)
+        view = RosterView(event_id=self.event_id, title=event["title"], counts=counts)
+        embed = await view.render(interaction.guild)
+        await respond.send(embed=embed, view=view)
+
+
+class RosterView(discord.ui.View):
+    """Ephemeral, page-by-page list of an event's signups, one status at a time."""
+
+    def __init__(self, *, event_id: int, title: str, counts: dict[str, int]):
+        super().__init__(timeout=300)
+        self.event_id = event_id
+        self.title = title
+        self.counts = counts
+        self.status = "available"
+        self.page = 0
+        # Keyset cursor each visited page starts after; None for the first page.
+        self.cursors: list[tuple[int, int] | None] = [None]
+        self.next_cursor: tuple[int, int] | None = None
+        self._update_options()
+
+    def _update_options(self) -> None:
+        self.status_select.options = [
+            discord.SelectOption(
+                label=f"{label} ({self.counts.get(status, 0)})",
+                value=status,
+                default=status == self.status,
+            )
+            for status, label in ROSTER_LABELS.items()
+        ]
+
+    async def render(self, guild: discord.Guild | None) -> discord.Embed:
+        rows = await storage.signup_page(
+            self.event_id,
+            self.status,
+            after=self.cursors[self.page],
+            limit=ROSTER_PAGE_SIZE + 1,
+        )
+        has_next = len(rows) > ROSTER_PAGE_SIZE
+        rows = rows[:ROSTER_PAGE_SIZE]
+        self.next_cursor = (rows[-1]["sort_key"], rows[-1]["user_id"]) if has_next else None
+
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = not has_next
+
+        return build_roster_embed(
+            guild=guild,
+            title=self.title,
+            status=self.status,
+            user_ids=[row["user_id"] for row in rows],
+            page=self.page,
+            page_size=ROSTER_PAGE_SIZE,
+            total=self.counts.get(self.status, 0),
+        )
+
+    @discord.ui.select(placeholder="Status", row=0)
+    async def status_select(self, interaction: discord.Interaction, select: discord.ui.Select):
+        self.status = select.values[0]
+        self.page = 0
+        self.cursors = [None]
+        self._update_options()
+        await interaction.response.edit_message(embed=await self.render(interaction.guild), view=self)
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary, row=1)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(0, self.page - 1)
+        await interaction.response.edit_message(embed=await self.render(interaction.guild), view=self)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary, row=1)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.next_cursor is None:
+            await interaction.response.defer()
+            return
+        if len(self.cursors) == self.page + 1:
+            self.cursors.append(self.next_cursor)
+        self.page += 1
+        await interaction.response.edit_message(embed=await self.render(interaction.guild), view=self)
+
+
+class GuildListView(discord.ui.View):
+    """Ephemeral, page-by-page list of a guild's upcoming events or its schedules."""
+
+    def __init__(self, *, kind: str, guild_id: int):
+        super().__init__(timeout=300)
+        self.kind = kind
+        self.guild_id = guild_id
+        # Upcoming is relative to when the list was opened, so cursors stay valid.
+        self.now_ts = int(datetime.now(tz=timezone.utc).timestamp())
+        self.page = 0
+        # Keyset cursor each visited page starts after; None for the first page.
+        self.cursors: list[tuple[int, int] | None] = [None]
+        self.next_cursor: tuple[int, int] | None = None
+        # Pages already loaded, by cursor; going back never queries again.
+        self.pages: dict[tuple[int, int] | None, list] = {}
+
+    async def _fetch(self, after: tuple[int, int] | None) -> list:
+        if after not in self.pages:
+            if self.kind == "events":
+                self.pages[after] = await storage.guild_events_page(
+                    self.guild_id,
+                    now_ts=self.now_ts,
+                    after=after,
+                    limit=LIST_PAGE_SIZE + 1,
+                )
+            else:
+                self.pages[after] = await storage.guild_schedules_page(
+                    self.guild_id,
+                    after=after,
+                    limit=LIST_PAGE_SIZE + 1,
+                )
+        return self.pages[after]
+
+    async def render(self) -> discord.Embed:
+        rows = await self._fetch(self.cursors[self.page])
+        has_next = len(rows) > LIST_PAGE_SIZE
+        rows = rows[:LIST_PAGE_SIZE]
+        sort_key = "timestamp" if self.kind == "events" else "next_run_at"
+        self.next_cursor = (rows[-1][sort_key], rows[-1]["id"]) if has_next else None
+
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = not has_next
+
+        if self.kind == "events":
+            return build_events_list_embed(guild_id=self.guild_id, rows=rows, page=self.page)
+        return build_schedules_list_embed(rows=rows, page=self.page)
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(0, self.page - 1)
+        await interaction.response.edit_message(embed=await self.render(), view=self)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.next_cursor is None:
+            await interaction.response.defer()
+            return
+        if len(self.cursors) == self.page + 1:
+            self.cursors.append(self.next_cursor)
+        self.page += 1
+        await interaction.response.edit_message(embed=await self.render(), view=self)
+
+
 class ReminderSelectView(discord.ui.View):
     def __init__(self, event_id: int):
         super().__init__(timeout=120)
@@ -161,38 +408,18 @@ class ReminderSelectView(discord.ui.View):
     async def select_reminder(self, interaction: discord.Interaction, select: discord.ui.Select):
         seconds_before = int(select.values[0])
 
-        conn = get_connection()
-        try:
-            event = conn.execute(
-                "SELECT id, title, timestamp FROM events WHERE id = ?",
-                (self.event_id,),
-            ).fetchone()
-
-            if not event:
-                await interaction.response.send_message("Event not found.", ephemeral=True)
-                return
+        event = await storage.get_event(self.event_id)
+        if not event:
+            await interaction.response.send_message("Event not found.", ephemeral=True)
+            return
 
-            remind_at = int(event["timestamp"]) - seconds_before
-            now_ts = int(datetime.now(tz=timezone.utc).timestamp())
-            if remind_at <= now_ts:
-                await interaction.response.send_message("That event is too soon for that reminder.", ephemeral=True)
-                return
+        now_ts = int(datetime.now(tz=timezone.utc).timestamp())
+        if int(event["timestamp"]) - seconds_before <= now_ts:
+            await interaction.response.send_message("That event is too soon for that reminder.", ephemeral=True)
+            return
 
-            conn.execute(
-                """
-                INSERT OR IGNORE INTO event_reminders (event_id, user_id, remind_at, created_at)
-                VALUES (?, ?, ?, ?)
-                """,
-                (
-                    event["id"],
-                    interaction.user.id,
-                    remind_at,
-                    now_ts,
-                ),
-            )
-            conn.commit()
-        finally:
-            conn.close()
+        # Stored relative to the event, so it still fits if the event moves.
+        await storage.add_reminder(event["id"], interaction.user.id, seconds_before, now_ts=now_ts)
 
         await interaction.response.edit_message(
             content=f"✅ I will send you a message {seconds_before // 60} minutes before.",
@@ -200,6 +427,31 @@ class ReminderSelectView(discord.ui.View):
         )
 
 
+class ReminderDefaultsView(discord.ui.View):
+    def __init__(self, current: list[int]):
+        super().__init__(timeout=120)
+        self.reminder_select.options = [
+            discord.SelectOption(label=option.label, value=option.value, default=int(option.value) in current)
+            for option in REMIND_OPTIONS
+        ]
+        self.reminder_select.max_values = len(REMIND_OPTIONS)
+
+    @discord.ui.select(
+        placeholder="Reminders for every event you sign up for",
+        min_values=0,
+    )
+    async def reminder_select(self, interaction: discord.Interaction, select: discord.ui.Select):
+        offsets = sorted(int(value) for value in select.values)
+        await storage.set_reminder_defaults(interaction.user.id, offsets)
+
+        if offsets:
+            labels = ", ".join(o.label for o in REMIND_OPTIONS if int(o.value) in offsets)
+            content = f"✅ New signups get these reminders: {labels}."
+        else:
+            content = "✅ New signups won't get reminders automatically."
+        await interaction.response.edit_message(content=content, view=None)
+
+
 class EventRolePickerView(discord.ui.View):
     def __init__(
         self,
@@ -240,59 +492,33 @@ class EventRolePickerView(discord.ui.View):
 
     @discord.ui.button(label="Create Event", style=discord.ButtonStyle.green)
     async def submit(self, interaction: discord.Interaction, button: discord.ui.Button):
+        respond = Responder(interaction, update=True)
+        remember_member(interaction.user)
         if not self.selected_role_ids:
-            await interaction.response.send_message("Please select at least one role.", ephemeral=True)
+            await respond.send("Please select at least one role.")
             return
 
+        # Posting takes several API calls; acknowledge the click first.
+        await respond.defer()
+
         max_slots = default_max_slots(self.category)
         now_ts = int(datetime.now(tz=timezone.utc).timestamp())
 
-        conn = get_connection()
-        try:
-            cursor = conn.execute(
-                """
-                INSERT INTO events (
-                    guild_id,
-                    channel_id,
-                    creator_id,
-                    title,
-                    category,
-                    duration,
-                    signup_mode,
-                    max_slots,
-                    timestamp,
-                    ping_roles,
-                    announcement_message,
-                    created_at
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    self.guild_id,
-                    self.channel_id,
-                    self.creator_id,
-                    self.title,
-                    self.category,
-                    self.duration,
-                    self.signup_mode.lower(),
-                    max_slots,
-                    self.timestamp,
-                    int(self.ping_roles),
-                    self.announcement_message,
-                    now_ts,
-                ),
-            )
-            event_id = cursor.lastrowid
-
-            for role_id in self.selected_role_ids:
-                conn.execute(
-                    "INSERT OR IGNORE INTO event_allowed_roles (event_id, role_id) VALUES (?, ?)",
-                    (event_id, role_id),
-                )
-
-            conn.commit()
-        finally:
-            conn.close()
+        event_id = await storage.create_event(
+            guild_id=self.guild_id,
+            channel_id=self.channel_id,
+            creator_id=self.creator_id,
+            title=self.title,
+            category=self.category,
+            duration=self.duration,
+            signup_mode=self.signup_mode.lower(),
+            max_slots=max_slots,
+            timestamp=self.timestamp,
+            ping_roles=self.ping_roles,
+            announcement_message=self.announcement_message,
+            allowed_role_ids=self.selected_role_ids,
+            created_at=now_ts,
+        )
 
         embed = await build_signup_embed(
             guild=interaction.guild,
@@ -328,8 +554,9 @@ class EventRolePickerView(discord.ui.View):
                 everyone=False,
             ),
         )
+        await storage.set_event_message(event_id, message.id)
         await message.create_thread(name=f"{self.title} Discussion")
-        await interaction.response.edit_message(content="Event created.", view=None)
+        await respond.edit(content="Event created.", view=None)
 
 
 class ScheduleIntervalView(discord.ui.View):
@@ -345,7 +572,8 @@ class ScheduleIntervalView(discord.ui.View):
         ping_roles: bool,
         announcement_message: str | None,
         start_date: str | None,
-        end_date: str | None
+        end_date: str | None,
+        catch_up: str = "skip",
     ):
         super().__init__(timeout=300)
         self.title = title
@@ -358,6 +586,7 @@ class ScheduleIntervalView(discord.ui.View):
         self.announcement_message = announcement_message
         self.start_date = start_date
         self.end_date = end_date
+        self.catch_up = catch_up
         self.interval_value: int | None = None
         self.day_of_week: int | None = None
 
@@ -437,8 +666,7 @@ class ScheduleIntervalView(discord.ui.View):
             )
             return
 
-        step_seconds = 86400 if self.frequency == "daily" else 7 * 86400
-        step_seconds *= self.interval_value
+        step_seconds = schedule_step_seconds(self.frequency, self.interval_value)
 
         first_run_at = time_ts
         while first_run_at < start_ts:
@@ -465,6 +693,7 @@ class ScheduleIntervalView(discord.ui.View):
                 channel_id=interaction.channel_id,
                 ping_roles=self.ping_roles,
                 announcement_message=self.announcement_message,
+                catch_up=self.catch_up,
             )
 
             await interaction.response.edit_message(
@@ -489,6 +718,7 @@ class ScheduleIntervalView(discord.ui.View):
             allowed_role_ids=None,
             ping_roles=self.ping_roles,
             announcement_message=self.announcement_message,
+            catch_up=self.catch_up,
         )
         await interaction.response.edit_message(content="Schedule created.", view=None)
 
@@ -512,6 +742,7 @@ class ScheduleRolePickerView(discord.ui.View):
         channel_id: int,
         ping_roles: bool,
         announcement_message: str | None,
+        catch_up: str = "skip",
     ):
         super().__init__(timeout=300)
         self.title = title
@@ -529,6 +760,7 @@ class ScheduleRolePickerView(discord.ui.View):
         self.channel_id = channel_id
         self.ping_roles = ping_roles
         self.announcement_message = announcement_message
+        self.catch_up = catch_up
         self.selected_role_ids: list[int] = []
 
     @discord.ui.select(
@@ -563,6 +795,7 @@ class ScheduleRolePickerView(discord.ui.View):
             allowed_role_ids=self.selected_role_ids,
             ping_roles=self.ping_roles,
             announcement_message=self.announcement_message,
+            catch_up=self.catch_up,
         )
 
         await interaction.response.edit_message(content="Schedule created.", view=None)
@@ -586,6 +819,8 @@ class ScheduleEditRolePickerView(discord.ui.View):
         signup_mode: str,
         ping_roles: bool,
         announcement_message: str | None,
+        catch_up: str,
+        event_shift: int,
     ):
         super().__init__(timeout=300)
         self.schedule_id = schedule_id
@@ -602,6 +837,8 @@ class ScheduleEditRolePickerView(discord.ui.View):
         self.signup_mode = signup_mode
         self.ping_roles = ping_roles
         self.announcement_message = announcement_message
+        self.catch_up = catch_up
+        self.event_shift = event_shift
         self.selected_role_ids: list[int] = []
 
     @discord.ui.select(
@@ -620,56 +857,26 @@ class ScheduleEditRolePickerView(discord.ui.View):
             await interaction.response.send_message("Select at least one role.", ephemeral=True)
             return
 
-        conn = get_connection()
-        try:
-            conn.execute(
-                """
-                UPDATE schedules
-                SET title = ?,
-                    category = ?,
-                    frequency = ?,
-                    interval = ?,
-                    day_of_week = ?,
-                    time_of_day = ?,
-                    duration = ?,
-                    start_date = ?,
-                    end_date = ?,
-                    signup_mode = ?,
-                    ping_roles = ?,
-                    announcement_message = ?,
-                    next_run_at = ?
-                WHERE id = ?
-                """,
-                (
-                    self.title,
-                    self.category,
-                    self.frequency,
-                    self.interval_value,
-                    self.day_of_week,
-                    self.time_ts,
-                    self.duration,
-                    self.start_ts,
-                    self.end_ts,
-                    self.signup_mode,
-                    int(self.ping_roles),
-                    self.announcement_message,
-                    self.next_run_at,
-                    self.schedule_id,
-                ),
-            )
-
-            conn.execute(
-                "DELETE FROM schedule_allowed_roles WHERE schedule_id = ?",
-                (self.schedule_id,),
-            )
-            for role_id in self.selected_role_ids:
-                conn.execute(
-                    "INSERT OR IGNORE INTO schedule_allowed_roles (schedule_id, role_id) VALUES (?, ?)",
-                    (self.schedule_id, role_id),
-                )
-
-            conn.commit()
-        finally:
-            conn.close()
+        event_ids = await storage.update_schedule(
+            self.schedule_id,
+            title=self.title,
+            category=self.category,
+            frequency=self.frequency,
+            interval=self.interval_value,
+            day_of_week=self.day_of_week,
+            time_of_day=self.time_ts,
+            duration=self.duration,
+            start_date=self.start_ts,
+            end_date=self.end_ts,
+            signup_mode=self.signup_mode,
+            ping_roles=self.ping_roles,
+            announcement_message=self.announcement_message,
+            next_run_at=self.next_run_at,
+            catch_up=self.catch_up,
+            allowed_role_ids=self.selected_role_ids,
+            now_ts=int(datetime.now(tz=timezone.utc).timestamp()),
+            event_shift=self.event_shift,
+        )
+        queue_refreshes(event_ids)
 
-        await interaction.response.edit_message(content="Schedule updated.", view=None)
+        await interaction.response.edit_message(content=schedule_updated_text(len(event_ids)), view=None)
@@ -0,0 +1,91 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import discord
+import pytest
+
+# config.py validates the environment on import.
+os.environ.setdefault("DISCORD_TOKEN", "test-token")
+os.environ["ENV"] = "prod"
+os.environ["STORAGE_BACKEND"] = "sqlite"
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from storage import db  # noqa: E402
+from storage.backend import storage as shared_storage  # noqa: E402
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """Point the SQLite backend at an empty database in tmp_path."""
+    monkeypatch.setattr(db, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "synar.db")
+    return tmp_path
+
+
+@pytest.fixture
+def connected_storage(sqlite_db):
+    """The storage instance commands and views use, on a fresh database."""
+    asyncio.run(shared_storage.connect())
+    yield shared_storage
+    asyncio.run(shared_storage.close())
+
+
+class FakeResponse:
+    def __init__(self) -> None:
+        self.sent: list[tuple[str | None, dict]] = []
+
+    def is_done(self) -> bool:
+        return bool(self.sent)
+
+    async def send_message(self, content: str | None = None, **kwargs) -> None:
+        self.sent.append((content, kwargs))
+
+    async def edit_message(self, **kwargs) -> None:
+        self.sent.append((None, kwargs))
+
+    async def defer(self, **kwargs) -> None:
+        self.sent.append((None, {"deferred": True, **kwargs}))
+
+
+class FakeFollowup:
+    def __init__(self) -> None:
+        self.sent: list[tuple[str | None, dict]] = []
+
+    async def send(self, content: str | None = None, **kwargs) -> None:
+        self.sent.append((content, kwargs))
+
+
+class FakeUser:
+    def __init__(self, user_id: int) -> None:
+        self.id = user_id
+
+
+class FakeMessage:
+    def __init__(self, message_id: int) -> None:
+        self.id = message_id
+        self.threads: list[str] = []
+
+    async def create_thread(self, *, name: str) -> None:
+        self.threads.append(name)
+
+
+class FakeInteraction:
+    """Just enough of discord.Interaction for command callbacks."""
+
+    def __init__(self, *, user_id: int, guild_id: int | None, channel_id: int = 10) -> None:
+        self.id = 1
+        self.created_at = discord.utils.utcnow()
+        self.user = FakeUser(user_id)
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.guild = None
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+        # What original_response() returns once something was sent.
+        self.message = FakeMessage(900)
+
+    async def original_response(self) -> FakeMessage:
+        return self.message
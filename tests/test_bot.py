@@ -0,0 +1,133 @@
+import asyncio
+import sqlite3
+from types import SimpleNamespace
+
+import discord
+import pytest
+
+import bot
+
+
+def test_scheduler_loop_survives_storage_errors(monkeypatch):
+    rows = [
+        {"id": 1, "failure_count": 0},
+        {"id": 2, "failure_count": 2},
+        {"id": 3, "failure_count": 0},
+    ]
+    ran = []
+    cleared = []
+
+    async def holds_lease(job, ttl_seconds=0):
+        return True
+
+    async def active_schedules(*, now_ts):
+        return rows
+
+    async def run_schedule(row, now_ts):
+        ran.append(row["id"])
+        if row["id"] == 1:
+            raise bot.ChannelUnavailable("gone")
+
+    async def mark_schedule_failed(schedule_id, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+
+    async def clear_schedule_failures(schedule_id):
+        cleared.append(schedule_id)
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(bot, "holds_lease", holds_lease)
+    monkeypatch.setattr(bot, "run_schedule", run_schedule)
+    monkeypatch.setattr(bot.storage, "active_schedules", active_schedules)
+    monkeypatch.setattr(bot.storage, "mark_schedule_failed", mark_schedule_failed)
+    monkeypatch.setattr(bot.storage, "clear_schedule_failures", clear_schedule_failures)
+
+    asyncio.run(bot.scheduler_loop.coro())
+
+    assert ran == [1, 2, 3]
+    assert cleared == [2]
+
+
+@pytest.mark.parametrize(
+    ("loop", "failing_query"),
+    [
+        ("scheduler_loop", "active_schedules"),
+        ("reminder_loop", "due_reminders"),
+        ("lifecycle_loop", "close_due_events"),
+        ("retire_views_loop", "closed_event_ids"),
+        ("view_sync_loop", "event_ids_after"),
+    ],
+)
+def test_loops_survive_a_locked_database(monkeypatch, loop, failing_query):
+    async def holds_lease(job, ttl_seconds=0):
+        return True
+
+    async def locked(*args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(bot, "holds_lease", holds_lease)
+    monkeypatch.setattr(bot.storage, failing_query, locked)
+    watermarks = (bot.client.view_watermark, bot.client.retire_watermark)
+
+    asyncio.run(getattr(bot, loop).coro())
+
+    # Nothing was loaded, so the next tick starts from the same place.
+    assert (bot.client.view_watermark, bot.client.retire_watermark) == watermarks
+
+
+def test_scheduler_loop_survives_a_failing_lease(monkeypatch):
+    async def holds_lease(job, ttl_seconds=0):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(bot, "holds_lease", holds_lease)
+
+    asyncio.run(bot.scheduler_loop.coro())
+
+
+def test_failed_thread_chunk_falls_back_to_dms_only_for_its_users(monkeypatch):
+    rows = [
+        {
+            "id": n,
+            "user_id": 100_000_000_000_000_000 + n,
+            "event_id": 1,
+            "offset_seconds": 900,
+            "title": "Raid",
+            "timestamp": 1_800_000_000,
+            "message_id": 42,
+            "reminder_mode": "thread",
+        }
+        for n in range(150)
+    ]
+    posted = []
+    dmed = []
+    deleted = []
+
+    class FlakyThread:
+        async def send(self, content, **kwargs):
+            if posted:
+                raise discord.HTTPException(SimpleNamespace(status=503, reason="Unavailable"), "try later")
+            posted.append(content)
+
+    async def holds_lease(job, ttl_seconds=0):
+        return True
+
+    async def due_reminders(*, now_ts, max_offset):
+        return rows
+
+    async def delete_reminders(reminder_ids):
+        deleted.extend(reminder_ids)
+
+    async def send_dm_reminder(r):
+        dmed.append(r["user_id"])
+
+    monkeypatch.setattr(bot, "holds_lease", holds_lease)
+    monkeypatch.setattr(bot, "send_dm_reminder", send_dm_reminder)
+    monkeypatch.setattr(bot.client, "get_partial_messageable", lambda channel_id: FlakyThread())
+    monkeypatch.setattr(bot.storage, "due_reminders", due_reminders)
+    monkeypatch.setattr(bot.storage, "delete_reminders", delete_reminders)
+
+    asyncio.run(bot.reminder_loop.coro())
+
+    reached = [r["user_id"] for r in rows if f"<@{r['user_id']}>" in posted[0]]
+    assert 0 < len(reached) < len(rows)
+    assert dmed == [r["user_id"] for r in rows[len(reached):]]
+    assert sorted(deleted) == [r["id"] for r in rows]
@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+import commands
+import refresher
+from conftest import FakeInteraction
+from helpers import schedule_updated_text
+
+NOW = 1_800_000_000
+DAY = 86400
+
+
+@pytest.fixture(autouse=True)
+def clear_refresh_queue():
+    yield
+    refresher.queued_refreshes.clear()
+    while not refresher.refresh_queue.empty():
+        refresher.refresh_queue.get_nowait()
+
+
+async def create_daily_schedule(storage, *, creator_id: int, now_ts: int) -> tuple[int, int]:
+    """A daily schedule that already posted its next occurrence."""
+    time_of_day = now_ts + DAY - (now_ts + DAY) % 60
+    schedule_id = await storage.create_schedule(
+        guild_id=1,
+        channel_id=10,
+        creator_id=creator_id,
+        title="Old title",
+        category="Raids",
+        duration=2,
+        frequency="daily",
+        interval=1,
+        day_of_week=None,
+        time_of_day=time_of_day,
+        start_date=now_ts - DAY,
+        end_date=None,
+        signup_mode="open",
+        ping_roles=False,
+        announcement_message=None,
+        next_run_at=time_of_day,
+        allowed_role_ids=None,
+        created_at=now_ts - DAY,
+    )
+    event_id = await storage.create_event(
+        schedule_id=schedule_id,
+        guild_id=1,
+        channel_id=10,
+        creator_id=creator_id,
+        title="Old title",
+        category="Raids",
+        duration=2,
+        signup_mode="open",
+        max_slots=10,
+        timestamp=time_of_day,
+        ping_roles=False,
+        announcement_message=None,
+        created_at=now_ts,
+    )
+    return schedule_id, event_id
+
+
+def test_edit_schedule_updates_upcoming_events_and_answers(connected_storage):
+    async def scenario():
+        schedule_id, event_id = await create_daily_schedule(connected_storage, creator_id=5, now_ts=NOW)
+
+        interaction = FakeInteraction(user_id=5, guild_id=1)
+        await commands.edit_schedule.callback(interaction, id=schedule_id, title="New title")
+
+        assert interaction.response.sent == [(schedule_updated_text(1), {"ephemeral": True})]
+        assert (await connected_storage.get_schedule(schedule_id))["title"] == "New title"
+        assert (await connected_storage.get_event(event_id))["title"] == "New title"
+        assert event_id in refresher.queued_refreshes
+
+    asyncio.run(scenario())
+
+
+def test_edit_schedule_refuses_other_users(connected_storage):
+    async def scenario():
+        schedule_id, _ = await create_daily_schedule(connected_storage, creator_id=5, now_ts=NOW)
+
+        interaction = FakeInteraction(user_id=6, guild_id=1)
+        await commands.edit_schedule.callback(interaction, id=schedule_id, title="New title")
+
+        assert interaction.response.sent[0][0] == "Only the creator or an admin can edit this schedule."
+        assert (await connected_storage.get_schedule(schedule_id))["title"] == "Old title"
+
+    asyncio.run(scenario())
+
+
+def test_create_event_remembers_its_signup_post(connected_storage):
+    async def scenario():
+        interaction = FakeInteraction(user_id=5, guild_id=1)
+        await commands.create_event.callback(
+            interaction,
+            title="Raid night",
+            category="Raids",
+            timestamp=str(NOW + DAY),
+            duration=2,
+            signup_mode="Open",
+        )
+
+        event_id = await connected_storage.max_event_id()
+        assert (await connected_storage.get_event(event_id))["message_id"] == interaction.message.id
+        assert interaction.message.threads == ["Raid night Discussion"]
+
+    asyncio.run(scenario())
+
+
+def test_server_commands_are_guild_only():
+    for group in (commands.export, commands.list_, commands.stats):
+        assert group.guild_only, group.name
+
+
+def test_reminder_mode_in_dms_answers_instead_of_failing(connected_storage):
+    async def scenario():
+        interaction = FakeInteraction(user_id=5, guild_id=None)
+        await commands.reminder_mode.callback(interaction, mode="thread")
+
+        assert interaction.response.sent == [
+            ("Reminder modes can only be changed in a server.", {"ephemeral": True})
+        ]
+
+    asyncio.run(scenario())
@@ -0,0 +1,200 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+from helpers import export_schedules_json, ics_line, ics_text, parse_schedules_json, write_ics_calendar
+
+NOW = 1_800_000_000
+
+
+def schedule_row(**overrides) -> dict:
+    """A schedule as Storage.guild_schedules returns it."""
+    row = {
+        "id": 7,
+        "guild_id": 1,
+        "channel_id": 123_456_789_012_345_678,
+        "title": "Weekly raid",
+        "category": "Raids",
+        "duration": 2,
+        "frequency": "weekly",
+        "interval": 1,
+        "day_of_week": 3,
+        "time_of_day": NOW + 3600,
+        "start_date": NOW,
+        "end_date": None,
+        "signup_mode": "role",
+        "ping_roles": 1,
+        "announcement_message": "Bring food",
+        "allowed_role_ids": [234_567_890_123_456_789],
+        "catch_up": "latest",
+    }
+    row.update(overrides)
+    return row
+
+
+def export_payload(*entries: dict) -> bytes:
+    return json.dumps({"version": 1, "guild_id": "1", "exported_at": NOW, "schedules": list(entries)}).encode()
+
+
+def test_schedule_export_round_trips():
+    data = export_schedules_json([schedule_row()], guild_id=1, now_ts=NOW)
+
+    payload = json.loads(data)
+    # Snowflakes travel as strings so JavaScript readers keep them exact.
+    assert payload["schedules"][0]["channel_id"] == "123456789012345678"
+    assert payload["schedules"][0]["allowed_role_ids"] == ["234567890123456789"]
+    assert "id" not in payload["schedules"][0]
+
+    schedules, errors = parse_schedules_json(data)
+    assert errors == []
+    expected = {k: v for k, v in schedule_row().items() if k not in ("id", "guild_id")}
+    assert schedules == [{**expected, "ping_roles": True}]
+
+
+def test_schedule_import_normalizes_open_schedules():
+    entry = json.loads(export_schedules_json([schedule_row()], guild_id=1, now_ts=NOW))["schedules"][0]
+    entry.update(
+        signup_mode="Open",
+        frequency="daily",
+        time_of_day=NOW + 3625,
+        title="  Daily raid ",
+        announcement_message="   ",
+    )
+    del entry["catch_up"]
+
+    schedules, errors = parse_schedules_json(export_payload(entry))
+
+    assert errors == []
+    [schedule] = schedules
+    assert schedule["signup_mode"] == "open"
+    assert schedule["title"] == "Daily raid"
+    # Open schedules have no roles to ping, and daily ones no weekday.
+    assert (schedule["ping_roles"], schedule["allowed_role_ids"], schedule["day_of_week"]) == (False, [], None)
+    assert schedule["time_of_day"] == NOW + 3600
+    assert schedule["announcement_message"] is None
+    assert schedule["catch_up"] == "skip"
+
+
+@pytest.mark.parametrize(
+    ("data", "error"),
+    [
+        (b"{not json", "not a valid JSON file"),
+        (b"[]", "missing the schedules list"),
+        (json.dumps({"version": 2, "schedules": []}).encode(), "unsupported export version 2"),
+    ],
+)
+def test_schedule_import_rejects_other_files(data, error):
+    schedules, errors = parse_schedules_json(data)
+
+    assert schedules == []
+    assert len(errors) == 1 and errors[0].startswith(error)
+
+
+@pytest.mark.parametrize(
+    ("overrides", "error"),
+    [
+        ({"title": " "}, "title is missing"),
+        ({"category": "Parties"}, "unknown category 'Parties'"),
+        ({"frequency": "monthly"}, "unknown frequency 'monthly'"),
+        ({"interval": 0}, "interval must be at least 1"),
+        ({"day_of_week": 7}, "weekly schedules need a day_of_week between 0 and 6"),
+        ({"time_of_day": True}, "time_of_day must be an integer"),
+        ({"duration": 0}, "duration must be greater than 0"),
+        ({"end_date": NOW}, "end_date must be after start_date"),
+        ({"allowed_role_ids": []}, "role signup mode needs allowed_role_ids"),
+        ({"catch_up": "some"}, "unknown catch_up 'some'"),
+    ],
+)
+def test_schedule_import_reports_every_bad_entry(overrides, error):
+    good = json.loads(export_schedules_json([schedule_row()], guild_id=1, now_ts=NOW))["schedules"][0]
+
+    schedules, errors = parse_schedules_json(export_payload(good, {**good, **overrides}))
+
+    # One bad entry rejects the whole file, so nothing is half imported.
+    assert schedules == []
+    assert errors == [f"schedule 2: {error}"]
+
+
+def event_row(n: int, **overrides) -> dict:
+    """An event as Storage.iter_guild_calendar_events yields it."""
+    row = {
+        "id": n,
+        "channel_id": 123,
+        "message_id": 456,
+        "timestamp": NOW + n * 3600,
+        "duration": 1,
+        "title": f"Event {n}",
+        "category": "Raids",
+    }
+    row.update(overrides)
+    return row
+
+
+def write_calendar(*, schedules=(), events=(), max_bytes=1_000_000) -> tuple[bytes, tuple[int, int, bool]]:
+    async def batches():
+        for start in range(0, len(events), 2):
+            yield list(events[start:start + 2])
+
+    fp = io.BytesIO()
+    result = asyncio.run(write_ics_calendar(
+        fp,
+        name="Guild, calendar",
+        guild_id=1,
+        schedules=list(schedules),
+        event_batches=batches(),
+        now_ts=NOW,
+        max_bytes=max_bytes,
+    ))
+    return fp.getvalue(), result
+
+
+def test_ics_text_escapes_special_characters():
+    assert ics_text("a\\b;c,d\ne") == "a\\\\b\\;c\\,d\\ne"
+
+
+def test_ics_line_folds_at_75_octets_without_splitting_characters():
+    line = "SUMMARY:" + "é" * 100
+
+    data = ics_line(line)
+
+    physical = data.split(b"\r\n")
+    assert data.endswith(b"\r\n") and physical[-1] == b""
+    assert all(len(part) <= 75 for part in physical)
+    assert all(part.startswith(b" ") for part in physical[1:-1])
+    # Unfolding gives back the original line, so no character was cut in half.
+    assert data[:-2].replace(b"\r\n ", b"").decode("utf-8") == line
+
+
+def test_ics_line_leaves_short_lines_alone():
+    assert ics_line("BEGIN:VEVENT") == b"BEGIN:VEVENT\r\n"
+
+
+def test_write_ics_calendar_writes_schedules_and_events():
+    schedule = {**schedule_row(), "next_run_at": NOW + 86400, "end_date": NOW + 30 * 86400}
+
+    data, result = write_calendar(schedules=[schedule], events=[event_row(1), event_row(2, message_id=None)])
+
+    assert result == (2, 1, False)
+    assert data.startswith(b"BEGIN:VCALENDAR\r\n") and data.endswith(b"END:VCALENDAR\r\n")
+    assert b"X-WR-CALNAME:Guild\\, calendar\r\n" in data
+    assert b"RRULE:FREQ=WEEKLY;INTERVAL=1;UNTIL=" in data
+    assert b"URL:https://discord.com/channels/1/123/456\r\n" in data
+    assert b"URL:https://discord.com/channels/1/123\r\n" in data
+    assert data.count(b"BEGIN:VEVENT") == 3
+
+
+def test_write_ics_calendar_stops_before_max_bytes():
+    events = [event_row(n) for n in range(1, 21)]
+    full, _ = write_calendar(events=events)
+
+    max_bytes = len(full) // 2
+    data, (event_count, schedule_count, truncated) = write_calendar(events=events, max_bytes=max_bytes)
+
+    assert truncated
+    assert 0 < event_count < len(events) and schedule_count == 0
+    assert len(data) <= max_bytes
+    # The file is still a complete calendar, ending on a whole event.
+    assert data.endswith(b"END:VEVENT\r\nEND:VCALENDAR\r\n")
+    assert data.count(b"BEGIN:VEVENT") == data.count(b"END:VEVENT") == event_count
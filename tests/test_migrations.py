@@ -0,0 +1,126 @@
+import pytest
+
+from storage import db
+
+
+@pytest.fixture
+def migrations_dir(sqlite_db, tmp_path, monkeypatch):
+    path = tmp_path / "migrations"
+    path.mkdir()
+    monkeypatch.setattr(db, "MIGRATIONS_DIR", path)
+    return path
+
+
+@pytest.fixture
+def conn(sqlite_db):
+    conn = db.get_connection()
+    yield conn
+    conn.close()
+
+
+def tables(conn) -> set[str]:
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def applied(conn) -> dict[str, str]:
+    return {row["id"]: row["checksum"] for row in conn.execute("SELECT id, checksum FROM schema_migrations")}
+
+
+def test_parse_migration_splits_off_the_backfill(migrations_dir):
+    path = migrations_dir / "0000_0002_add_score.sql"
+    path.write_text(
+        "-- Scores per player.\n"
+        "ALTER TABLE players ADD COLUMN score INTEGER;\n"
+        "CREATE INDEX idx_players_score\n"
+        "    ON players(score);\n"
+        "-- backfill\n"
+        "UPDATE players SET score = 0\n"
+        "WHERE id IN (SELECT id FROM players WHERE score IS NULL LIMIT :batch_size);\n"
+    )
+
+    migration = db.parse_migration(path)
+
+    assert migration["id"] == "0000_0002_add_score"
+    assert migration["version"] == 2
+    assert migration["schema"] == [
+        "-- Scores per player.\nALTER TABLE players ADD COLUMN score INTEGER;",
+        "CREATE INDEX idx_players_score\n    ON players(score);",
+    ]
+    assert len(migration["backfill"]) == 1 and migration["backfill"][0].startswith("UPDATE players")
+    assert len(migration["checksum"]) == 64
+
+
+def test_run_migrations_applies_pending_files_once(migrations_dir, conn):
+    (migrations_dir / "0000_0001_players.sql").write_text("CREATE TABLE players (id INTEGER PRIMARY KEY);\n")
+    (migrations_dir / "0000_0002_teams.sql").write_text("CREATE TABLE teams (id INTEGER PRIMARY KEY);\n")
+
+    results = db.run_migrations(conn)
+
+    assert [r["id"] for r in results] == ["0000_0001_players", "0000_0002_teams"]
+    assert {"players", "teams"} <= tables(conn)
+    assert db.schema_version(conn) == 2
+    assert applied(conn)["0000_0001_players"] == db.parse_migration(migrations_dir / "0000_0001_players.sql")["checksum"]
+    assert db.run_migrations(conn) == []
+
+
+def test_edited_migration_stops_the_run_before_anything_changes(migrations_dir, conn):
+    first = migrations_dir / "0000_0001_players.sql"
+    first.write_text("CREATE TABLE players (id INTEGER PRIMARY KEY);\n")
+    db.run_migrations(conn)
+
+    first.write_text("CREATE TABLE players (id INTEGER PRIMARY KEY, name TEXT);\n")
+    (migrations_dir / "0000_0002_teams.sql").write_text("CREATE TABLE teams (id INTEGER PRIMARY KEY);\n")
+
+    with pytest.raises(RuntimeError, match="0000_0001_players was modified"):
+        db.run_migrations(conn)
+    assert "teams" not in tables(conn)
+    assert db.schema_version(conn) == 1
+
+
+def test_failing_migration_is_rolled_back_completely(migrations_dir, conn):
+    (migrations_dir / "0000_0001_players.sql").write_text(
+        "CREATE TABLE players (id INTEGER PRIMARY KEY);\n"
+        "INSERT INTO no_such_table VALUES (1);\n"
+    )
+
+    with pytest.raises(RuntimeError, match="0000_0001_players failed and was rolled back"):
+        db.run_migrations(conn)
+    assert "players" not in tables(conn)
+    assert applied(conn) == {}
+
+
+def test_dry_run_reports_and_rolls_back(migrations_dir, conn):
+    (migrations_dir / "0000_0001_players.sql").write_text(
+        "CREATE TABLE players (id INTEGER PRIMARY KEY, score INTEGER);\n"
+        "INSERT INTO players (id) VALUES (1), (2), (3);\n"
+        "-- backfill\n"
+        "UPDATE players SET score = 0\n"
+        "WHERE id IN (SELECT id FROM players WHERE score IS NULL LIMIT :batch_size);\n"
+    )
+
+    results = db.run_migrations(conn, dry_run=True)
+
+    assert [(r["id"], r["statements"], r["backfill_statements"]) for r in results] == [("0000_0001_players", 2, 1)]
+    assert results[0]["backfill_rows_first_batch"] == 3
+    assert "players" not in tables(conn)
+    assert applied(conn) == {}
+    assert db.schema_version(conn) == 0
+
+
+def test_backfill_runs_in_batches_until_done(migrations_dir, conn, monkeypatch):
+    monkeypatch.setattr(db, "MIGRATION_BATCH_SIZE", 2)
+    monkeypatch.setattr(db, "MIGRATION_BATCH_PAUSE_SECONDS", 0)
+    (migrations_dir / "0000_0001_players.sql").write_text(
+        "CREATE TABLE players (id INTEGER PRIMARY KEY, score INTEGER);\n"
+        "INSERT INTO players (id) VALUES (1), (2), (3), (4), (5);\n"
+        "-- backfill\n"
+        "UPDATE players SET score = 0\n"
+        "WHERE id IN (SELECT id FROM players WHERE score IS NULL LIMIT :batch_size);\n"
+    )
+    db.run_migrations(conn)
+    assert [m["id"] for m in db.pending_backfills(conn)] == ["0000_0001_players"]
+
+    db.run_pending_backfills()
+
+    assert conn.execute("SELECT COUNT(*) FROM players WHERE score IS NULL").fetchone()[0] == 0
+    assert db.pending_backfills(conn) == []
@@ -0,0 +1,52 @@
+import pytest
+
+from ratelimit import RateLimiter
+
+
+def test_burst_then_refill():
+    limiter = RateLimiter(burst=3, per_minute=6)  # one token every 10s
+
+    assert [limiter.hit("user", now=100.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.hit("user", now=100.0) == pytest.approx(10.0)
+    # A rejected hit takes nothing; four seconds later the wait is six.
+    assert limiter.hit("user", now=104.0) == pytest.approx(6.0)
+
+    assert limiter.hit("user", now=110.0) == 0.0
+    assert limiter.hit("user", now=110.0) > 0
+
+
+def test_refill_stops_at_burst():
+    limiter = RateLimiter(burst=2, per_minute=60)
+    limiter.hit("user", now=0.0)
+
+    # An hour idle still only allows `burst` hits in a row.
+    assert [limiter.hit("user", now=3600.0) for _ in range(2)] == [0.0, 0.0]
+    assert limiter.hit("user", now=3600.0) == pytest.approx(1.0)
+
+
+def test_keys_have_their_own_buckets():
+    limiter = RateLimiter(burst=1, per_minute=1)
+
+    assert limiter.hit("a", now=0.0) == 0.0
+    assert limiter.hit("a", now=0.0) > 0
+    assert limiter.hit("b", now=0.0) == 0.0
+
+    limiter.forget("a")
+    assert limiter.hit("a", now=0.0) == 0.0
+
+
+def test_zero_rate_disables_the_limiter():
+    limiter = RateLimiter(burst=1, per_minute=0)
+
+    assert all(limiter.hit("user", now=0.0) == 0.0 for _ in range(100))
+
+
+def test_refilled_buckets_are_pruned():
+    limiter = RateLimiter(burst=2, per_minute=60)  # full again after 2s
+    for n in range(50):
+        limiter.hit(n, now=0.0)
+    assert len(limiter._buckets) == 50
+
+    limiter.hit("late", now=10.0)
+
+    assert list(limiter._buckets) == ["late"]
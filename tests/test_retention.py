@@ -0,0 +1,71 @@
+import asyncio
+import gzip
+import json
+import time
+
+import pytest
+
+from storage import retention
+
+DAY = 86400
+
+
+@pytest.fixture
+def archive_dir(connected_storage, tmp_path, monkeypatch):
+    archive_dir = tmp_path / "archive"
+    monkeypatch.setattr(retention, "ARCHIVE_JSONL_DIR", archive_dir)
+    return archive_dir
+
+
+def create_old_events(storage, count: int) -> list[int]:
+    old = int(time.time()) - 200 * DAY
+    events = [
+        {
+            "guild_id": 1,
+            "channel_id": 10,
+            "creator_id": 5,
+            "title": f"Raid {n}",
+            "category": "Raids",
+            "duration": 2,
+            "signup_mode": "open",
+            "max_slots": 10,
+            "timestamp": old + n * 3600,
+            "ping_roles": False,
+            "announcement_message": None,
+            "created_at": old - DAY,
+        }
+        for n in range(count)
+    ]
+    return asyncio.run(storage.create_events(events))
+
+
+def archived_event_ids(archive_dir) -> list[int]:
+    event_ids = []
+    for path in sorted(archive_dir.glob("*.jsonl.gz")):
+        with gzip.open(path, "rt", encoding="utf-8") as fp:
+            event_ids.extend(json.loads(line)["event"]["id"] for line in fp)
+    return sorted(event_ids)
+
+
+def archive(**kwargs) -> dict[str, int]:
+    return retention.archive_past_events(older_than_days=90, batch_size=2, archive_format="jsonl", **kwargs)
+
+
+@pytest.mark.parametrize("crash_in", ["_delete_batch", "_publish_jsonl_archive"])
+def test_jsonl_archive_survives_a_crash_around_the_delete(connected_storage, archive_dir, monkeypatch, crash_in):
+    event_ids = create_old_events(connected_storage, 3)
+
+    def crash(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    with monkeypatch.context() as m:
+        m.setattr(retention, crash_in, crash)
+        with pytest.raises(KeyboardInterrupt):
+            archive()
+    assert list(archive_dir.glob(f"*{retention.PENDING_SUFFIX}"))
+
+    summary = archive()
+
+    assert archived_event_ids(archive_dir) == sorted(event_ids)
+    assert not list(archive_dir.glob(f"*{retention.PENDING_SUFFIX}"))
+    assert summary["events"] == (3 if crash_in == "_delete_batch" else 1)
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+import refresher
+import views
+from conftest import FakeInteraction
+
+NOW = 1_800_000_000
+
+
+@pytest.fixture(autouse=True)
+def clear_click_state():
+    yield
+    views.recent_signups._items.clear()
+    views.user_click_limiter._buckets.clear()
+    views.event_click_limiter._buckets.clear()
+    refresher.queued_refreshes.clear()
+    while not refresher.refresh_queue.empty():
+        refresher.refresh_queue.get_nowait()
+
+
+def test_repeated_sign_up_on_full_event_shows_waitlist_position(connected_storage):
+    async def scenario():
+        event_id = await connected_storage.create_event(
+            guild_id=1,
+            channel_id=10,
+            creator_id=5,
+            title="Raid",
+            category="Raids",
+            duration=2,
+            signup_mode="open",
+            max_slots=1,
+            timestamp=NOW,
+            ping_roles=False,
+            announcement_message=None,
+            created_at=NOW - 86400,
+        )
+        await connected_storage.set_signup(event_id, 100, "available", now_ts=NOW - 3600)
+        view = views.SignupView(event_id)
+
+        first = FakeInteraction(user_id=101, guild_id=1)
+        await view._set_status(first, "available")
+        again = FakeInteraction(user_id=101, guild_id=1)
+        await view._set_status(again, "available")
+
+        # The second click is answered from storage, not silently deferred.
+        assert [content for content, _ in again.response.sent] == [
+            "Event is full. You're #1 on the waitlist and will get a message if a slot opens up."
+        ]
+
+    asyncio.run(scenario())